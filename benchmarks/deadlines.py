@@ -0,0 +1,93 @@
+"""Measures what pending phase and action deadlines cost for many concurrent games, with the shared timer wheel and
+with one sleeping task per deadline as asyncio.wait_for used to make.
+
+Every game holds one deadline that is cancelled and replaced many times, as a phase ending normally does, and a
+share of the deadlines are left to fire. Reported are the time to schedule and cancel a deadline, the memory held by
+the pending deadlines, and how late the fired deadlines were.
+
+Run from the repository root with `python -m benchmarks.deadlines`.
+"""
+
+import asyncio
+import random
+import time
+import tracemalloc
+
+from scheduler import Deadline_Scheduler
+
+GAME_COUNTS = [1000, 10000, 50000]
+REPLACEMENTS = 5
+TIMEOUT = 600.0
+FIRED_TIMEOUT = 0.5
+FIRED_SHARE = 0.1
+SEED = 0
+
+class Task_Deadline():
+
+    """One sleeping task per deadline, which is what asyncio.wait_for costs for each waiting action."""
+
+    def __init__(self, delay, callback):
+        self.task = asyncio.ensure_future(self.wait(delay, callback))
+
+    async def wait(self, delay, callback):
+        await asyncio.sleep(delay)
+        callback()
+
+    def cancel(self):
+        self.task.cancel()
+
+async def run(game_count, schedule):
+    """Schedules and replaces every game's deadline, then waits for the deadlines left to fire.
+
+    Returns
+    -------
+    Tuple[float, int, float]
+        The mean microseconds to schedule or cancel a deadline, the bytes held by one pending deadline per game,
+        and the most seconds a deadline fired late
+    """
+    rng = random.Random(SEED)
+    loop = asyncio.get_running_loop()
+    lateness = []
+    def make_callback(due_time):
+        def callback():
+            lateness.append(loop.time() - due_time)
+        return callback
+    tracemalloc.start()
+    deadlines = [schedule(TIMEOUT, make_callback(loop.time() + TIMEOUT)) for x in range(game_count)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for x in range(REPLACEMENTS):
+        for y in range(game_count):
+            deadlines[y].cancel()
+            deadlines[y] = schedule(TIMEOUT, make_callback(loop.time() + TIMEOUT))
+    elapsed = time.perf_counter() - start
+    fired_count = 0
+    for y in range(game_count):
+        deadlines[y].cancel()
+        if rng.random() < FIRED_SHARE:
+            deadlines[y] = schedule(FIRED_TIMEOUT, make_callback(loop.time() + FIRED_TIMEOUT))
+            fired_count += 1
+    while len(lateness) < fired_count:
+        await asyncio.sleep(0.05)
+    # let the cancelled tasks finish
+    await asyncio.sleep(0)
+    operations = game_count * 2 * REPLACEMENTS
+    return (elapsed / operations * 1e6, memory, max(lateness))
+
+async def run_wheel(game_count):
+    scheduler = Deadline_Scheduler(tick=0.1)
+    return await run(game_count, scheduler.schedule)
+
+async def run_tasks(game_count):
+    return await run(game_count, Task_Deadline)
+
+def main():
+    print(f'{"games":>6} {"deadlines":<10} {"µs/op":>7} {"memory KB":>10} {"max late ms":>12}')
+    for game_count in GAME_COUNTS:
+        for label, runner in [('tasks', run_tasks), ('wheel', run_wheel)]:
+            microseconds, memory, lateness = asyncio.run(runner(game_count))
+            print(f'{game_count:>6} {label:<10} {microseconds:>7.2f} {memory / 1024:>10.0f} {lateness * 1000:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Measures the memory and CPU time a large guild's gateway events cost, with and without lean mode.
+
+A synthetic event stream from a guild of MEMBER_COUNT members chatting in CHANNEL_COUNT channels, a few of them
+with a game, is handled the way the bot would handle it in each mode:
+
+    default: every message, typing and presence event is received, and parsed into a message and its author's
+    member; every member is cached from the start and the last 1000 messages are cached
+    lean: typing and presence events are never sent, as their intents are off, message events go through the real
+    Event_Filter first, only the players are cached and no message is
+
+discord.py's parsing is stood in for by building slotted objects shaped like its Message and Member, so the numbers
+show how much work and memory each mode leaves, not discord.py's own costs. Kept messages go through on_message's
+checks, the command prefix and match_reaction, in both modes.
+
+Run from the repository root with `python -m benchmarks.lean`.
+"""
+
+import collections
+import random
+import time
+import tracemalloc
+
+from types import SimpleNamespace
+
+from lean import Event_Filter
+from metrics import Metrics
+from reactions import match_reaction
+
+MEMBER_COUNT = 50000
+CHANNEL_COUNT = 500
+GAME_COUNT = 5
+PLAYERS_PER_GAME = 7
+EVENT_COUNT = 200000
+MAX_MESSAGES = 1000
+BOT_ID = 1
+GUILD_ID = 2
+# how often each kind of event happens in the stream
+EVENT_WEIGHTS = {'MESSAGE_CREATE': 50, 'PRESENCE_UPDATE': 35, 'TYPING_START': 15}
+# how often a message outside a game is a command, or names Lychee
+COMMAND_CHANCE = 0.005
+TRIGGER_CHANCE = 0.01
+WORDS = ['the', 'a', 'game', 'why', 'no', 'yes', 'lol', 'hi', 'ok', 'spy', 'team', 'vote', 'wait', 'what', 'good']
+SEED = 0
+
+class Stand_In_Member():
+
+    __slots__ = ('id', 'name', 'nick', 'roles', 'joined_at', 'status', 'activities')
+
+    def __init__(self, user, member):
+        self.id = int(user['id'])
+        self.name = user['username']
+        self.nick = member.get('nick')
+        self.roles = [int(role_id) for role_id in member['roles']]
+        self.joined_at = member['joined_at']
+        self.status = 'offline'
+        self.activities = ()
+
+class Stand_In_Message():
+
+    __slots__ = ('id', 'channel_id', 'guild_id', 'content', 'author', 'mentions', 'created_at')
+
+    def __init__(self, data, author):
+        self.id = int(data['id'])
+        self.channel_id = int(data['channel_id'])
+        self.guild_id = int(data['guild_id'])
+        self.content = data['content']
+        self.author = author
+        self.mentions = [int(temp_mention['id']) for temp_mention in data['mentions']]
+        self.created_at = data['timestamp']
+
+def make_member_payload(rng, id_num):
+    return ({'id': str(id_num), 'username': f'member{id_num}', 'discriminator': '0001', 'avatar': None},
+            {'nick': None, 'roles': [str(rng.randrange(100, 120))], 'joined_at': '2021-01-01T00:00:00+00:00'})
+
+def make_events(rng, game_channel_ids, player_id_nums):
+    """Returns the event stream as (name, raw payload) pairs, with every member's id at or above 1000."""
+    channel_ids = [1000000 + x for x in range(CHANNEL_COUNT)]
+    names = list(EVENT_WEIGHTS)
+    kinds = rng.choices(names, weights=[EVENT_WEIGHTS[name] for name in names], k=EVENT_COUNT)
+    events = []
+    for x in range(EVENT_COUNT):
+        channel_id = rng.choice(channel_ids)
+        if channel_id in game_channel_ids:
+            id_num = rng.choice(player_id_nums)
+        else:
+            id_num = 1000 + rng.randrange(MEMBER_COUNT)
+        user, member = make_member_payload(rng, id_num)
+        if kinds[x] == 'MESSAGE_CREATE':
+            content = ' '.join(rng.choices(WORDS, k=rng.randrange(1, 12)))
+            roll = rng.random()
+            if roll < COMMAND_CHANCE:
+                content = '>>help'
+            elif roll < COMMAND_CHANCE + TRIGGER_CHANCE:
+                content += ' lychee'
+            events.append(('MESSAGE_CREATE', {'id': str(10**9 + x), 'channel_id': str(channel_id),
+                                              'guild_id': str(GUILD_ID), 'content': content, 'author': user,
+                                              'member': member, 'mentions': [],
+                                              'timestamp': '2021-01-01T00:00:00+00:00'}))
+        elif kinds[x] == 'PRESENCE_UPDATE':
+            events.append(('PRESENCE_UPDATE', {'user': user, 'guild_id': str(GUILD_ID),
+                                               'status': rng.choice(['online', 'idle', 'dnd']),
+                                               'activities': [{'name': rng.choice(WORDS), 'type': 0}]}))
+        else:
+            events.append(('TYPING_START', {'channel_id': str(channel_id), 'guild_id': str(GUILD_ID),
+                                            'user_id': str(id_num), 'member': dict(member, user=user), 'timestamp': 0}))
+    return events
+
+def handle_message(message):
+    """What on_message does with a message that reaches it."""
+    if message.content.startswith('>>'):
+        return
+    match_reaction(message.content, message.author.name)
+
+def handle_events(events, member_payloads, lean, is_game_channel):
+    """Caches the members and handles the event stream in one mode.
+
+    Returns
+    -------
+    Tuple[Dict[int, Stand_In_Member], collections.deque, int]
+        The member cache, the message cache (None in lean mode) and how many events were handled
+    """
+    event_filter = Event_Filter(SimpleNamespace(user=SimpleNamespace(id=BOT_ID)), is_game_channel, metrics=Metrics())
+    members = {}
+    for user, member in member_payloads:
+        members[int(user['id'])] = Stand_In_Member(user, member)
+    messages = None
+    if lean == False:
+        messages = collections.deque(maxlen=MAX_MESSAGES)
+    handled_count = 0
+    for name, data in events:
+        if name == 'MESSAGE_CREATE':
+            if lean and not event_filter.is_wanted(name, data):
+                continue
+            author = Stand_In_Member(data['author'], data['member'])
+            message = Stand_In_Message(data, author)
+            if messages != None:
+                messages.append(message)
+            handle_message(message)
+        elif lean:
+            # the lean intents leave these events out
+            continue
+        elif name == 'PRESENCE_UPDATE':
+            temp_member = members.get(int(data['user']['id']))
+            if temp_member != None:
+                temp_member.status = data['status']
+                temp_member.activities = tuple([SimpleNamespace(**activity) for activity in data['activities']])
+        else:
+            Stand_In_Member(data['member']['user'], data['member'])
+        handled_count += 1
+    return (members, messages, handled_count)
+
+def run(events, member_payloads, lean, is_game_channel):
+    """Returns the CPU seconds a mode takes, the bytes its caches hold afterwards, and how many events it handled.
+    Memory is measured in a second run, as tracing allocations slows the first down."""
+    start = time.process_time()
+    members, messages, handled_count = handle_events(events, member_payloads, lean, is_game_channel)
+    elapsed = time.process_time() - start
+    members = None
+    messages = None
+    tracemalloc.start()
+    members, messages, handled_count = handle_events(events, member_payloads, lean, is_game_channel)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (elapsed, memory, handled_count)
+
+def main():
+    rng = random.Random(SEED)
+    game_channel_ids = set([1000000 + x for x in range(GAME_COUNT)])
+    player_id_nums = [1000 + x for x in range(GAME_COUNT * PLAYERS_PER_GAME)]
+    events = make_events(rng, game_channel_ids, player_id_nums)
+    all_member_payloads = [make_member_payload(rng, 1000 + x) for x in range(MEMBER_COUNT)]
+    player_member_payloads = all_member_payloads[:len(player_id_nums)]
+    is_game_channel = lambda channel_id: channel_id in game_channel_ids
+    print(f'{MEMBER_COUNT} members, {CHANNEL_COUNT} channels, {GAME_COUNT} games, {EVENT_COUNT} events')
+    print(f'{"mode":<8} {"handled":>8} {"cpu s":>7} {"µs/event":>9} {"memory KB":>10}')
+    for label, lean, member_payloads in [('default', False, all_member_payloads), ('lean', True, player_member_payloads)]:
+        elapsed, memory, handled_count = run(events, member_payloads, lean, is_game_channel)
+        print(f'{label:<8} {handled_count:>8} {elapsed:>7.2f} {elapsed / EVENT_COUNT * 1e6:>9.2f} {memory / 1024:>10.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Measures how long each command takes and how many Discord calls it causes, for every start mode and player count.
+
+Whole games are played through the real command handlers against the in-memory Fake_Discord, once with every
+player acting and once with the admin ending each vote and mission early, and again in interaction mode, where
+players vote and play mission cards with buttons (shown as the mode followed by '+buttons'). The calls a command causes include those
+made by the phase transitions it triggers: the last `>>vote` starts the mission or the next team building, and the
+last `>>mission` resolves the mission and the night actions, whose own commands are counted separately.
+
+Any phase whose mean calls go over its budget in CALL_BUDGETS fails the run, so a change that adds calls to the hot
+path has to raise the budget on purpose.
+
+Run from the repository root with `python -m benchmarks.phases`.
+"""
+
+import asyncio
+import random
+import sys
+
+import lychee
+
+from fake_discord import Fake_Discord
+
+MODES = ['vanilla', 'commander', 'party']
+PLAYER_COUNTS = [5, 6, 7, 8, 9, 10]
+SEEDS = range(5)
+CALL_KINDS = ['send', 'edit', 'interaction', 'fetch', 'pin', 'unpin', 'create_dm', 'query_members', 'add_role', 'remove_role', 'presence']
+
+# The most calls of all kinds each phase may cause on average, given the number of players
+CALL_BUDGETS = {'start': lambda player_count: 4 * player_count + 14,
+                'team': lambda player_count: player_count + 3,
+                'vote': lambda player_count: 2,
+                'vote (last)': lambda player_count: player_count // 2 + 6,
+                'end_vote': lambda player_count: player_count + 8,
+                'mission': lambda player_count: 2,
+                'mission (last)': lambda player_count: player_count + 10,
+                'end_mission': lambda player_count: player_count + 12,
+                'night action': lambda player_count: 1,
+                'assassinate': lambda player_count: 2}
+
+def get_phase(record, mode):
+    if record.name == mode:
+        return 'start'
+    # a button click counts as the command it stands in for
+    name = record.name.replace('_button', '')
+    if name in ['vote', 'mission'] and record.ended_phase():
+        return f'{name} (last)'
+    if name in Fake_Discord.NIGHT_COMMANDS.values():
+        return 'night action'
+    return name
+
+async def run_games(mode, player_count, use_buttons):
+    """Plays every seeded game of a mode and player count, in interaction mode if use_buttons.
+
+    Returns
+    -------
+    Dict[str, List[Command_Record]]
+        The records of every command, grouped by phase
+    """
+    phases = {}
+    lychee.INTERACTION_MODE = use_buttons
+    for seed in SEEDS:
+        for end_early in [False, True]:
+            random.seed(seed)
+            fake = Fake_Discord(lychee, player_count)
+            await fake.play_game(mode, end_early)
+            for record in fake.records:
+                phases.setdefault(get_phase(record, mode), []).append(record)
+    return phases
+
+def summarize(records):
+    """Returns the mean latency in milliseconds, the max latency in milliseconds and the mean calls of each kind."""
+    latencies = [record.latency * 1000 for record in records]
+    calls = {kind: sum(record.calls.get(kind, 0) for record in records) / len(records) for kind in CALL_KINDS}
+    return (sum(latencies) / len(latencies), max(latencies), calls)
+
+def main():
+    over_budget = []
+    print(f'{"mode":<17} {"players":>7} {"phase":<15} {"count":>6} {"mean ms":>8} {"max ms":>8} '
+          + ' '.join(f'{kind:>9}' for kind in CALL_KINDS))
+    for mode, use_buttons in [(mode, use_buttons) for use_buttons in [False, True] for mode in MODES]:
+        label = mode
+        if use_buttons:
+            label += '+buttons'
+        for player_count in PLAYER_COUNTS:
+            phases = asyncio.run(run_games(mode, player_count, use_buttons))
+            for phase in sorted(phases):
+                mean_ms, max_ms, calls = summarize(phases[phase])
+                print(f'{label:<17} {player_count:>7} {phase:<15} {len(phases[phase]):>6} {mean_ms:>8.2f} {max_ms:>8.2f} '
+                      + ' '.join(f'{calls[kind]:>9.2f}' for kind in CALL_KINDS))
+                budget = CALL_BUDGETS.get(phase)
+                if budget != None and sum(calls.values()) > budget(player_count):
+                    over_budget.append(f'{label} with {player_count} players: {phase} makes {sum(calls.values()):.2f} calls, '
+                                       + f'over its budget of {budget(player_count)}')
+    if len(over_budget) != 0:
+        print('\n'.join(['', 'Over budget:'] + over_budget))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Measures how long a game's prompts take to go out during a burst of chatter, with and without priority classes.
+
+A burst of emoji replies to chat channels and confirmations to players' DMs is queued at once with the vote prompts
+of several games, through a Dispatcher with few requests in flight against a fake guild where every message takes
+SEND_SECONDS to send:
+
+    flat: every message is sent with the same priority, in the order it was queued
+    prioritized: prompts are critical, confirmations are joined while they wait and emoji replies are cosmetic, so
+    they are dropped while requests are waiting for a slot
+
+Run from the repository root with `python -m benchmarks.priority`.
+"""
+
+import asyncio
+import random
+
+from dispatcher import PRIORITY_COSMETIC, PRIORITY_CRITICAL, PRIORITY_NORMAL, Dispatcher
+from fake_discord import Fake_Channel, Fake_Transport
+from metrics import Metrics
+
+MAX_CONCURRENCY = 5
+SEND_SECONDS = 0.005
+GAME_COUNT = 5
+PLAYERS_PER_GAME = 10
+CHAT_CHANNEL_COUNT = 50
+EMOJI_REPLY_COUNT = 300
+# how many confirmations each player gets during the burst, such as for a vote and a night action
+CONFIRMATIONS_PER_PLAYER = 3
+SEED = 0
+
+class Slow_Transport(Fake_Transport):
+
+    """A Fake_Transport whose messages each take SEND_SECONDS to send."""
+
+    async def send_message(self, channel, content):
+        await asyncio.sleep(SEND_SECONDS)
+        return await super().send_message(channel, content)
+
+async def send_prompts(dispatcher, prompts, priority):
+    """Sends the prompts and returns when the last one was sent, in event loop time."""
+    await dispatcher.send_many(prompts, priority)
+    return asyncio.get_running_loop().time()
+
+async def run(prioritized):
+    """Queues the burst in one mode.
+
+    Returns
+    -------
+    Tuple[float, float, int]
+        The seconds until every prompt was sent and until the whole burst was, and how many messages were sent
+    """
+    rng = random.Random(SEED)
+    transport = Slow_Transport()
+    dispatcher = Dispatcher(transport, MAX_CONCURRENCY, Metrics())
+    chat_channels = [Fake_Channel(transport, f'chat-{x}') for x in range(CHAT_CHANNEL_COUNT)]
+    dm_channels = [Fake_Channel(transport, f'dm-{x}') for x in range(GAME_COUNT * PLAYERS_PER_GAME)]
+    prompts = [(channel, 'Please `>>vote accept` or `>>vote reject` on the proposed team') for channel in dm_channels]
+    if prioritized:
+        prompt_priority = PRIORITY_CRITICAL
+        emoji_priority = PRIORITY_COSMETIC
+    else:
+        prompt_priority = PRIORITY_NORMAL
+        emoji_priority = PRIORITY_NORMAL
+    chatter = []
+    for x in range(EMOJI_REPLY_COUNT):
+        chatter.append(dispatcher.send(rng.choice(chat_channels), ':eyes:', emoji_priority))
+    for x in range(CONFIRMATIONS_PER_PLAYER):
+        for channel in dm_channels:
+            if prioritized:
+                chatter.append(dispatcher.confirm(channel, 'Thank you for your `>>vote accept`.'))
+            else:
+                chatter.append(dispatcher.send(channel, 'Thank you for your `>>vote accept`.'))
+    start = asyncio.get_running_loop().time()
+    # the chatter is queued first, as it is when a busy guild's chat is already waiting when a phase starts
+    tasks = [asyncio.ensure_future(temp_send) for temp_send in chatter]
+    await asyncio.sleep(0)
+    prompts_done = await send_prompts(dispatcher, prompts, prompt_priority)
+    await asyncio.gather(*tasks)
+    burst_done = asyncio.get_running_loop().time()
+    sent_count = len([call for call in transport.calls if call[0] == 'send'])
+    return (prompts_done - start, burst_done - start, sent_count)
+
+def main():
+    queued_count = EMOJI_REPLY_COUNT + GAME_COUNT * PLAYERS_PER_GAME * (CONFIRMATIONS_PER_PLAYER + 1)
+    print(f'{queued_count} messages queued, {MAX_CONCURRENCY} in flight at once, {SEND_SECONDS * 1000:.0f} ms each')
+    print(f'{"mode":<12} {"prompts s":>10} {"burst s":>8} {"sent":>6}')
+    for label, prioritized in [('flat', False), ('prioritized', True)]:
+        prompts_seconds, burst_seconds, sent_count = asyncio.run(run(prioritized))
+        print(f'{label:<12} {prompts_seconds:>10.2f} {burst_seconds:>8.2f} {sent_count:>6}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Measures how many messages per second on_message can pick a reaction for, before and after the precompiled matcher.
+
+The old matcher is kept here as it was in on_message: it rebuilt every emoji list for each message mentioning Lychee
+and lowercased the message again for every keyword. Both matchers are run over the same generated chat, once as a
+busy guild would send it, where few messages mention Lychee, and once with only messages that mention Lychee. Every
+message must get the same mood from both, or the run fails.
+
+Run from the repository root with `python -m benchmarks.reactions`.
+"""
+
+import random
+import sys
+import time
+
+from reactions import (AFFECTION, CONFIRMATION, DISGUST, FLIRTING, GREETING, MISCHIEVIOUS, RANDOM, THREAT,
+                       VALIDATION, match_reaction)
+
+MESSAGE_COUNT = 20000
+MENTION_CHANCE = 0.05
+SEED = 0
+REPEATS = 5
+
+WORDS = ['the', 'a', 'team', 'mission', 'vote', 'accept', 'reject', 'spy', 'resistance', 'round', 'who', 'was', 'on',
+         'that', 'so', 'sus', 'trust', 'me', 'you', 'lol', 'ok', 'wait', 'what', 'no', 'yes', 'gg', 'nice', 'play',
+         'game', 'again', 'commander', 'assassin', 'pick', 'fail', 'success', 'switch', 'not', 'it', 'we', 'they']
+KEYWORD_PHRASES = ['i love', 'like', 'wanna', 'want', 'hi', 'hello', 'bye', 'live', 'die', 'kill', 'savage', 'fight',
+                   'duck', 'are you', 'r you', 'r u', 'are u', 'cute', 'sexy', 'why', 'hey ']
+AUTHORS = ['Oreo9238', 'nutrishous', 'someone', 'someone else']
+
+MOODS = {id(AFFECTION): 'affection', id(VALIDATION): 'validation', id(GREETING): 'greeting',
+         id(CONFIRMATION): 'confirmation', id(MISCHIEVIOUS): 'mischievious', id(FLIRTING): 'flirting',
+         id(DISGUST): 'disgust', id(THREAT): 'threat', id(RANDOM): 'random'}
+
+def legacy_match_reaction(content, author_name):
+    """The matcher on_message used before, returning the name of the mood instead of sending an emoji."""
+    if content.lower().find('lychee') != -1:
+        affection = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:',
+                     ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:',
+                     ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:']
+        validation = [':+1:', ':grinning:', ':blush:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
+        greeting = [':partying_face:', ':wave:', ':star2:', ':sparkles:', ':dancer:', ':clown:', ':raised_hands:']
+        confirmation = [':partying_face:', ':unicorn:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
+        mischievious = [':zany_face:', ':stuck_out_tongue_winking_eye:', ':clown:', ':snake:', ':full_moon_with_face:',
+                        ':star2:', ':sparkles:', ':tropical_drink:', ':fork_knife_plate:', ':joystick:']
+        flirting = [':sweat:', ':eggplant:', ':fire:', ':hot_face:', ':triumph:', ':heart_eyes:', ':kissing_heart:',
+                    ':revolving_hearts:', ':sparkling_heart:', ':shushing_face:', ':wink:', ':yum:', ':smiling_imp:',
+                    ':fingers_crossed:', ':pray:', ':takeout_box:', ':peach:', ':beers:', ':clinking_glass:', ':fireworks:',
+                    ':closed_lock_with_key:', ':bangbang:', ':cupid:', ':love_letter:', ':spoon:', ':banana:', ':hot_pepper:']
+        disgust = [':face_with_monocle:', ':scream:', ':cold_sweat:', ':receipt:', ':thinking:', ':upside_down:',
+                   ':sick:', ':face_vomiting:', ':ghost:', ':clown:', ':no_good:', ':facepalm:', ':thunder_cloud_rain:'
+                   ':sos:', ':no_entry:', ':previous_track:', ':twisted_rightwards_arrows:', ':no_bell:']
+        threat = [':receipt:', ':upside_down:', ':syringe:', ':gun:', ':safety_pin:', ':anger:', ':warning:',
+                  ':scissors:', ':broom:', ':knife:', ':dagger:', ':axe:', ':firecracker:', ':hourglass:',
+                  ':timer:', ':oncoming_police_car:', ':ambulance:', ':wrestling:', ':boxing_glove:', ':boom:', ':snake:',
+                  ':b:', ':tooth:', ':angry:', ':rage:', ':triumph:', ':face_with_symbols_over_mouth:']
+        rrandom = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:',
+                  ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:',
+                  ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:', ':receipt:',
+                  ':upside_down:', ':face_with_monocle:', ':thinking:', ':wink:', ':shushing_face:', ':unicorn:',
+                  ':dancer:', ':+1:', ':woozy_face:', ':smiling_imp:', ':clown:', ':fist:', ':raised_hands:',
+                  ':haircut:', ':drum:', ':exploding_head:', ':liar:', ':grimacing:', ':sleepy:', ':clap:']
+        if (content.lower().find('love') != -1 or content.lower().find('like') != -1 )and content.lower().find('i') != -1:
+            return 'affection'
+        elif (content.lower().find('wanna') != -1 or content.lower().find('want') != -1):
+            if author_name == 'Oreo9238':
+                return 'flirting'
+            elif author_name == 'nutrishous':
+                return 'disgust'
+            else:
+                return 'validation'
+        elif content.lower().find('hi') != -1 or content.lower().find('hello') != -1 or content.lower().find('bye') != -1:
+            return 'greeting'
+        elif content.lower().find('live') != -1 or content.lower().find('die') != -1 or content.lower().find('kill') != -1 or content.lower().find('savage') != -1 or content.lower().find('fight') != -1 or content.lower().find('uck') != -1:
+            return 'threat'
+        elif content.lower().find('are you') != -1 or content.lower().find('r you') != -1 or content.lower().find('r u') != -1 or content.lower().find('are u') != -1:
+            if author_name == 'Oreo9238':
+                return 'flirting'
+            elif author_name == 'nutrishous':
+                return 'disgust'
+            else:
+                return 'confirmation'
+        elif content.lower().find('cute') != -1 or content.lower().find('sexy') != -1:
+            if author_name == 'Oreo9238':
+                return 'flirting'
+            elif author_name == 'nutrishous':
+                return 'disgust'
+            else:
+                return 'affection'
+        elif content.lower().find('why') != -1 or content.lower().find('y ') != -1:
+            return 'mischievious'
+        else:
+            return 'random'
+    return None
+
+def generate_messages(mention_chance):
+    """Returns MESSAGE_COUNT (content, author name) pairs of chat, mentioning Lychee with the given chance."""
+    rng = random.Random(SEED)
+    messages = []
+    for x in range(MESSAGE_COUNT):
+        words = rng.choices(WORDS, k=rng.randint(2, 25))
+        for y in range(rng.randint(0, 2)):
+            words.insert(rng.randint(0, len(words)), rng.choice(KEYWORD_PHRASES))
+        if rng.random() < mention_chance:
+            words.insert(rng.randint(0, len(words)), rng.choice(['lychee', 'Lychee', 'LYCHEE']))
+        content = ' '.join(words)
+        if rng.random() < 0.5:
+            content = content.capitalize()
+        messages.append((content, rng.choice(AUTHORS)))
+    return messages
+
+def get_rate(matcher, messages):
+    """Returns the best messages per second of REPEATS runs of a matcher over every message."""
+    best = None
+    for x in range(REPEATS):
+        start = time.perf_counter()
+        for content, author_name in messages:
+            matcher(content, author_name)
+        elapsed = time.perf_counter() - start
+        if best == None or elapsed < best:
+            best = elapsed
+    return len(messages) / best
+
+def main():
+    mismatch_count = 0
+    print(f'{"messages":<16} {"before msg/s":>13} {"after msg/s":>12} {"speedup":>8}')
+    for label, mention_chance in [('busy guild', MENTION_CHANCE), ('mentions only', 1.0)]:
+        messages = generate_messages(mention_chance)
+        for content, author_name in messages:
+            emoji = match_reaction(content, author_name)
+            if legacy_match_reaction(content, author_name) != (None if emoji == None else MOODS[id(emoji)]):
+                mismatch_count += 1
+        before = get_rate(legacy_match_reaction, messages)
+        after = get_rate(match_reaction, messages)
+        print(f'{label:<16} {before:>13.0f} {after:>12.0f} {after / before:>7.1f}x')
+    if mismatch_count != 0:
+        print(f'\n{mismatch_count} messages got a different mood from the precompiled matcher.')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Measures how long a command takes as the number of ongoing games grows.
+
+For every count in GAME_COUNTS, that many vanilla games are started on one shared Fake_Transport, as on a bot in
+many guilds at once. A random sample of them is then played through one round with the real command handlers:
+the leader's `>>team` in the game's channel, every player's `>>vote` and every team member's `>>mission` in their
+private messages. Each command has to find its game among all the others, by its channel or by its author, and is
+timed until its game has run everything it submitted.
+
+Run from the repository root with `python -m benchmarks.registry`.
+"""
+
+import asyncio
+import random
+import time
+
+import lychee
+
+from fake_discord import Fake_Discord, Fake_Transport, get_moves
+
+GAME_COUNTS = [1, 10, 100, 1000, 5000]
+PLAYERS_PER_GAME = 10
+SAMPLED_GAMES = 50
+COMMANDS = ['team', 'vote', 'mission']
+
+async def start_games(game_count):
+    """Starts game_count vanilla games on one transport and returns their Fake_Discords."""
+    transport = Fake_Transport()
+    lychee.use_transport(transport)
+    fakes = []
+    for x in range(game_count):
+        fake = Fake_Discord(lychee, PLAYERS_PER_GAME, transport=transport)
+        mentions = ' '.join([temp_member.mention for temp_member in fake.members])
+        await fake.command('vanilla', fake.admin, fake.general_channel, player_mentions=mentions)
+        fakes.append(fake)
+    return fakes
+
+async def play_round(fake, latencies):
+    """Plays the current round of a started game and adds the latency in milliseconds of each command to
+    latencies."""
+    game = lychee.games.get_game_from_channel(fake.general_channel)
+    start_round = game.get_round()
+    while not game.completed and game.get_round() == start_round:
+        moves = get_moves(game, fake)
+        if len(moves) == 0:
+            break
+        for move in moves:
+            start = time.perf_counter()
+            await fake.command(*move[:3], *move[3], **move[4])
+            latencies.setdefault(move[0], []).append((time.perf_counter() - start) * 1000)
+
+async def run_games(game_count):
+    """Returns the latencies in milliseconds of every command in COMMANDS, with game_count games ongoing."""
+    random.seed(0)
+    fakes = await start_games(game_count)
+    latencies = {name: [] for name in COMMANDS}
+    for fake in random.sample(fakes, min(game_count, SAMPLED_GAMES)):
+        await play_round(fake, latencies)
+    return latencies
+
+def main():
+    print(f'{"games":>8} ' + ' '.join(f'{name + " ms":>11}' for name in COMMANDS) + f' {"max ms":>8}')
+    for game_count in GAME_COUNTS:
+        latencies = asyncio.run(run_games(game_count))
+        means = [sum(latencies[name]) / len(latencies[name]) for name in COMMANDS]
+        max_ms = max(max(latencies[name]) for name in COMMANDS)
+        print(f'{game_count:>8} ' + ' '.join(f'{mean_ms:>11.3f}' for mean_ms in means) + f' {max_ms:>8.3f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Measures how command throughput scales with the number of worker processes running sharded Lychee.
+
+A game is played in each of many fake guilds spread over the shards, with every worker hosting the guilds on its
+shards and every DM command going through the worker with shard 0 as on Discord (fake_gateway.py). Reported are
+the commands run per second of wall time, and per second of CPU time of the busiest worker, which is what the wall
+time comes to once every worker has a core of its own.
+
+Run from the repository root with `python -m benchmarks.shards`.
+"""
+
+import os
+
+from fake_gateway import play_sharded
+
+WORKER_COUNTS = [1, 2, 4]
+SHARD_COUNT = 8
+GUILD_COUNT = 64
+MODE = 'commander'
+PLAYER_COUNT = 7
+
+def main():
+    print(f'{"workers":>7} {"commands":>9} {"seconds":>8} {"commands/s":>11} {"commands/busiest cpu s":>23}')
+    for worker_count in WORKER_COUNTS:
+        command_count, elapsed, cpu_times = play_sharded(worker_count, SHARD_COUNT, GUILD_COUNT, MODE, PLAYER_COUNT)
+        print(f'{worker_count:>7} {command_count:>9} {elapsed:>8.2f} {command_count / elapsed:>11.0f} '
+              + f'{command_count / max(cpu_times):>23.0f}')
+    if os.cpu_count() < max(WORKER_COUNTS):
+        print(f'Only {os.cpu_count()} cores: the workers share them, so wall time cannot scale past that many workers.')
+
+if __name__ == '__main__':
+    main()
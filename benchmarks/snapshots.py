@@ -0,0 +1,99 @@
+"""Measures how large game snapshots are and how long they take to build, write and restore.
+
+Whole games are played through the real command handlers against the in-memory Fake_Discord with snapshots written
+to a temporary directory. Every snapshot a game saves is kept, then each one is restored into a new Game, which is
+what happens to every ongoing game when the bot starts again.
+
+Run from the repository root with `python -m benchmarks.snapshots`.
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+
+import lychee
+
+from fake_discord import Fake_Discord
+from game import Game
+from snapshot import Snapshot_Store, encode_snapshot
+
+MODES = ['vanilla', 'commander', 'party']
+PLAYER_COUNTS = [5, 6, 7, 8, 9, 10]
+SEEDS = range(5)
+
+class Recording_Snapshot_Store(Snapshot_Store):
+
+    """A Snapshot_Store that also keeps every snapshot saved and how long each took to build."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.saved = [] # List[Dict]
+        self.build_times = [] # List[float]
+
+    def save(self, key, snapshot):
+        if snapshot != None:
+            self.saved.append(snapshot)
+        super().save(key, snapshot)
+
+class Timed_Game(Game):
+
+    def get_snapshot(self):
+        start = time.perf_counter()
+        snapshot = super().get_snapshot()
+        if isinstance(self.snapshots, Recording_Snapshot_Store):
+            self.snapshots.build_times.append(time.perf_counter() - start)
+        return snapshot
+
+async def run_games(mode, player_count, directory):
+    """Plays every seeded game of a mode and player count, then restores each snapshot they saved.
+
+    Returns
+    -------
+    Tuple[List[float], List[int], List[float], List[float]]
+        The build time in seconds, encoded size in bytes, write time in seconds and restore time in seconds of
+        every snapshot
+    """
+    build_times = []
+    sizes = []
+    write_times = []
+    restore_times = []
+    original_game = lychee.Game
+    lychee.Game = Timed_Game
+    try:
+        for seed in SEEDS:
+            random.seed(seed)
+            snapshots = Recording_Snapshot_Store(directory)
+            fake = Fake_Discord(lychee, player_count, snapshots)
+            await fake.play_game(mode)
+            await snapshots.flush()
+            build_times += snapshots.build_times
+            for snapshot in snapshots.saved:
+                sizes.append(len(encode_snapshot(snapshot).encode()))
+                start = time.perf_counter()
+                snapshots.write(snapshot['general_channel_id'], snapshot)
+                write_times.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                game = Game(fake.guild, lychee.client, fake.general_channel, snapshot['player_id_nums'], [], [],
+                            lychee.dispatcher)
+                await game.restore(snapshot)
+                restore_times.append(time.perf_counter() - start)
+                snapshots.write(snapshot['general_channel_id'], None)
+    finally:
+        lychee.Game = original_game
+    return (build_times, sizes, write_times, restore_times)
+
+def main():
+    print(f'{"mode":<10} {"players":>7} {"count":>6} {"build µs":>9} {"mean B":>7} {"max B":>7} '
+          + f'{"write µs":>9} {"restore ms":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            for player_count in PLAYER_COUNTS:
+                build_times, sizes, write_times, restore_times = asyncio.run(run_games(mode, player_count, directory))
+                count = len(sizes)
+                print(f'{mode:<10} {player_count:>7} {count:>6} {sum(build_times) / len(build_times) * 1e6:>9.1f} '
+                      + f'{sum(sizes) / count:>7.0f} {max(sizes):>7} {sum(write_times) / count * 1e6:>9.1f} '
+                      + f'{sum(restore_times) / count * 1000:>11.3f}')
+
+if __name__ == '__main__':
+    main()
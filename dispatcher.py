@@ -0,0 +1,363 @@
+import asyncio
+import discord
+import functools
+import heapq
+import itertools
+import weakref
+
+from metrics import default_metrics
+
+DEFAULT_MAX_CONCURRENCY = 25
+ROUTE_CONCURRENCY = 5
+MAX_RETRIES = 5
+BASE_RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+# The most members one gateway member query can ask for
+MEMBER_QUERY_LIMIT = 100
+# Priority classes of outbound requests, most urgent first. Critical requests are the prompts a phase waits on,
+# confirmations only acknowledge a command and cosmetic requests, such as emoji replies, are dropped under pressure
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_CONFIRMATION = 2
+PRIORITY_COSMETIC = 3
+
+class Priority_Slots():
+
+    """Caps the requests in flight at once, like a semaphore, handing each freed slot to the most urgent waiting
+    request and then to the one that has waited longest.
+
+    Parameters
+    ----------
+    count : int
+        How many requests may be in flight at once
+
+    Attributes
+    ----------
+    free_count : int
+        How many slots are free
+    waiters : List[Tuple[int, int, asyncio.Future]]
+        A heap of the waiting requests as their priority, their place in line and the future they wait on
+    places : Iterator[int]
+        Numbers the waiting requests in the order they came
+    """
+
+    def __init__(self, count):
+        self.free_count = count
+        self.waiters = [] # List[Tuple[int, int, asyncio.Future]]
+        self.places = itertools.count()
+
+    async def acquire(self, priority):
+        if self.free_count > 0 and len(self.waiters) == 0:
+            self.free_count -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.places), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # a slot handed over as the wait was cancelled goes to the next waiter
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while len(self.waiters) != 0:
+            future = heapq.heappop(self.waiters)[2]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.free_count += 1
+
+    def get_waiting_count(self):
+        return len(self.waiters)
+
+class Dispatcher():
+
+    """Sends every outbound request to Discord, shared by all games.
+
+    Requests to different routes run concurrently, messages to the same channel are sent in the order they
+    were queued, and requests that hit a rate limit are retried once their route's bucket has reset.
+
+    Every request has a priority class. When too many requests are in flight, the free slots go to the most urgent
+    waiting request first, so game prompts are not held up behind chatter. Under pressure, when the request's route
+    is rate limited or requests are already waiting for a slot, cosmetic messages are dropped instead of sent, and
+    confirmations sent to a channel while an earlier one still waits are joined into that one message.
+
+    Parameters
+    ----------
+    transport : Transport
+        Makes the requests, against Discord or an in-memory fake
+    max_concurrency : int
+        The most requests in flight at once across every route
+    metrics : Metrics
+        Counts the requests and rate limits of each route
+
+    Attributes
+    ----------
+    slots : Priority_Slots
+        Caps the requests in flight at once
+    route_locks : Dict[Tuple, asyncio.Lock]
+        Keeps the messages sent to each channel in order
+    route_semaphores : Dict[Tuple, asyncio.Semaphore]
+        Caps the unordered requests in flight for each route
+    blocked_until : Dict[Tuple, float]
+        When each rate limited route's bucket resets, in event loop time
+    global_blocked_until : float
+        When the global rate limit resets, in event loop time
+    rate_limit_count : int
+        How many rate limits have been hit
+    pending_confirmations : Dict[int, List[str]]
+        The confirmations joined into each channel's waiting confirmation, by channel id
+    transport
+    max_concurrency
+    metrics
+    """
+
+    # A route is a tuple like ('messages', channel_id) naming the bucket a request is limited by
+
+    def __init__(self, transport, max_concurrency=DEFAULT_MAX_CONCURRENCY, metrics=default_metrics):
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self.metrics = metrics
+        self.slots = Priority_Slots(max_concurrency)
+        self.route_locks = weakref.WeakValueDictionary() # Dict[Tuple, asyncio.Lock]
+        self.route_semaphores = weakref.WeakValueDictionary() # Dict[Tuple, asyncio.Semaphore]
+        self.blocked_until = {} # Dict[Tuple, float]
+        self.global_blocked_until = 0.0 # float
+        self.rate_limit_count = 0 # int
+        self.pending_confirmations = {} # Dict[int, List[str]]
+
+    async def send(self, channel, content, priority=PRIORITY_NORMAL):
+        """Sends a message, after every message already queued for the same channel.
+
+        Parameters
+        ----------
+        channel : discord.abc.Messageable
+            The channel to send to
+        content : str
+            The message to send
+        priority : int
+            The message's priority class, such as PRIORITY_CRITICAL
+
+        Returns
+        -------
+        discord.Message
+            The sent message, or None if it was a cosmetic message dropped under pressure
+        """
+        route = ('messages', channel.id)
+        if priority == PRIORITY_COSMETIC and self.is_under_pressure(route):
+            self.metrics.increment('lychee_shed_requests_total', 'route', route[0])
+            return None
+        return await self.send_in_order(route, lambda: self.transport.send_message(channel, content), priority)
+
+    async def send_dm(self, member, content, priority=PRIORITY_NORMAL):
+        return await self.send(self.get_dm_channel(member), content, priority)
+
+    async def send_many(self, messages, priority=PRIORITY_NORMAL):
+        """Sends many messages at once, keeping the order of the messages to each channel.
+
+        Parameters
+        ----------
+        messages : List[Tuple[discord.abc.Messageable, str]]
+            Each channel and the message to send to it
+        priority : int
+            The priority class of every message
+
+        Returns
+        -------
+        List[discord.Message]
+            The sent messages in the same order
+        """
+        return await asyncio.gather(*[self.send(channel, content, priority) for channel, content in messages])
+
+    async def send_buttons(self, channel, content, buttons, on_click, priority=PRIORITY_CRITICAL):
+        """Sends a message with buttons under it, after every message already queued for the same channel.
+
+        Parameters
+        ----------
+        channel : discord.abc.Messageable
+            The channel to send to
+        content : str
+            The message to send
+        buttons : List[Tuple[str, str]]
+            The custom id and label of each button
+        on_click : Callable
+            Called as on_click(member, custom_id, respond) for every click, where respond(content) answers the
+            clicking member alone
+        priority : int
+            The message's priority class
+
+        Returns
+        -------
+        discord.Message
+            The sent message
+        """
+        return await self.send_in_order(('messages', channel.id),
+                                        lambda: self.transport.send_buttons(channel, content, buttons, on_click), priority)
+
+    async def respond(self, respond, content):
+        """Answers a button click with a message only the clicking member sees."""
+        # an interaction response is limited by its own interaction's token rather than by the bot's buckets, and must
+        # be made within 3 seconds of the click, so it skips the routes and slots that every other request waits on
+        self.metrics.increment('lychee_requests_total', 'route', 'interactions')
+        await respond(content)
+
+    async def confirm(self, channel, content):
+        """Sends a confirmation of a command, joining it into the channel's confirmation that is still waiting to be
+        sent, if there is one.
+
+        Returns
+        -------
+        discord.Message
+            The sent message, or None if the confirmation was joined into an earlier one
+        """
+        contents = self.pending_confirmations.get(channel.id)
+        if contents != None:
+            contents.append(content)
+            self.metrics.increment('lychee_coalesced_confirmations_total', 'route', 'messages')
+            return None
+        contents = [content]
+        self.pending_confirmations[channel.id] = contents
+        def send_contents():
+            # confirmations stop joining this one once it is sent, and a retry sends the same content
+            if self.pending_confirmations.get(channel.id) is contents:
+                del self.pending_confirmations[channel.id]
+            return self.transport.send_message(channel, '\n'.join(contents))
+        try:
+            return await self.send_in_order(('messages', channel.id), send_contents, PRIORITY_CONFIRMATION)
+        finally:
+            if self.pending_confirmations.get(channel.id) is contents:
+                del self.pending_confirmations[channel.id]
+
+    async def send_in_order(self, route, request, priority):
+        lock = self.route_locks.get(route)
+        if lock == None:
+            lock = asyncio.Lock()
+            self.route_locks[route] = lock
+        async with lock:
+            return await self.request(route, request, priority)
+
+    async def edit(self, message, content, remove_buttons=False):
+        await self.call(('edits', message.channel.id), lambda: self.transport.edit_message(message, content, remove_buttons))
+
+    async def pin(self, message):
+        await self.call(('pins', message.channel.id), lambda: self.transport.pin_message(message))
+
+    async def unpin(self, channel, message_id):
+        await self.call(('pins', channel.id), lambda: self.transport.unpin_message(channel, message_id))
+
+    async def fetch_message(self, channel_id, message_id):
+        return await self.call(('fetch', channel_id), lambda: self.transport.fetch_message(channel_id, message_id))
+
+    async def create_dm(self, member):
+        """Opens a member's DM channel and returns it, without a request if it is already cached."""
+        channel = self.transport.get_dm_channel(member)
+        if channel != None:
+            return channel
+        return await self.call(('dms',), lambda: self.transport.create_dm(member))
+
+    def get_dm_channel(self, member):
+        return self.transport.get_dm_channel(member)
+
+    async def query_members(self, guild, id_nums):
+        """Fetches members that are not in the member cache, in as few gateway queries as possible, all at once.
+
+        Parameters
+        ----------
+        guild : discord.Guild
+            The guild the members are in
+        id_nums : List[int]
+            The id of every member to fetch
+
+        Returns
+        -------
+        List[discord.Member]
+            Every member that was found, in no particular order
+        """
+        chunks = [id_nums[x:x + MEMBER_QUERY_LIMIT] for x in range(0, len(id_nums), MEMBER_QUERY_LIMIT)]
+        results = await asyncio.gather(*[self.call(('members', guild.id), functools.partial(self.transport.query_members, guild, chunk))
+                                         for chunk in chunks])
+        return [temp_member for result in results for temp_member in result]
+
+    async def add_role(self, guild, member, role):
+        await self.call(('roles', guild.id), lambda: self.transport.add_role(member, role))
+
+    async def remove_role(self, guild, member, role):
+        await self.call(('roles', guild.id), lambda: self.transport.remove_role(member, role))
+
+    async def set_presence(self, status, activity):
+        await self.call(('presence',), lambda: self.transport.set_presence(status, activity))
+
+    async def call(self, route, request, priority=PRIORITY_NORMAL):
+        """Makes any other request, such as a pin or a role change, with at most a few in flight per route.
+
+        Parameters
+        ----------
+        route : Tuple
+            The route the request is rate limited by
+        request : Callable[[], Awaitable]
+            Makes the request; called again for every retry
+        priority : int
+            The request's priority class
+
+        Returns
+        -------
+        The result of the request
+        """
+        route_semaphore = self.route_semaphores.get(route)
+        if route_semaphore == None:
+            route_semaphore = asyncio.Semaphore(ROUTE_CONCURRENCY)
+            self.route_semaphores[route] = route_semaphore
+        async with route_semaphore:
+            return await self.request(route, request, priority)
+
+    async def request(self, route, request, priority=PRIORITY_NORMAL):
+        attempt = 0
+        while True:
+            await self.wait_for_bucket(route)
+            await self.slots.acquire(priority)
+            try:
+                self.metrics.increment('lychee_requests_total', 'route', route[0])
+                return await request()
+            except discord.HTTPException as error:
+                if error.status != 429 or attempt >= MAX_RETRIES:
+                    raise
+                self.rate_limit_count += 1
+                self.metrics.increment('lychee_rate_limits_total', 'route', route[0])
+                self.block(route, error, attempt)
+                if priority == PRIORITY_COSMETIC:
+                    # a cosmetic request is not worth waiting out a rate limit for
+                    self.metrics.increment('lychee_shed_requests_total', 'route', route[0])
+                    return None
+            finally:
+                self.slots.release()
+            attempt += 1
+
+    def is_under_pressure(self, route):
+        """Whether a route is rate limited, or requests are already waiting for a slot."""
+        now = asyncio.get_running_loop().time()
+        if max(self.blocked_until.get(route, 0.0), self.global_blocked_until) > now:
+            return True
+        return self.slots.get_waiting_count() != 0
+
+    async def wait_for_bucket(self, route):
+        loop = asyncio.get_running_loop()
+        while True:
+            blocked_until = max(self.blocked_until.get(route, 0.0), self.global_blocked_until)
+            delay = blocked_until - loop.time()
+            if delay <= 0:
+                self.blocked_until.pop(route, None)
+                return
+            await asyncio.sleep(delay)
+
+    def block(self, route, error, attempt):
+        """Holds back a route, or every route for a global rate limit, after a 429."""
+        delay = min(BASE_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        if headers.get('Retry-After') != None:
+            delay = max(delay, float(headers.get('Retry-After')))
+        blocked_until = asyncio.get_running_loop().time() + delay
+        if headers.get('X-RateLimit-Global') != None:
+            self.global_blocked_until = max(self.global_blocked_until, blocked_until)
+        else:
+            self.blocked_until[route] = max(self.blocked_until.get(route, 0.0), blocked_until)
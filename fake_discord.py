@@ -0,0 +1,546 @@
+import asyncio
+import contextvars
+import itertools
+import time
+
+from transport import Closed_DM_Error, Transport
+
+# the Command_Record of the command whose task, or a task it started, is running
+current_record = contextvars.ContextVar('current_record', default=None)
+
+class Command_Record():
+
+    """The calls made while one command ran, including from the tasks it started, and how long it took.
+
+    Attributes
+    ----------
+    calls : Dict[str, int]
+        How many calls of each kind were made
+    latency : float
+        Seconds from the command being sent until its handler returned
+    window_before : int
+        The game's current_window when the command was sent, or None without a game
+    window_after : int
+        The game's current_window once the commands the handler submitted to the game had run, or the game was
+        waiting on a player's action, or None without a game
+    round_before : int
+    round_after : int
+    ended_game : bool
+        Whether the game was completed at the same point as window_after
+    name
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = {} # Dict[str, int]
+        self.latency = None # float
+        self.window_before = None # int
+        self.window_after = None # int
+        self.round_before = None # int
+        self.round_after = None # int
+        self.ended_game = False # bool
+
+    def ended_phase(self):
+        """Whether the command moved its game to another window or round, or ended it."""
+        return self.window_before != self.window_after or self.round_before != self.round_after or self.ended_game
+
+class Fake_Message():
+
+    """A message kept in memory by a Fake_Channel. A message sent with buttons keeps their custom ids in buttons and
+    what to call when one is clicked in on_click."""
+
+    def __init__(self, id_num, channel, content, author):
+        self.id = id_num
+        self.channel = channel
+        self.content = content
+        self.author = author
+        self.pinned = False
+        self.buttons = [] # List[str]
+        self.on_click = None # Callable
+
+class Fake_Channel():
+
+    """A guild channel or DM channel kept in memory.
+
+    Attributes
+    ----------
+    messages : List[Fake_Message]
+        Every message sent to the channel, oldest first
+    id
+    name
+    guild
+        The guild of a guild channel, None for a DM channel
+    recipient
+        The member of a DM channel, None for a guild channel
+    """
+
+    def __init__(self, fake, name, guild=None, recipient=None):
+        self.fake = fake
+        self.id = fake.next_id()
+        self.name = name
+        self.guild = guild
+        self.recipient = recipient
+        self.messages = [] # List[Fake_Message]
+
+    def post(self, content, author):
+        message = Fake_Message(self.fake.next_id(), self, content, author)
+        self.messages.append(message)
+        return message
+
+    def get_message(self, message_id):
+        for message in self.messages:
+            if message.id == message_id:
+                return message
+        return None
+
+    async def pins(self):
+        pinned_messages = []
+        for message in reversed(self.messages):
+            if message.pinned:
+                pinned_messages.append(message)
+        return pinned_messages
+
+class Fake_Role():
+
+    def __init__(self, fake, name):
+        self.id = fake.next_id()
+        self.name = name
+
+class Fake_Member():
+
+    """A guild member kept in memory. Its dm_channel is None until the transport creates it, and sending to it fails
+    if dms_closed is set."""
+
+    def __init__(self, fake, name, bot=False):
+        self.id = fake.next_id()
+        self.name = name
+        self.display_name = name
+        self.mention = f'<@!{self.id}>'
+        self.bot = bot
+        self.roles = [] # List[Fake_Role]
+        self.dm_channel = None # Fake_Channel
+        self.dms_closed = False
+
+class Fake_Guild():
+
+    """A guild kept in memory. Members whose ids are in uncached_id_nums are only found by a member query, the way
+    members missing from a large guild's member cache are."""
+
+    def __init__(self, fake, name, id_num=None):
+        if id_num == None:
+            id_num = fake.next_id()
+        self.id = id_num
+        self.name = name
+        self.members = [] # List[Fake_Member]
+        self.uncached_id_nums = set() # Set[int]
+        self.roles = [Fake_Role(fake, 'Admin'), Fake_Role(fake, 'Player')] # List[Fake_Role]
+        self.channels = [] # List[Fake_Channel]
+
+    def get_member(self, id_num):
+        if id_num in self.uncached_id_nums:
+            return None
+        for temp_member in self.members:
+            if temp_member.id == id_num:
+                return temp_member
+        return None
+
+class Fake_Transport(Transport):
+
+    """Keeps a whole guild in memory in place of Discord and records every call made to it.
+
+    Parameters
+    ----------
+    first_id : int
+        The first id given out, so that the fakes of several processes can give out different ids
+
+    Attributes
+    ----------
+    calls : List[Tuple[str, int]]
+        Every call made, as the kind of call and the id of the channel or member it was made for. The kinds are
+        'send', 'edit', 'interaction', 'fetch', 'pin', 'unpin', 'create_dm', 'query_members', 'add_role', 'remove_role' and 'presence'
+    guilds : List[Fake_Guild]
+        The guilds the bot is in
+    status : str
+        The bot's status
+    activity : str
+        The game the bot is playing
+    bot_user : Fake_Member
+        The bot itself, the author of every message it sends
+    """
+
+    def __init__(self, first_id=1):
+        self.ids = itertools.count(first_id)
+        self.calls = [] # List[Tuple[str, int]]
+        self.guilds = [] # List[Fake_Guild]
+        self.status = 'online' # str
+        self.activity = None # str
+        self.bot_user = Fake_Member(self, 'Lychee', bot=True)
+
+    def next_id(self):
+        return next(self.ids)
+
+    def record(self, kind, id_num):
+        self.calls.append((kind, id_num))
+        record = current_record.get()
+        if record != None:
+            record.calls[kind] = record.calls.get(kind, 0) + 1
+
+    async def send_message(self, channel, content):
+        self.record('send', channel.id)
+        if channel.recipient != None and channel.recipient.dms_closed:
+            raise Closed_DM_Error(f'{channel.recipient.name} does not accept direct messages')
+        return channel.post(content, self.bot_user)
+
+    async def edit_message(self, message, content, remove_buttons=False):
+        self.record('edit', message.channel.id)
+        message.content = content
+        if remove_buttons:
+            message.buttons = []
+            message.on_click = None
+
+    async def send_buttons(self, channel, content, buttons, on_click):
+        self.record('send', channel.id)
+        message = channel.post(content, self.bot_user)
+        message.buttons = [custom_id for custom_id, label in buttons]
+        message.on_click = on_click
+        return message
+
+    async def click(self, member, channel, custom_id):
+        """Clicks the button with a custom id on the latest message in a channel that has it, as member does.
+
+        Returns
+        -------
+        List[str]
+            The answers only the clicking member saw
+        """
+        answers = []
+        async def respond(content):
+            self.record('interaction', member.id)
+            answers.append(content)
+        for message in reversed(channel.messages):
+            if custom_id in message.buttons:
+                await message.on_click(member, custom_id, respond)
+                break
+        return answers
+
+    async def pin_message(self, message):
+        self.record('pin', message.channel.id)
+        message.pinned = True
+
+    async def unpin_message(self, channel, message_id):
+        self.record('unpin', channel.id)
+        message = channel.get_message(message_id)
+        if message != None:
+            message.pinned = False
+
+    async def create_dm(self, member):
+        self.record('create_dm', member.id)
+        if member.dm_channel == None:
+            member.dm_channel = Fake_Channel(self, f'dm-{member.name}', recipient=member)
+        return member.dm_channel
+
+    def get_dm_channel(self, member):
+        return member.dm_channel
+
+    async def add_role(self, member, role):
+        self.record('add_role', member.id)
+        if not (role in member.roles):
+            member.roles.append(role)
+
+    async def remove_role(self, member, role):
+        self.record('remove_role', member.id)
+        if role in member.roles:
+            member.roles.remove(role)
+
+    async def set_presence(self, status, activity):
+        self.record('presence', 0)
+        if status == None:
+            status = 'online'
+        self.status = status
+        self.activity = activity
+
+    def get_channel(self, id_num):
+        for temp_guild in self.guilds:
+            for channel in temp_guild.channels:
+                if channel.id == id_num:
+                    return channel
+        return None
+
+    def get_member(self, guild, id_num):
+        return guild.get_member(id_num)
+
+    async def fetch_message(self, channel_id, message_id):
+        self.record('fetch', channel_id)
+        for temp_guild in self.guilds:
+            channels = temp_guild.channels + [temp_member.dm_channel for temp_member in temp_guild.members]
+            for channel in channels:
+                if channel != None and channel.id == channel_id:
+                    return channel.get_message(message_id)
+        return None
+
+    async def query_members(self, guild, id_nums):
+        self.record('query_members', guild.id)
+        found_members = []
+        for temp_member in guild.members:
+            if temp_member.id in id_nums:
+                guild.uncached_id_nums.discard(temp_member.id)
+                found_members.append(temp_member)
+        return found_members
+
+    def get_role(self, guild, name):
+        for role in guild.roles:
+            if role.name == name:
+                return role
+        return None
+
+    def forget_members(self, guild, members):
+        # the fake guild caches every member, like a bot that is not in lean mode
+        pass
+
+class Fake_Context():
+
+    """Stands in for commands.Context when a command handler is called directly."""
+
+    def __init__(self, transport, author, channel, guild, mentions):
+        self.transport = transport
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.message = Fake_Message(transport.next_id(), channel, '', author)
+        self.message.mentions = mentions
+
+    async def send(self, content):
+        return await self.transport.send_message(self.channel, content)
+
+    async def pins(self):
+        self.transport.record('fetch', self.channel.id)
+        return await self.channel.pins()
+
+class Fake_Discord():
+
+    """A fake guild with an admin, players and a general channel, wired into the real lychee.py command handlers.
+
+    Parameters
+    ----------
+    bot
+        The lychee module
+    player_count : int
+        How many players to create
+    snapshots : Snapshot_Store
+        Where games are snapshotted, None to not snapshot them
+    transport : Fake_Transport
+        A transport the bot already uses to add the guild to, so that one bot hosts several fake guilds, or None
+        to make a new one and send every command's requests through it
+    guild_id : int
+        The guild's id, which decides the shard it is on, or None to give it the next id
+
+    Attributes
+    ----------
+    transport : Fake_Transport
+        Stands in for Discord
+    guild : Fake_Guild
+        The guild every game is played in
+    gateway : Fake_Gateway
+        Delivers the players' DM commands through the worker with shard 0, or None to run them directly
+    poll_delay : float
+        The most seconds the scripted players wait on a running command before looking at the game again, or 0 to
+        look at every turn of the event loop
+    general_channel : Fake_Channel
+        The channel games are started in
+    admin : Fake_Member
+        A member with the Admin role who starts games
+    members : List[Fake_Member]
+        The players
+    records : List[Command_Record]
+        A record of every command sent, in the order they were sent
+    bot
+    """
+
+    # Commands are called directly, so role checks such as @commands.has_role('Admin') are not applied
+
+    # Moves that click a button on the general channel's latest prompt rather than send a command
+    BUTTON_MOVES = ['vote_button', 'mission_button']
+
+    NIGHT_COMMANDS = {'Gambler': 'gamble', 'Officer': 'arrest', 'Psychic': 'see', 'Witch': 'see', 'Freelancer': 'freelance',
+                      'Professor': 'teach', 'Mad Scientist': 'experiment', 'Librarian': 'silence', 'Silencer': 'silence'}
+
+    def __init__(self, bot, player_count, snapshots=None, transport=None, guild_id=None):
+        self.bot = bot
+        if transport == None:
+            self.transport = Fake_Transport()
+        else:
+            self.transport = transport
+        self.guild = Fake_Guild(self.transport, 'Guild', guild_id)
+        self.guild.name = f'Guild {self.guild.id}'
+        self.transport.guilds.append(self.guild)
+        self.general_channel = Fake_Channel(self.transport, 'general', self.guild)
+        self.guild.channels.append(self.general_channel)
+        self.admin = Fake_Member(self.transport, 'Admin')
+        self.admin.roles.append(self.transport.get_role(self.guild, 'Admin'))
+        self.members = [] # List[Fake_Member]
+        for x in range(player_count):
+            self.members.append(Fake_Member(self.transport, f'Player{x + 1}'))
+        self.guild.members = [self.admin] + self.members
+        self.records = [] # List[Command_Record]
+        self.gateway = None # Fake_Gateway
+        self.poll_delay = 0 # float
+        if transport == None:
+            bot.use_transport(self.transport, snapshots)
+
+    async def command(self, name, author, channel, *args, **kwargs):
+        """Calls a command handler as if author had sent it in channel, or clicks a button for a move in BUTTON_MOVES."""
+        ctx = Fake_Context(self.transport, author, channel, self.guild, self.members)
+        record = Command_Record(name)
+        self.records.append(record)
+        game = self.bot.get_game(ctx)
+        if game != None:
+            record.window_before = game.current_window
+            record.round_before = game.get_round()
+        token = current_record.set(record)
+        start = time.perf_counter()
+        try:
+            if name in Fake_Discord.BUTTON_MOVES:
+                await self.transport.click(author, channel, *args)
+            else:
+                await self.bot.client.get_command(name)(ctx, *args, **kwargs)
+        finally:
+            record.latency = time.perf_counter() - start
+            current_record.reset(token)
+        game = self.bot.get_game(ctx) or game
+        if game != None:
+            await settle_game(game, self.poll_delay)
+            record.window_after = game.current_window
+            record.round_after = game.get_round()
+            record.ended_game = game.completed
+
+    def send(self, name, author, channel, *args, **kwargs):
+        """Sends a command as a player would, through the gateway if it is a DM and there is one, and returns a
+        future of it."""
+        if self.gateway != None and channel.guild == None:
+            return self.gateway.send_dm(name, author, args, kwargs)
+        return asyncio.ensure_future(self.command(name, author, channel, *args, **kwargs))
+
+    async def play_game(self, mode, end_early=False):
+        """Plays a whole game through the command handlers and returns it.
+
+        Every player accepts every team, the Resistance plays success and the Spies play fail whenever they can,
+        and night actions and assassinations target the first player they are allowed to.
+
+        Parameters
+        ----------
+        mode : str
+            'vanilla', 'commander', or 'party'
+        end_early : bool
+            Whether the admin ends every vote and mission with `>>end_vote` and `>>end_mission` once half of the
+            players have acted
+
+        Returns
+        -------
+        Game
+            The completed game
+        """
+        mentions = ' '.join([temp_member.mention for temp_member in self.members])
+        await self.command(mode, self.admin, self.general_channel, player_mentions=mentions)
+        game = self.bot.games.get_game_from_channel(self.general_channel)
+        tasks = []
+        while not game.completed:
+            await settle(tasks, game, self.poll_delay)
+            moves = get_moves(game, self, end_early)
+            for move in moves:
+                task = self.send(*move[:3], *move[3], **move[4])
+                tasks.append(task)
+                await settle_command(task, game, self.poll_delay)
+            if len(moves) == 0:
+                await asyncio.sleep(self.poll_delay)
+            tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+        return game
+
+async def settle(tasks, game, delay=0):
+    """Yields to the event loop until every command has finished or is waiting on a player's action."""
+    while any(not task.done() for task in tasks) and len(game.waiting_players) == 0:
+        await wait_for_tasks(tasks, delay)
+    check_tasks(tasks)
+    await settle_game(game, delay)
+
+async def settle_game(game, delay=0):
+    """Yields to the event loop until the commands submitted to a game have run or it is waiting on a player's
+    action."""
+    while game.actor_task != None and len(game.waiting_players) == 0:
+        await wait_for_tasks([game.actor_task], delay)
+
+async def settle_command(task, game, delay=0):
+    """Yields to the event loop until a command has finished, or has started waiting on a player's action."""
+    was_waiting = len(game.waiting_players) != 0
+    while not task.done() and (was_waiting or len(game.waiting_players) == 0):
+        await wait_for_tasks([task], delay)
+    check_tasks([task])
+
+async def wait_for_tasks(tasks, delay):
+    """Yields to the event loop once, or with a delay, until a task finishes or delay seconds have passed."""
+    if delay == 0:
+        await asyncio.sleep(0)
+    else:
+        await asyncio.wait([task for task in tasks if not task.done()], timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+def check_tasks(tasks):
+    for task in tasks:
+        if task.done() and task.exception() != None:
+            raise task.exception()
+
+def get_moves(game, fake, end_early=False):
+    """Returns the commands to send next as (name, author, channel, args, kwargs)."""
+    moves = []
+    if game.completed:
+        return moves
+    for temp_player in game.players:
+        if not (temp_player in game.waiting_players):
+            continue
+        if temp_player.role == 'Assassin':
+            targets = [other_player.name for other_player in game.players if other_player is not temp_player]
+            moves.append(('assassinate', temp_player.member, fake.general_channel, [targets[0]], {}))
+        elif temp_player.role in Fake_Discord.NIGHT_COMMANDS:
+            name = Fake_Discord.NIGHT_COMMANDS[temp_player.role]
+            targets = [other_player.name for other_player in game.players if other_player is not temp_player and not temp_player.has_already_targeted(other_player)]
+            if name == 'gamble':
+                moves.append((name, temp_player.member, temp_player.member.dm_channel, [], {'gambled_player_names': ' '.join(targets[:2])}))
+            else:
+                moves.append((name, temp_player.member, temp_player.member.dm_channel, [targets[0]], {}))
+    if len(moves) != 0 or len(game.waiting_players) != 0:
+        return moves
+    if game.current_window == 0:
+        team_names = [temp_player.name for temp_player in game.players if temp_player.can_be_on_current_mission][:int(game.get_team_size())]
+        leader = game.player_members[game.team_leader_index]
+        moves.append(('team', leader, fake.general_channel, [], {'team_player_names': ' '.join(team_names)}))
+    elif game.current_window == 1:
+        voters = game.players
+        if end_early:
+            voters = game.players[:len(game.players) // 2]
+        for temp_player in voters:
+            if not temp_player.voted and game.use_buttons:
+                moves.append(('vote_button', temp_player.member, fake.general_channel, [f'vote:{game.prompt_nonce}:accept'], {}))
+            elif not temp_player.voted:
+                moves.append(('vote', temp_player.member, temp_player.member.dm_channel, ['accept'], {}))
+        if end_early and len(moves) == 0:
+            moves.append(('end_vote', fake.admin, fake.general_channel, [], {}))
+    elif game.current_window == 2:
+        team = game.get_current_team()
+        if end_early:
+            team = team[:len(team) // 2]
+            if all(temp_player.completed_mission for temp_player in team):
+                moves.append(('end_mission', fake.admin, fake.general_channel, [], {}))
+                team = []
+        for temp_player in team:
+            if not temp_player.completed_mission:
+                if temp_player.alignment == 'Spy':
+                    preferences = [(1, 'fail'), (0, 'success'), (2, 'switch')]
+                else:
+                    preferences = [(0, 'success'), (2, 'switch'), (1, 'fail')]
+                for card, name in preferences:
+                    if temp_player.can_play(card) and game.use_buttons:
+                        moves.append(('mission_button', temp_player.member, fake.general_channel, [f'mission:{game.prompt_nonce}:{name}'], {}))
+                        break
+                    elif temp_player.can_play(card):
+                        moves.append(('mission', temp_player.member, temp_player.member.dm_channel, [name], {}))
+                        break
+    return moves
@@ -0,0 +1,166 @@
+"""Runs the workers of shards.py as local processes against fake guilds, with a fake gateway in place of Discord's.
+
+Each worker hosts a Fake_Discord for every guild on its shards and plays a game in each with the scripted players
+of fake_discord.py. A command sent in a guild channel is run by the worker hosting the guild, as Discord delivers
+it to the guild's shard. A DM command is delivered to the worker with shard 0, as Discord delivers every DM there,
+and that worker runs it or forwards it through its Shard_Router the way lychee.py does.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import time
+import traceback
+
+from types import SimpleNamespace
+
+from fake_discord import Fake_Discord, Fake_Transport
+from shards import DM_SHARD_ID, Shard_Router, get_shard_id, get_shard_ranges, get_worker_index, start_workers
+
+# every worker's fake gives out ids from its own range, so that member ids are unique across the workers
+WORKER_ID_RANGE = 10**9
+# the scripted players wait on commands that other processes pass along, so rather than looking at their game at
+# every turn of the event loop they wait for the command, looking again at least this often
+POLL_DELAY = 0.01
+
+def get_guild_id(guild_index):
+    """Returns the id of a fake guild, made like a Discord id so that guild x is on shard x % shard_count."""
+    return guild_index << 22
+
+class Fake_Gateway():
+
+    """Delivers the DM commands of one worker's scripted players through the worker with shard 0.
+
+    Parameters
+    ----------
+    bot
+        The lychee module
+    router : Shard_Router
+        This worker's router
+
+    Attributes
+    ----------
+    fakes_by_member : Dict[int, Fake_Discord]
+        The fake guild of every player hosted by this worker, by the player's id
+    pending : Dict[Tuple[int, int], asyncio.Future]
+        Each DM command this worker's players have sent and that has not finished yet, by request id
+    request_ids : Iterator[int]
+        Numbers this worker's requests
+    bot
+    router
+    """
+
+    def __init__(self, bot, router):
+        self.bot = bot
+        self.router = router
+        self.fakes_by_member = {} # Dict[int, Fake_Discord]
+        self.pending = {} # Dict[Tuple[int, int], asyncio.Future]
+        self.request_ids = itertools.count()
+
+    def add_fake(self, fake):
+        fake.gateway = self
+        fake.poll_delay = POLL_DELAY
+        for temp_member in fake.members:
+            self.fakes_by_member[temp_member.id] = fake
+
+    def send_dm(self, name, author, args, kwargs):
+        """Sends a DM command to the worker with shard 0 and returns a future of it finishing."""
+        request_id = (self.router.worker_index, next(self.request_ids))
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.router.send(self.router.dm_worker_index, ('gateway_dm', request_id, name, author.id, args, kwargs))
+        return future
+
+    async def receive_dm(self, request_id, name, author_id, args, kwargs):
+        """Handles a DM command as the worker with shard 0 does, with lychee.get_routed_worker."""
+        message = SimpleNamespace(guild=None, author=SimpleNamespace(id=author_id))
+        worker_index = self.bot.get_routed_worker(message)
+        if worker_index == None:
+            await self.run_dm(request_id, name, author_id, args, kwargs)
+        else:
+            self.router.forward(worker_index, (request_id, name, author_id, args, kwargs))
+
+    async def run_dm(self, request_id, name, author_id, args, kwargs):
+        fake = self.fakes_by_member.get(author_id)
+        if fake == None:
+            raise LookupError(f'Worker {self.router.worker_index} was sent a DM command from {author_id}, who it does not host.')
+        author = fake.guild.get_member(author_id)
+        future = self.pending.pop(request_id)
+        try:
+            await fake.command(name, author, author.dm_channel, *args, **kwargs)
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(None)
+
+def run_fake_worker(worker_index, shard_ids, shard_count, inboxes, guild_count, mode, player_count, results):
+    """Plays a game in every fake guild on a worker's shards, reporting to results once the worker is ready and
+    once its games are done, and keeps routing DM commands until it is stopped."""
+    try:
+        asyncio.run(play_worker(worker_index, shard_ids, shard_count, inboxes, guild_count, mode, player_count, results))
+    except Exception:
+        results.put(('error', worker_index, traceback.format_exc()))
+
+async def play_worker(worker_index, shard_ids, shard_count, inboxes, guild_count, mode, player_count, results):
+    # imported here so that every worker process builds its own bot
+    import lychee
+    transport = Fake_Transport((worker_index + 1) * WORKER_ID_RANGE)
+    lychee.use_transport(transport)
+    dm_worker_index = get_worker_index(get_shard_ranges(shard_count, len(inboxes)), DM_SHARD_ID)
+    router = Shard_Router(worker_index, inboxes, dm_worker_index)
+    lychee.use_router(router)
+    gateway = Fake_Gateway(lychee, router)
+    started = asyncio.Event()
+    async def start():
+        started.set()
+    router.start({'gateway_dm': gateway.receive_dm, 'dm': gateway.run_dm, 'start': start})
+    fakes = []
+    for x in range(guild_count):
+        if get_shard_id(get_guild_id(x), shard_count) in shard_ids:
+            fake = Fake_Discord(lychee, player_count, transport=transport, guild_id=get_guild_id(x))
+            gateway.add_fake(fake)
+            fakes.append(fake)
+    results.put(('ready', worker_index))
+    await started.wait()
+    start_time = time.process_time()
+    await asyncio.gather(*[fake.play_game(mode) for fake in fakes])
+    command_count = sum([len(fake.records) for fake in fakes])
+    results.put(('done', worker_index, command_count, time.process_time() - start_time))
+    await router.task
+
+def get_result(results):
+    result = results.get()
+    if result[0] == 'error':
+        raise RuntimeError(f'Worker {result[1]} failed:\n{result[2]}')
+    return result
+
+def play_sharded(worker_count, shard_count, guild_count, mode='commander', player_count=7):
+    """Plays a game in each of guild_count fake guilds, spread over worker processes by shard.
+
+    Returns
+    -------
+    Tuple[int, float, List[float]]
+        How many commands were run, the seconds from the first worker starting its games to the last finishing,
+        and the CPU seconds each worker spent
+    """
+    results = multiprocessing.get_context('spawn').Queue()
+    workers, inboxes = start_workers(worker_count, shard_count, run_fake_worker, guild_count, mode, player_count, results)
+    try:
+        for x in range(worker_count):
+            get_result(results)
+        start = time.perf_counter()
+        for inbox in inboxes:
+            inbox.put(('start',))
+        command_count = 0
+        cpu_times = [0.0] * worker_count
+        for x in range(worker_count):
+            result = get_result(results)
+            command_count += result[2]
+            cpu_times[result[1]] = result[3]
+        elapsed = time.perf_counter() - start
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for worker in workers:
+            worker.join()
+    return (command_count, elapsed, cpu_times)
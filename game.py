@@ -1,9 +1,38 @@
-import discord
+import asyncio
+import collections
+import contextvars
 import random
 
+from dispatcher import PRIORITY_CRITICAL, Dispatcher
+from metrics import timed_phase
 from player import *
+from player_table import Player_Table
+from progress import Progress_Message
+from scheduler import Deadline_Scheduler
+from transport import Closed_DM_Error, Discord_Transport
 from voter import *
 
+SNAPSHOT_VERSION = 4
+GAME_LOG_VERSION = 1
+# player attributes that only live until the end of an action, and the references back to the game and member
+SNAPSHOT_SKIPPED_PLAYER_ATTRIBUTES = ['game', 'member', 'action_done', 'chosen_action']
+# what the mission prompt asks each player to play, by Player.allowed_cards; a player who can play nothing is asked
+# to switch
+MISSION_CARD_CHOICES = {(1 << SUCCESS) | (1 << FAIL) | (1 << SWITCH): '`>>mission success`, `>>mission fail`, or `>>mission switch`',
+                        (1 << SUCCESS) | (1 << FAIL): '`>>mission success` or `>>mission fail`.',
+                        (1 << SUCCESS) | (1 << SWITCH): '`>>mission success` or `>>mission switch`.',
+                        (1 << FAIL) | (1 << SWITCH): '`>>mission fail` or `>>mission switch`.',
+                        1 << SUCCESS: '`>>mission success`.',
+                        1 << FAIL: '`>>mission fail`.'}
+# the buttons of a vote and of a mission in interaction mode, as (choice, label)
+VOTE_BUTTONS = [('accept', 'Accept'), ('reject', 'Reject')]
+MISSION_BUTTONS = [('success', 'Success'), ('fail', 'Fail'), ('switch', 'Switch')]
+VOTE_NAMES = ['accept', 'reject']
+
+class Missing_Member_Error(LookupError):
+
+    """Raised when some players of a game are not members of its guild."""
+
 class Game():
 
     """Stores information about the overall game.
@@ -24,6 +53,31 @@ class Game():
     all_spy_roles : List[str]
         The spy roles you want in the game
         Becomes the spy roles not in the game
+    dispatcher : Dispatcher
+        Sends every message, shared by all games (a new one talking to Discord through the client if not given)
+    action_timeouts : Dict[str, float]
+        How many seconds each role has to perform their action, by role name
+    default_action_timeout : float
+        How many seconds every other role has to perform their action (None waits until skipped)
+    snapshots : Snapshot_Store
+        Saves the game at every phase transition (None to not save it)
+    game_logs : Snapshot_Store
+        Saves the game's log once it is completed (None to not save it)
+    seed : int
+        Seeds every random choice in the game (drawn from the random module if not given)
+    mentioned_members : List[discord.Member]
+        The members mentioned in the start command, so that players do not have to be looked up (looked up by id
+        if not given)
+    scheduler : Deadline_Scheduler
+        Runs the game's phase and action deadlines, shared by all games (a new one if not given)
+    phase_timeouts : Dict[str, float]
+        How many seconds 'team_building', 'vote' and 'mission' may last before they are resolved like
+        `>>next_leader`, `>>end_vote` and `>>end_mission` do (phases not given wait for an admin)
+    use_buttons : bool
+        Whether players vote and play mission cards with buttons on the phase's announcement, answered only to the
+        clicking player, instead of with DM commands
+    on_end : Callable[[Game], None]
+        Called with the game once it has ended, such as to drop it from its Game_Registry (None to do nothing)
 
     Attributes
     ----------
@@ -47,6 +101,10 @@ class Game():
         The indicies of the spy players in any "player" List
     players : List[Players]
         The players in the current game
+    player_table : Player_Table
+        Finds players by seat, member and name, and keeps the current team
+    phase_subscribers : Dict[str, List[Player]]
+        The players acting in each phase outside of the night, in order
     team_leader_index : int
         The index of the current team leader
     voter : Voter
@@ -63,23 +121,105 @@ class Game():
         Which window it currently is: 0=team_building, 1=voting, 2=mission, 3=night_actions
     has_night_actions : bool
         Whether or not there are night actions in the game
-    skip_night_action : bool
-        Whether or not to skip the current night action
+    waiting_players : List[Player]
+        The players whose action is currently being waited on
     completed : bool
         If the game is done
+    ending : bool
+        Whether the game is over but waits on end of game actions, such as the Assassin's, before it ends
+    transport : Transport
+        The dispatcher's transport, used to look up members and roles
+    pinned_message_ids : List[int]
+        The ids of the messages this game has pinned and not yet unpinned
+    random : random.Random
+        Makes every random choice in the game, so that a game can be replayed from its seed
+    phase_seed : int
+        What random was reseeded with at the start of the current phase
+    events : List[List]
+        Every accepted command in the order it was applied, as [kind, *arguments] with players as their index
+    setup_resistance_roles : List[str]
+        The resistance roles the game was started with
+    setup_spy_roles : List[str]
+        The spy roles the game was started with
+    phase_deadline : Deadline
+        Resolves the current phase if it is still running once its timeout passes (None if it has no timeout)
+    prompt_nonce : int
+        The number of the latest vote or mission prompt sent with buttons, part of each of its buttons' custom ids so
+        that a click on an older prompt's buttons is refused
+    clicked_mask : int
+        The seats of the players whose vote or mission card button click is submitted but has not run yet, so that a
+        second click is refused
+    progress : Progress_Message
+        The announcement of the current vote or mission, edited to list who has submitted (None in other phases)
+    commands : Deque[Tuple[contextvars.Context, Callable, Tuple]]
+        The commands submitted to the game and not yet run, oldest first, each with the context it was submitted
+        from and its arguments
+    actor_task : asyncio.Task
+        Runs the submitted commands one at a time, or None while there are none
     guild
     client
     general_channel
     player_id_nums
+    dispatcher
+    action_timeouts
+    default_action_timeout
+    snapshots
+    game_logs
+    seed
+    mentioned_members
+    scheduler
+    phase_timeouts
+    use_buttons
+    on_end
     """
 
-    def __init__(self, guild, client, general_channel, player_id_nums, all_resistance_roles, all_spy_roles):
+    def __init__(self, guild, client, general_channel, player_id_nums, all_resistance_roles, all_spy_roles, dispatcher=None,
+                 action_timeouts=None, default_action_timeout=None, snapshots=None, game_logs=None, seed=None,
+                 mentioned_members=None, scheduler=None, phase_timeouts=None, use_buttons=False, on_end=None):
         self.guild = guild
         self.client = client
         self.general_channel = general_channel
         self.player_id_nums = player_id_nums
         self.all_resistance_roles = all_resistance_roles
         self.all_spy_roles = all_spy_roles
+        if dispatcher == None:
+            dispatcher = Dispatcher(Discord_Transport(client))
+        self.dispatcher = dispatcher
+        self.transport = dispatcher.transport
+        if action_timeouts == None:
+            action_timeouts = {}
+        self.action_timeouts = action_timeouts
+        self.default_action_timeout = default_action_timeout
+        self.snapshots = snapshots
+        self.game_logs = game_logs
+        if mentioned_members == None:
+            mentioned_members = []
+        self.mentioned_members = mentioned_members
+        if scheduler == None:
+            scheduler = Deadline_Scheduler()
+        self.scheduler = scheduler
+        if phase_timeouts == None:
+            phase_timeouts = {}
+        self.phase_timeouts = phase_timeouts
+        self.phase_deadline = None
+        self.use_buttons = use_buttons
+        self.on_end = on_end
+        self.prompt_nonce = 0
+        self.clicked_mask = 0
+        self.progress = None
+        if seed == None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.phase_seed = seed
+        self.events = []
+        self.setup_resistance_roles = list(all_resistance_roles)
+        self.setup_spy_roles = list(all_spy_roles)
+        self.has_night_actions = True
+        self.waiting_players = []
+        self.ending = False
+        self.commands = collections.deque()
+        self.actor_task = None
     
     async def finish_initialization(self):
         # initialize Round Tracker
@@ -88,13 +228,14 @@ class Game():
             self.round_tracker = Round_Tracker(4) 
         else:
             self.round_tracker = Round_Tracker(self.player_count)
-        self.player_members = [] # List[discord.Member]
+        await self.resolve_members()
+        await self.prewarm_dms()
         self.player_names = [] # List[str]
         self.player_resistance_roles = [] # List[str]
         self.player_spy_roles = [] # List[str]
         # randomize roles and spies
-        random.shuffle(self.all_resistance_roles)
-        random.shuffle(self.all_spy_roles)
+        self.random.shuffle(self.all_resistance_roles)
+        self.random.shuffle(self.all_spy_roles)
         if self.player_count == 5 or self.player_count == 6:
             self.num_spies = 2 
         elif self.player_count == 7 or self.player_count == 8:
@@ -103,14 +244,12 @@ class Game():
             self.num_spies = 4
         else:
             self.num_spies = 0 # int
-        self.spy_indices = random.sample(range(0, self.player_count-1), self.num_spies) # List[int] — len()=self.num_spies
+        self.spy_indices = self.random.sample(range(0, self.player_count-1), self.num_spies) # List[int] — len()=self.num_spies
         self.spy_indices.sort()
         # initialize Players
         self.players = [] # List[Players]
         for x in range(len(self.player_id_nums)):
-            temp_member = self.guild.get_member(self.player_id_nums[x])
-            self.player_members.append(temp_member)
-            self.player_names.append(temp_member.display_name)
+            self.player_names.append(self.player_members[x].display_name)
             if (x in self.spy_indices):
                 temp_role = self.all_spy_roles.pop()
                 self.player_spy_roles.append(temp_role)
@@ -118,14 +257,11 @@ class Game():
                 temp_role = self.all_resistance_roles.pop()
                 self.player_resistance_roles.append(temp_role)
             self.players.append(create_player(temp_role, self, self.player_members[x], self.player_names[x], self.player_id_nums[x]))
-        for temp_player in self.players: 
-            await temp_player.get_starting_info()
-        # give @Player role to all players
-        for role in self.guild.roles:
-            if role.name == 'Player':
-                for temp_member in self.player_members:
-                    await temp_member.add_roles(role)
-                break
+        self.player_table = Player_Table(self.players) # Player_Table
+        self.phase_subscribers = index_phase_subscribers(self.players)
+        # every player's starting info is sent at once
+        await asyncio.gather(*[temp_player.get_starting_info() for temp_player in self.players])
+        await self.grant_player_role()
         self.team_leader_index = 0
         # initialize Voter and Missioner
         self.voter = Voter(self)
@@ -134,22 +270,288 @@ class Game():
         self.success_count = 0
         self.fail_count = 0
         self.current_window = 0
-        self.has_night_actions = True
-        self.skip_night_actions = False
         self.completed = False
-        await self.general_channel.send(f'A game has been started! There are {self.player_count - self.num_spies} Resistance members and {self.num_spies} Spy members.')
-        # pin message
-        messages = await self.general_channel.history(limit=5).flatten()
-        for message in reversed(messages):
-            if message.content == (f'A game has been started! There are {self.player_count - self.num_spies} Resistance members and {self.num_spies} Spy members.'):
-                await message.pin()
+        self.pinned_message_ids = []
+        await self.announce(f'A game has been started! There are {self.player_count - self.num_spies} Resistance members and {self.num_spies} Spy members.', pin=True)
         await self.start_team_building()
 
+    def get_snapshot(self):
+        """Returns everything needed to restore the game at the start of its current phase.
+
+        Players are stored by their index in self.players, and each player's attributes are stored as they are
+        except for the ones that only live until the end of an action.
+
+        Returns
+        -------
+        Dict
+            The snapshot, holding only JSON types
+        """
+        player_states = []
+        for temp_player in self.players:
+            player_state = {}
+            for name, value in vars(temp_player).items():
+                if name in SNAPSHOT_SKIPPED_PLAYER_ATTRIBUTES:
+                    continue
+                if name == 'past_targets':
+                    value = [self.get_player_index(temp_target) for temp_target in value]
+                elif isinstance(value, list):
+                    value = list(value)
+                player_state[name] = value
+            player_states.append(player_state)
+        return {'version': SNAPSHOT_VERSION,
+                'general_channel_id': self.general_channel.id,
+                'player_id_nums': list(self.player_id_nums),
+                'all_resistance_roles': list(self.all_resistance_roles),
+                'all_spy_roles': list(self.all_spy_roles),
+                'player_resistance_roles': list(self.player_resistance_roles),
+                'player_spy_roles': list(self.player_spy_roles),
+                'num_spies': self.num_spies,
+                'spy_indices': list(self.spy_indices),
+                'current_round': self.round_tracker.current_round,
+                'team_leader_index': self.team_leader_index,
+                'rejected_team_count': self.rejected_team_count,
+                'success_count': self.success_count,
+                'fail_count': self.fail_count,
+                'current_window': self.current_window,
+                'has_night_actions': self.has_night_actions,
+                'pinned_message_ids': list(self.pinned_message_ids),
+                'action_timeouts': dict(self.action_timeouts),
+                'default_action_timeout': self.default_action_timeout,
+                'phase_timeouts': dict(self.phase_timeouts),
+                'seed': self.seed,
+                'phase_seed': self.phase_seed,
+                'events': list(self.events),
+                'setup_resistance_roles': self.setup_resistance_roles,
+                'setup_spy_roles': self.setup_spy_roles,
+                'players': player_states,
+                'voter': self.voter.get_state(),
+                'missioner': self.missioner.get_state()}
+
+    def save_snapshot(self):
+        if self.has_ended():
+            # the snapshot was deleted when the game ended, so a restart does not bring the game back
+            return
+        # every phase reseeds the game's random from itself, so a snapshot only needs the phase's seed to continue it
+        self.phase_seed = self.random.getrandbits(32)
+        self.random.seed(self.phase_seed)
+        if self.snapshots != None:
+            self.snapshots.save(self.general_channel.id, self.get_snapshot())
+
+    def delete_snapshot(self):
+        if self.snapshots != None:
+            self.snapshots.delete(self.general_channel.id)
+
+    def log_event(self, kind, *args):
+        """Appends an accepted command to the event log.
+
+        Parameters
+        ----------
+        kind : str
+            What the command did, such as 'vote' or 'action'
+        args
+            The command's arguments, holding only JSON types
+        """
+        self.events.append([kind, *args])
+
+    def get_log(self):
+        """Returns everything needed to replay the game: its setup, seed and event log, and its result to check against.
+
+        Returns
+        -------
+        Dict
+            The game log, holding only JSON types
+        """
+        return {'version': GAME_LOG_VERSION,
+                'general_channel_id': self.general_channel.id,
+                'seed': self.seed,
+                'player_names': list(self.player_names),
+                'setup_resistance_roles': self.setup_resistance_roles,
+                'setup_spy_roles': self.setup_spy_roles,
+                'has_night_actions': self.has_night_actions,
+                'events': list(self.events),
+                'result': self.get_result()}
+
+    def get_result(self):
+        return {'completed': self.completed,
+                'success_count': self.success_count,
+                'fail_count': self.fail_count,
+                'rejected_team_count': self.rejected_team_count,
+                'roles': [temp_player.role for temp_player in self.players],
+                'alignments': [temp_player.alignment for temp_player in self.players]}
+
+    def save_log(self):
+        if self.game_logs != None:
+            self.game_logs.save(f'{self.general_channel.id}-{self.seed}', self.get_log())
+
+    async def restore(self, snapshot):
+        """Rebuilds the game from a snapshot in place of finish_initialization. Use resume to continue playing it.
+
+        Parameters
+        ----------
+        snapshot : Dict
+            A snapshot from get_snapshot
+        """
+        if snapshot['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f'Cannot restore a version {snapshot["version"]} snapshot.')
+        self.player_count = len(self.player_id_nums)
+        self.round_tracker = Round_Tracker(max(self.player_count, 4))
+        self.round_tracker.current_round = snapshot['current_round']
+        self.all_resistance_roles = snapshot['all_resistance_roles']
+        self.all_spy_roles = snapshot['all_spy_roles']
+        self.player_resistance_roles = snapshot['player_resistance_roles']
+        self.player_spy_roles = snapshot['player_spy_roles']
+        self.num_spies = snapshot['num_spies']
+        self.spy_indices = snapshot['spy_indices']
+        await self.resolve_members()
+        self.player_names = [] # List[str]
+        self.players = [] # List[Players]
+        for x in range(self.player_count):
+            player_state = snapshot['players'][x]
+            self.player_names.append(player_state['name'])
+            self.players.append(create_player(player_state['role'], self, self.player_members[x], player_state['name'], self.player_id_nums[x]))
+        for temp_player, player_state in zip(self.players, snapshot['players']):
+            for name, value in player_state.items():
+                if name == 'past_targets':
+                    value = [self.players[index] for index in value]
+                setattr(temp_player, name, value)
+        self.player_table = Player_Table(self.players)
+        self.phase_subscribers = index_phase_subscribers(self.players)
+        self.voter = Voter(self)
+        self.voter.restore(snapshot['voter'])
+        self.missioner = Missioner(self)
+        self.missioner.restore(snapshot['missioner'])
+        self.team_leader_index = snapshot['team_leader_index']
+        self.rejected_team_count = snapshot['rejected_team_count']
+        self.success_count = snapshot['success_count']
+        self.fail_count = snapshot['fail_count']
+        self.current_window = snapshot['current_window']
+        self.has_night_actions = snapshot['has_night_actions']
+        self.pinned_message_ids = snapshot['pinned_message_ids']
+        self.action_timeouts = snapshot['action_timeouts']
+        self.default_action_timeout = snapshot['default_action_timeout']
+        self.phase_timeouts = snapshot['phase_timeouts']
+        self.seed = snapshot['seed']
+        self.phase_seed = snapshot['phase_seed']
+        self.random.seed(self.phase_seed)
+        self.events = snapshot['events']
+        self.setup_resistance_roles = snapshot['setup_resistance_roles']
+        self.setup_spy_roles = snapshot['setup_spy_roles']
+        self.waiting_players = []
+        self.completed = False
+        # prompts are sent to each player's DM channel, which is not cached after a restart
+        await self.open_dms()
+
+    async def resume(self):
+        """Continues a restored game from the start of the phase it was snapshotted in."""
+        await self.announce('Lychee has restarted. Continuing the game from the start of the current phase.')
+        if self.current_window == 0:
+            await self.announce_team_building()
+        elif self.current_window == 1:
+            await self.prompt_vote()
+        elif self.current_window == 2:
+            await self.prompt_mission()
+        else:
+            await self.do_night_actions()
+
+    async def announce(self, content, pin=False, buttons=None, on_click=None):
+        """Sends a message to the general channel.
+
+        Parameters
+        ----------
+        content : str
+            The message to send
+        pin : bool
+            Whether to pin the sent message and record it in the pin ledger
+        buttons : List[Tuple[str, str]]
+            The custom id and label of each button to put under the message (None for no buttons)
+        on_click : Callable
+            Called as on_click(member, custom_id, respond) when a button is clicked
+
+        Returns
+        -------
+        discord.Message
+            The sent message
+        """
+        if buttons == None:
+            message = await self.dispatcher.send(self.general_channel, content)
+        else:
+            message = await self.dispatcher.send_buttons(self.general_channel, content, buttons, on_click)
+        if pin:
+            await self.dispatcher.pin(message)
+            self.pinned_message_ids.append(message.id)
+        return message
+
+    async def resolve_members(self):
+        """Finds every player's member: among the mentioned members, then in the member cache, then with one
+        chunked member query for everyone the cache is missing, as large guilds only cache some of their members.
+
+        Raises
+        ------
+        Missing_Member_Error
+            If some players are not members of the guild
+        """
+        members_by_id_num = {}
+        for temp_member in self.mentioned_members:
+            members_by_id_num[temp_member.id] = temp_member
+        uncached_id_nums = []
+        for temp_id_num in self.player_id_nums:
+            if not (temp_id_num in members_by_id_num):
+                temp_member = self.transport.get_member(self.guild, temp_id_num)
+                if temp_member == None:
+                    uncached_id_nums.append(temp_id_num)
+                else:
+                    members_by_id_num[temp_id_num] = temp_member
+        if len(uncached_id_nums) != 0:
+            for temp_member in await self.dispatcher.query_members(self.guild, uncached_id_nums):
+                members_by_id_num[temp_member.id] = temp_member
+        missing_mentions = [f'<@!{temp_id_num}>' for temp_id_num in self.player_id_nums if not (temp_id_num in members_by_id_num)]
+        if len(missing_mentions) != 0:
+            raise Missing_Member_Error(f'these players are not members of this server: {" ".join(missing_mentions)}')
+        self.player_members = [members_by_id_num[temp_id_num] for temp_id_num in self.player_id_nums] # List[discord.Member]
+
+    async def open_dms(self):
+        await asyncio.gather(*[self.dispatcher.create_dm(temp_member) for temp_member in self.player_members])
+
+    async def prewarm_dms(self):
+        """Opens every player's DM channel and sends them the New Game header, all at once, before roles are dealt.
+        Sending is the only way to find out that a player does not accept direct messages.
+
+        Raises
+        ------
+        Closed_DM_Error
+            If some players do not accept direct messages
+        """
+        await self.open_dms()
+        results = await asyncio.gather(*[self.dispatcher.send_dm(temp_member, '—————— New Game ——————', PRIORITY_CRITICAL)
+                                         for temp_member in self.player_members], return_exceptions=True)
+        closed_mentions = []
+        for temp_member, result in zip(self.player_members, results):
+            if isinstance(result, Closed_DM_Error):
+                closed_mentions.append(temp_member.mention)
+            elif isinstance(result, BaseException):
+                raise result
+        if len(closed_mentions) != 0:
+            raise Closed_DM_Error(f'these players do not accept direct messages from Lychee: {" ".join(closed_mentions)}')
+
+    async def grant_player_role(self):
+        """Gives every player the @Player role at once; the dispatcher caps how many grants are in flight."""
+        role = self.transport.get_role(self.guild, 'Player')
+        if role != None:
+            await asyncio.gather(*[self.dispatcher.add_role(self.guild, temp_member, role) for temp_member in self.player_members])
+
+    async def revoke_player_role(self):
+        role = self.transport.get_role(self.guild, 'Player')
+        if role != None:
+            await asyncio.gather(*[self.dispatcher.remove_role(self.guild, temp_member, role) for temp_member in self.player_members])
+
+    async def unpin_all(self):
+        """Unpins every message in the pin ledger."""
+        pinned_message_ids = self.pinned_message_ids
+        self.pinned_message_ids = []
+        await unpin_messages(self.dispatcher, self.general_channel, pinned_message_ids)
+
     def is_player(self, name):
-        for temp_name in self.player_names:
-            if temp_name == name:
-                return True
-        return False
+        return self.player_table.get_player_from_name(name) != None
 
     def get_resistance_names(self):
         resistance_names = []
@@ -190,433 +592,582 @@ class Game():
             return True
         return False
 
+    def submit(self, command, *args):
+        """Queues a command to run once every command submitted before it has finished, starting the task that runs
+        them if it is not running. Every change of phase goes through here, so two commands never change the game at
+        once, however close together they are sent.
+
+        Parameters
+        ----------
+        command : Callable
+            The coroutine function to run, usually a method of the game
+        *args
+            The arguments to call it with
+        """
+        # the command runs in the context it was submitted from, so that its calls count towards the command sending it
+        self.commands.append((contextvars.copy_context(), command, args))
+        if self.actor_task == None:
+            self.actor_task = asyncio.ensure_future(self.run_commands())
+
+    async def run_commands(self):
+        """Runs the submitted commands in order until there are none left."""
+        try:
+            while len(self.commands) != 0:
+                context, command, args = self.commands.popleft()
+                task = context.run(asyncio.ensure_future, command(*args))
+                try:
+                    await task
+                except Exception as error:
+                    asyncio.get_running_loop().call_exception_handler({'message': 'Unhandled exception in a game command',
+                                                                       'exception': error})
+        finally:
+            self.actor_task = None
+
+    async def propose_team(self, team_players):
+        """Starts a vote on a team, unless the team building phase ended before the command ran."""
+        if self.completed or self.current_window != 0:
+            return
+        await self.start_vote(team_players)
+
+    async def pass_team_leader(self, reply):
+        """Passes the team leader on, as `>>next_leader` does.
+
+        Parameters
+        ----------
+        reply : Callable[[str], Awaitable]
+            Sends a message back to whoever passed the team leader on
+        """
+        if self.completed or self.current_window != 0:
+            return
+        self.log_event('next_leader')
+        self.next_team_leader()
+        self.start_phase_deadline('team_building')
+        await reply(f'The new team leader is {self.player_names[self.team_leader_index]}.')
+
+    async def cast_vote(self, player, vote):
+        """Records a player's vote, unless the vote ended or they voted before the command ran.
+
+        Parameters
+        ----------
+        player : Player
+            The voting player
+        vote : int
+            0 for accept, 1 for reject
+        """
+        self.clicked_mask &= ~self.player_table.get_bit(player)
+        if self.completed or self.current_window != 1 or player.voted:
+            return
+        # the edit waits, so it shows this submission, and is made at once if this submission ends the phase
+        self.update_progress()
+        await self.voter.record_vote(player, vote)
+
+    async def play_mission_card(self, player, card):
+        """Records a player's mission card, unless the mission ended or they played a card before the command ran.
+
+        Parameters
+        ----------
+        player : Player
+            The player on the team
+        card : int
+            SUCCESS, FAIL, or SWITCH
+        """
+        self.clicked_mask &= ~self.player_table.get_bit(player)
+        if self.completed or self.current_window != 2 or not player.on_current_team or player.completed_mission:
+            return
+        if not player.can_play(card):
+            return
+        self.update_progress()
+        await self.missioner.record_mission_card(player, card)
+
+    async def click_vote(self, member, custom_id, respond):
+        """Checks a click on a vote button as `>>vote` checks the command, submits the vote and answers the clicking
+        player alone."""
+        player = self.get_player_from_member(member)
+        kind, nonce, choice = custom_id.split(':')
+        vote = VOTE_NAMES.index(choice)
+        if player == None:
+            content = 'Sorry, you are not in this game.'
+        elif self.completed or self.current_window != 1:
+            content = 'Sorry, it is not the voting phase.'
+        elif int(nonce) != self.prompt_nonce:
+            content = 'Sorry, this vote is over.'
+        elif player.voted or self.clicked_mask & self.player_table.get_bit(player):
+            content = 'Sorry, you have already voted.'
+        else:
+            self.clicked_mask |= self.player_table.get_bit(player)
+            self.submit(self.cast_vote, player, vote)
+            content = f'Thank you for your vote to {VOTE_NAMES[vote]}.'
+        await self.dispatcher.respond(respond, content)
+
+    async def click_mission_card(self, member, custom_id, respond):
+        """Checks a click on a mission card button as `>>mission` checks the command, submits the card and answers
+        the clicking player alone."""
+        player = self.get_player_from_member(member)
+        kind, nonce, choice = custom_id.split(':')
+        card = CARD_NAMES.index(choice)
+        if player == None:
+            content = 'Sorry, you are not in this game.'
+        elif self.completed or self.current_window != 2:
+            content = 'Sorry, it is not the mission conducting phase.'
+        elif int(nonce) != self.prompt_nonce:
+            content = 'Sorry, this mission is over.'
+        elif not player.on_current_team:
+            content = 'Sorry, you are not on the current team.'
+        elif player.completed_mission or self.clicked_mask & self.player_table.get_bit(player):
+            content = 'Sorry, you have already submitted.'
+        elif not player.can_play(card):
+            content = f'Sorry, you currently cannot play {CARD_NAMES[card]}.'
+        else:
+            self.clicked_mask |= self.player_table.get_bit(player)
+            self.submit(self.play_mission_card, player, card)
+            content = f'Thank you for playing {CARD_NAMES[card]}.'
+        await self.dispatcher.respond(respond, content)
+
+    def make_buttons(self, kind, choices):
+        """Numbers a new prompt and returns its buttons as (custom id, label), each custom id naming the kind of
+        prompt, its number and the choice, such as 'vote:3:accept'."""
+        self.prompt_nonce += 1
+        return [(f'{kind}:{self.prompt_nonce}:{choice}', label) for choice, label in choices]
+
+    async def assassinate(self, player, assassinated_player):
+        """Performs the Assassin's choice, as `>>assassinate` does, unless their action was closed before the command
+        ran."""
+        if self.completed or not (player in self.waiting_players):
+            return
+        await player.do_assassination(assassinated_player)
+
+    def has_ended(self):
+        """Whether the game is over, including while it waits on end of game actions."""
+        return self.completed or self.ending
+
+    def is_held_up(self):
+        """Whether the game's commands are held up until the night actions it waits on finish, which could be
+        never."""
+        return len(self.waiting_players) != 0 and not self.ending
+
+    async def end_game(self):
+        """Ends the game as a Resistance win, as `>>end_game` does."""
+        if self.completed:
+            return
+        self.log_event('end_game')
+        self.success_count = 3
+        waiting_players = list(self.waiting_players)
+        await self.check_end_game()
+        # a command held up by an action being waited on finds the game over once the action is closed
+        for temp_player in waiting_players:
+            temp_player.finish_action()
+
     def set_window(self, window):
+        self.cancel_phase_deadline()
         self.current_window = window
 
     def stop_night_actions(self):
         self.has_night_actions = False
 
+    def get_action_timeout(self, role):
+        return self.action_timeouts.get(role, self.default_action_timeout)
+
+    def schedule_deadline(self, timeout, callback):
+        """Calls a callback once a timeout passes, or never if the timeout is None.
+
+        Returns
+        -------
+        Deadline
+            The deadline, to cancel it, or None if the timeout is None
+        """
+        if timeout == None:
+            return None
+        return self.scheduler.schedule(timeout, callback)
+
+    def start_phase_deadline(self, phase):
+        """Schedules the current phase to be resolved once its timeout passes, replacing any earlier phase deadline.
+
+        Parameters
+        ----------
+        phase : str
+            'team_building', 'vote', or 'mission'
+        """
+        expirers = {'team_building': self.expire_team_building,
+                    'vote': self.finish_vote,
+                    'mission': self.finish_mission}
+        self.cancel_phase_deadline()
+        deadline = self.schedule_deadline(self.phase_timeouts.get(phase),
+                                          lambda: self.submit(self.expire_phase, deadline, expirers[phase]))
+        self.phase_deadline = deadline
+
+    def update_progress(self):
+        if self.progress != None:
+            self.progress.update()
+
+    async def finish_progress(self):
+        """Shows the final progress of the vote or mission that just ended and removes its buttons, if it has any."""
+        if self.progress != None:
+            progress = self.progress
+            self.progress = None
+            await progress.finish()
+
+    def cancel_phase_deadline(self):
+        if self.phase_deadline != None:
+            self.phase_deadline.cancel()
+            self.phase_deadline = None
+
+    async def expire_phase(self, deadline, expirer):
+        """Resolves a phase whose deadline passed, unless the deadline was replaced or cancelled while the command
+        was queued."""
+        if deadline is not self.phase_deadline:
+            return
+        self.phase_deadline = None
+        await expirer()
+
+    async def expire_team_building(self):
+        """Passes the team leader on, as `>>next_leader` does, when they have not proposed a team in time."""
+        if self.completed or self.current_window != 0:
+            return
+        self.log_event('next_leader')
+        late_leader_name = self.player_names[self.team_leader_index]
+        self.next_team_leader()
+        self.start_phase_deadline('team_building')
+        await self.announce(f'{late_leader_name} did not propose a team in time. '
+                            + f'The new team leader is {self.player_members[self.team_leader_index].mention}.')
+
+    async def finish_vote(self):
+        """Votes accept for every player who has not voted yet. Used by `>>end_vote` and when the vote times out."""
+        for temp_player in [temp_player for temp_player in self.players if temp_player.voted == False]:
+            # the last vote ends the voting phase, after which players' votes are reset
+            if self.completed or self.current_window != 1:
+                return
+            self.update_progress()
+            await self.voter.record_vote(temp_player, 0)
+
+    async def finish_mission(self):
+        """Plays a card for every player on the team who has not played one yet: success, else switch, else fail for
+        the Resistance, and fail, else switch, else success for the Spies. Used by `>>end_mission` and when the
+        mission times out."""
+        for temp_player in self.get_current_team():
+            # the last card ends the mission, after which the team is reset
+            if self.completed or self.current_window != 2:
+                return
+            if temp_player.completed_mission:
+                continue
+            if temp_player.alignment == 'Resistance':
+                card_preferences = [SUCCESS, SWITCH, FAIL]
+            else:
+                card_preferences = [FAIL, SWITCH, SUCCESS]
+            for card in card_preferences:
+                if temp_player.can_play(card) or card == card_preferences[-1]:
+                    break
+            self.update_progress()
+            await self.missioner.record_mission_card(temp_player, card)
+
+    def skip_action(self):
+        """Skips every action currently being waited on."""
+        self.log_event('skip_action')
+        for temp_player in list(self.waiting_players):
+            temp_player.finish_action()
+
     def get_current_team(self):
-        current_team = []
-        for temp_player in self.players:
-            if temp_player.on_current_team:
-                current_team.append(temp_player)
-        return current_team
+        return self.player_table.get_current_team()
+
+    def get_player_index(self, player):
+        return self.player_table.get_seat(player)
 
     def get_player_from_member(self, member):
-        if member in self.player_members:
-            return self.players[self.player_members.index(member)]
-        return None
+        return self.player_table.get_player_from_id_num(member.id)
 
     def get_player_from_name(self, name):
-        if name in self.player_names:
-            return self.players[self.player_names.index(name)]
-        return None
+        """Finds a player by their name, ignoring case and Unicode presentation, or by the start of their name if it
+        is the only name starting that way. Returns None if no player matches."""
+        return self.player_table.get_player_from_name(name)
 
     async def start_team_building(self):
+        if self.has_ended():
+            return
         # open and announce team building window
         self.set_window(0)
         self.next_team_leader()
-        await self.general_channel.send(f'Players, prepare to conduct Mission {self.get_round()}.\n{int(self.get_team_size())} players will be on this team.\n'
-                                      + f'Your team leader is {self.player_members[self.team_leader_index].mention}.')
+        self.save_snapshot()
+        await self.announce_team_building()
+
+    async def announce_team_building(self):
+        self.start_phase_deadline('team_building')
+        await self.announce(f'Players, prepare to conduct Mission {self.get_round()}.\n{int(self.get_team_size())} players will be on this team.\n'
+                            + f'Your team leader is {self.player_members[self.team_leader_index].mention}.', pin=True)
         if self.get_team_size() == 4.5 or self.get_team_size() == 5.5:
-            await self.general_channel.send('This mission requires 2 `>>mission fail` to fail.')
-        # pin message
-        messages = await self.general_channel.history(limit=5).flatten()
-        for message in reversed(messages):
-            if message.content == (f'Players, prepare to conduct Mission {self.get_round()}.\n{int(self.get_team_size())} players will be on this team.\n'
-                                 + f'Your team leader is {self.player_members[self.team_leader_index].mention}.'):
-                await message.pin()
-                return
+            await self.announce('This mission requires 2 `>>mission fail` to fail.')
 
-    async def start_vote(self, team_player_names):
+    @timed_phase
+    async def start_vote(self, team_players):
         """Starts a vote.
 
         Parameters
         ----------
-        team_player_names : List[str]
-            A List of each person's name that you want on the team
+        team_players : List[Player]
+            Each player that you want on the team
         """
+        self.log_event('team', [self.get_player_index(temp_player) for temp_player in team_players])
         # add players to the team
-        for temp_name in team_player_names:
-            self.get_player_from_name(temp_name).add_to_team()
+        for temp_player in team_players:
+            temp_player.add_to_team()
+        # open and announce voting window
+        self.set_window(1)
+        self.save_snapshot()
+        await self.prompt_vote()
+
+    async def prompt_vote(self):
+        self.start_phase_deadline('vote')
         # convert Players to names to display
         current_team_names = []
         for temp_player in self.get_current_team():
             current_team_names.append(temp_player.name)
-        # open and announce voting window
-        self.set_window(1)
-        for temp_member in self.player_members:
-            await temp_member.dm_channel.send(f'Please `>>vote accept` or `>>vote reject` on the proposed team: {current_team_names}')
-        await self.general_channel.send(f'{self.player_names[self.team_leader_index]} has proposed the following team: {current_team_names}\n'
-                                       + 'Please private message Lychee your vote using the `>>vote` command.')
-        # pin message
-        messages = await self.general_channel.history(limit=5).flatten()
-        for message in reversed(messages):
-            if message.content == (f'{self.player_names[self.team_leader_index]} has proposed the following team: {current_team_names}\n'
-                                  + 'Please private message Lychee your vote using the `>>vote` command.'):
-                await message.pin()
+        content = f'{self.player_names[self.team_leader_index]} has proposed the following team: {current_team_names}\n'
+        if self.use_buttons:
+            content += 'Please vote with the buttons below.'
+            message = await self.announce(content, pin=True, buttons=self.make_buttons('vote', VOTE_BUTTONS),
+                                          on_click=self.click_vote)
+        else:
+            vote_prompts = []
+            for temp_member in self.player_members:
+                vote_prompts.append((self.dispatcher.get_dm_channel(temp_member), f'Please `>>vote accept` or `>>vote reject` on the proposed team: {current_team_names}'))
+            await self.dispatcher.send_many(vote_prompts, PRIORITY_CRITICAL)
+            content += 'Please private message Lychee your vote using the `>>vote` command.'
+            message = await self.announce(content, pin=True)
+        get_voted_names = lambda: [temp_player.name for temp_player in self.player_table.get_players(self.voter.get_voted_mask())]
+        self.progress = Progress_Message(self.dispatcher, message, content, 'Voted', get_voted_names, self.player_count,
+                                         self.scheduler, self.use_buttons)
 
     async def rejected_team(self):
         self.rejected_team_count += 1
         # convert Players to names to display
         voted_accept_names = []
-        for temp_player in self.voter.voted_accept:
+        for temp_player in self.voter.get_voted_accept():
             voted_accept_names.append(temp_player.name)
         voted_reject_names = []
-        for temp_player in self.voter.voted_reject:
+        for temp_player in self.voter.get_voted_reject():
             voted_reject_names.append(temp_player.name)
-        await self.general_channel.send(f'The team was rejected.\nAccepted: {voted_accept_names}\nRejected: {voted_reject_names}\n' +
+        await self.announce(f'The team was rejected.\nAccepted: {voted_accept_names}\nRejected: {voted_reject_names}\n' +
                                         f'There have been {self.rejected_team_count} rejected teams.')
         # reset
         for temp_player in self.players:
             temp_player.soft_reset()
         self.voter.reset()
         await self.check_end_game()
-        if self.completed == False:
+        if self.has_ended() == False:
             await self.start_team_building()
 
+    @timed_phase
     async def start_mission(self):
         """Starts conducting a mission."""
         # convert Players to names to display
         voted_accept_names = []
-        for temp_player in self.voter.voted_accept:
+        for temp_player in self.voter.get_voted_accept():
             voted_accept_names.append(temp_player.name)
         voted_reject_names = []
-        for temp_player in self.voter.voted_reject:
+        for temp_player in self.voter.get_voted_reject():
             voted_reject_names.append(temp_player.name)
-        await self.general_channel.send(f'The team was accepted.\nAccepted: {voted_accept_names}\nRejected: {voted_reject_names}')
-        await self.do_pre_mission_actions()
+        await self.announce(f'The team was accepted.\nAccepted: {voted_accept_names}\nRejected: {voted_reject_names}')
+        await self.do_phase_actions('pre_mission')
         # reset and open mission window
         self.voter.reset()
         self.set_window(2)
-        # determine which mission cards are avaliable to each player out of 7 possibilities
-        for temp_player in self.get_current_team():
-            if temp_player.possible_mission_cards == [True, True, True]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission success`, `>>mission fail`, or `>>mission switch`')
-            elif temp_player.possible_mission_cards == [True, True, False]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission success` or `>>mission fail`.')
-            elif temp_player.possible_mission_cards == [True, False, True]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission success` or `>>mission switch`.')
-            elif temp_player.possible_mission_cards == [False, True, True]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission fail` or `>>mission switch`.')
-            elif temp_player.possible_mission_cards == [True, False, False]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission success`.')
-            elif temp_player.possible_mission_cards == [False, True, False]:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission fail`.')
-            else:
-                await temp_player.member.dm_channel.send(f'You are on the Mission {self.get_round()} team. Please `>>mission switch`.')
-        await self.general_channel.send(f'Team members, prepare to conduct Mission {self.get_round()}.\nPlease message me privately using the `>>mission` command.')
-        await self.client.change_presence(activity=discord.Game(f'Conducting Mission {self.get_round()}!'))
+        self.save_snapshot()
+        await self.prompt_mission()
+
+    async def prompt_mission(self):
+        self.start_phase_deadline('mission')
+        content = f'Team members, prepare to conduct Mission {self.get_round()}.\n'
+        if self.use_buttons:
+            # a card the player cannot play is refused when they click it
+            content += 'Please play your card with the buttons below.'
+            message = await self.announce(content, buttons=self.make_buttons('mission', MISSION_BUTTONS),
+                                          on_click=self.click_mission_card)
+        else:
+            # determine which mission cards are avaliable to each player out of 7 possibilities
+            mission_prompts = []
+            for temp_player in self.get_current_team():
+                card_choices = MISSION_CARD_CHOICES.get(temp_player.allowed_cards, '`>>mission switch`.')
+                mission_prompts.append((self.dispatcher.get_dm_channel(temp_player.member), f'You are on the Mission {self.get_round()} team. Please {card_choices}'))
+            await self.dispatcher.send_many(mission_prompts, PRIORITY_CRITICAL)
+            content += 'Please message me privately using the `>>mission` command.'
+            message = await self.announce(content)
+        get_submitted_names = lambda: [temp_player.name for temp_player in self.player_table.get_players(self.missioner.get_submitted_mask())]
+        self.progress = Progress_Message(self.dispatcher, message, content, 'Submitted', get_submitted_names,
+                                         int(self.get_team_size()), self.scheduler, self.use_buttons)
 
+    @timed_phase
     async def end_mission(self):
         """Ends a mission and determines the result out of 18 possiblities.
         determine number of switches (even, 1, odd)
             determine if it is a double-fail round (yes, no)
                 determine number of fails to determine result (2+, 1, 0)"""
-        if len(self.missioner.conducted_switch) % 2 == 0:
+        if self.missioner.card_counts[SWITCH] % 2 == 0:
             if self.get_team_size() == 4.5 or self.get_team_size() == 5.5:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission fail with 2+ fails and even switches
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission success with 1 fail and even switches
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has succeeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
                 else:
                     # mission success with 0 fails and even switches
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
             else:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission fail with 2+ fails and even switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission fail with 1 fail and even switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1
                 else:
                     # mission success with 0 fails and even switch
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
-        elif len(self.missioner.conducted_switch) == 1:
+        elif self.missioner.card_counts[SWITCH] == 1:
             if self.get_team_size() == 4.5 or self.get_team_size() == 5.5:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission success with 2+ fails and 1 switch
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.success_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission fail with 1 fail and 1 switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.fail_count += 1
                 else:
                     # mission fail with 0 fails and 1 switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.fail_count += 1
             else:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission success with 2+ fails and 1 switch
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has suceeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.success_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission success with 1 fail and 1 switch
-                    await self.general_channel.send(f'The mission has suceeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has suceeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.success_count += 1
                 else:
                     # mission fail with 0 fails and 1 switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switch.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switch.', pin=True)
                     self.fail_count += 1
         else:
             if self.get_team_size() == 4.5 or self.get_team_size() == 5.5:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission success with 2+ fails and odd switch
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission fail with 1 fail and odd switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1
                 else:
                     # mission fail with 0 fails and odd switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1
             else:
-                if len(self.missioner.conducted_fail) >= 2:
+                if self.missioner.card_counts[FAIL] >= 2:
                     # mission success with 2+ fails and odd switch
-                    await self.general_channel.send(f'The mission has succeeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has suceeded with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
-                elif len(self.missioner.conducted_fail) == 1:
+                elif self.missioner.card_counts[FAIL] == 1:
                     # mission success with 1 fail and odd switch
-                    await self.general_channel.send(f'The mission has suceeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has suceeded with {len(self.missioner.conducted_fail)} fail and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has succeeded with {self.missioner.card_counts[FAIL]} fail and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.success_count += 1
                 else:
                     # mission fail with 0 fails and odd switch
-                    await self.general_channel.send(f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.')
-                    # pin message
-                    messages = await self.general_channel.history(limit=5).flatten()
-                    for message in reversed(messages):
-                        if message.content == (f'The mission has failed with {len(self.missioner.conducted_fail)} fails and {len(self.missioner.conducted_switch)} switches.'):
-                            await message.pin()
+                    await self.announce(f'The mission has failed with {self.missioner.card_counts[FAIL]} fails and {self.missioner.card_counts[SWITCH]} switches.', pin=True)
                     self.fail_count += 1            
         # reset
         for temp_player in self.players:
             temp_player.hard_reset()
         self.missioner.reset()
         await self.check_end_game()
-        if self.completed == False:
+        if self.has_ended() == False:
             await self.do_night_actions()
 
-    async def do_post_vote_actions(self):
-        # if Usurper exists, do action
-        # if Contrarian exists, do action
-        # if Muckraker exists, do action
-        # if Timekeeper exists, do action
-        usurper_player = None
-        contrarian_player = None
-        muckraker_player = None
-        timekeeper_player = None
-        for temp_player in self.players:
-            if temp_player.role == 'Usurper':
-                usurper_player = temp_player
-            elif temp_player.role == 'Contrarian':
-                contrarian_player = temp_player
-            elif temp_player.role == 'Muckraker':
-                muckraker_player = temp_player
-            elif temp_player.role == 'Timekeeper':
-                timekeeper_player = temp_player
-        if usurper_player != None:
-            await usurper_player.do_action()
-        if contrarian_player != None:
-            await contrarian_player.do_action()
-        if muckraker_player != None:
-            await muckraker_player.do_action()
-        if timekeeper_player != None:
-            await timekeeper_player.do_action()
-
-    async def do_pre_mission_actions(self):
-        # if Dueler is on the team, do action
-        # if Traditionalist is on the team, do action
-        # Bomber bomb goes off
-        # Freelancer bomb goes off
-        dueler_player = None
-        traditionalist_player = None
-        bomber_player = None
-        freelancer_player = None
-        for temp_player in self.players:
-            if temp_player.role == 'Dueler':
-                dueler_player = temp_player
-            elif temp_player.role == 'Traditionalist':
-                traditionalist_player = temp_player
-            elif temp_player.role == 'Bomber':
-                bomber_player = temp_player
-            elif temp_player.role == 'Freelancer':
-                freelancer_player = temp_player
-        if dueler_player != None and (dueler_player in self.get_current_team()):
-            await dueler_player.do_action()
-        if traditionalist_player != None and (traditionalist_player in self.get_current_team()):
-            await traditionalist_player.do_action()
-        if bomber_player != None:
-            await bomber_player.do_action()
-        if freelancer_player != None:
-            await freelancer_player.do_action()
-
-    async def do_post_mission_actions(self):
-        # if Martyr is on the team, do action
-        # if Angel is on the team, do action
-        martyr_player = None
-        angel_player = None
-        for temp_player in self.players:
-            if temp_player.role == 'Martyr':
-                martyr_player = temp_player
-            elif temp_player.role == 'Angel':
-                angel_player = temp_player
-        if martyr_player != None and (martyr_player in self.get_current_team()):
-            await martyr_player.do_action()
-        if angel_player != None and (angel_player in self.get_current_team()):
-            await angel_player.do_action()
+    async def do_phase_actions(self, phase):
+        """Does the actions of every player subscribed to a phase, in the order their roles declare.
 
+        Parameters
+        ----------
+        phase : str
+            'post_vote', 'pre_mission', 'post_mission', or 'end_game'
+        """
+        for temp_player in self.phase_subscribers.get(phase, []):
+            if temp_player.can_act_in(phase):
+                await temp_player.do_action()
+
+    @timed_phase
     async def do_night_actions(self):
+        if self.has_ended():
+            return
         if self.has_night_actions == True:
             # open and announce night action window
             self.set_window(3)
-            await self.general_channel.send('Players, if appropriate, please wait until queued to do your action in your private messages with me.')
-            await self.client.change_presence(activity=discord.Game(f'End of Round {self.get_round()} actions!'))
-            # do actions
-            action_count = 0
+            self.save_snapshot()
+            await self.announce('Players, if appropriate, please wait until queued to do your action in your private messages with me.')
+            # every acting player chooses at once, then their actions are resolved in dependency order
+            acting_players = []
             for temp_player in self.players:
-                self.skip_night_action = False
                 if temp_player.action_windows[self.get_round()-1]:
-                    action_count += 1
-                    await temp_player.do_action()
-            await asyncio.sleep(10*(4-action_count))
-            await self.general_channel.send('All end of round actions have been performed!')
+                    acting_players.append(temp_player)
+            await asyncio.gather(*[temp_player.choose_action() for temp_player in acting_players])
+            for temp_player in order_night_actions(acting_players):
+                if self.has_ended():
+                    # the game was ended while actions were being chosen or resolved
+                    return
+                await temp_player.do_action()
+            if self.has_ended():
+                return
+            await self.announce('All end of round actions have been performed!')
         # end round
         self.set_window(0)
         self.next_round()
         await self.start_team_building()
 
-    async def do_end_game_actions(self):
-        # if Assassin exists and conditions met, do action
-        assassin_player = None
-        for temp_player in self.players:
-            if temp_player.role == 'Assassin':
-                assassin_player = temp_player
-        if assassin_player != None and self.success_count >= 3:
-            await assassin_player.do_action()
-
+    @timed_phase
     async def check_end_game(self):
-        """Checks if the game is over. If it is over, cleans everything up."""
-        await self.do_end_game_actions()
+        """Checks if the game is over. If it is over, cleans everything up. While an end of game action it started,
+        such as the Assassin's, is open, the game waits for it to be closed, which checks again."""
+        if self.ending:
+            self.ending = False
+        elif self.completed:
+            # the game already ended while an end of game action was being closed
+            return
+        else:
+            await self.do_phase_actions('end_game')
+            for temp_player in self.phase_subscribers.get('end_game', []):
+                if temp_player in self.waiting_players:
+                    self.ending = True
+                    return
         if self.completed == True:
             pass
         elif self.success_count >= 3:
             self.completed = True
-            await self.general_channel.send('The game has ended—the Resistance has won!\nThere have been 3 successful missions.')
+            await self.announce('The game has ended—the Resistance has won!\nThere have been 3 successful missions.')
         elif self.fail_count >= 3:
             self.completed = True
-            await self.general_channel.send('The game has ended—the Spies have won!\nThere have been 3 failed missions.')
+            await self.announce('The game has ended—the Spies have won!\nThere have been 3 failed missions.')
         elif self.rejected_team_count >= 5:
             self.completed = True
-            await self.general_channel.send('The game has ended—the Spies have won!\nThere have been 5 rejected teams.')
+            await self.announce('The game has ended—the Spies have won!\nThere have been 5 rejected teams.')
         if self.completed == True:
+            self.cancel_phase_deadline()
+            await self.finish_progress()
+            self.delete_snapshot()
+            self.save_log()
             # reveal all player roles and alignments
             tell_all_roles = ''
             for temp_player in self.players:
                 tell_all_roles += f'{temp_player.name} was the {temp_player.role} on the {temp_player.alignment} side.\n'
-            await self.general_channel.send(tell_all_roles[:-1])
-            # unpin all messages
-            messages = await self.general_channel.pins()
-            for message in messages:
-                if message.author.bot == True:
-                    await message.unpin()
-            await self.client.change_presence(status=discord.Status.idle, activity=discord.Game('No ongoing game!'))
+            await self.announce(tell_all_roles[:-1])
+            await asyncio.gather(self.unpin_all(), self.revoke_player_role())
+            self.transport.forget_members(self.guild, self.player_members)
+            if self.on_end != None:
+                self.on_end(self)
 
 class Round_Tracker():
 
@@ -657,74 +1208,67 @@ class Round_Tracker():
     def get_team_size(self):
         return self.team_sizes[(self.player_count-4)][(self.current_round-1)]
 
-def create_player(role, game, member, name, id_num):
-    if role == 'President':
-        return President(game, member, name, id_num)
-    elif role == 'Gambler':
-        return Gambler(game, member, name, id_num)
-    elif role == 'Dueler':
-        return Dueler(game, member, name, id_num)
-    elif role == 'Officer':
-        return Officer(game, member, name, id_num)
-    elif role == 'Contrarian':
-        return Contrarian(game, member, name, id_num)
-    elif role == 'Informant':
-        return Informant(game, member, name, id_num)
-    elif role == 'Psychic':
-        return Psychic(game, member, name, id_num)
-    elif role == 'Witch':
-        return Witch(game, member, name, id_num)
-    elif role == 'Insider':
-        return Insider(game, member, name, id_num)
-    elif role == 'Resistance Reverser':
-        return Resistance_Reverser(game, member, name, id_num)
-    elif role == 'Organizer':
-        return Organizer(game, member, name, id_num)
-    elif role == 'Bomber':
-        return Bomber(game, member, name, id_num)
-    elif role == 'Martyr':
-        return Martyr(game, member, name, id_num)
-    elif role == 'Usurper':
-        return Usurper(game, member, name, id_num)
-    elif role == 'Muckraker':
-        return Muckraker(game, member, name, id_num)
-    elif role == 'Drunken Spy':
-        return Drunken_Spy(game, member, name, id_num)
-    elif role == 'Angel':
-        return Angel(game, member, name, id_num)
-    elif role == 'Spy Reverser':
-        return Spy_Reverser(game, member, name, id_num)
-    elif role == 'Freelancer':
-        return Freelancer(game, member, name, id_num)
-    elif role == 'Traditionalist':
-        return Traditionalist(game, member, name, id_num)
-    elif role == 'Professor':
-        return Professor(game, member, name, id_num)
-    elif role == 'Resistance Clown':
-        return Resistance_Clown(game, member, name, id_num)
-    elif role == 'Timekeeper':
-        return Timekeeper(game, member, name, id_num)
-    elif role == 'Mad Scientist':
-        return Mad_Scientist(game, member, name, id_num)
-    elif role == 'Spy Clown':
-        return Spy_Clown(game, member, name, id_num)
-    elif role == 'Resistance':
-        return Resistance(game, member, name, id_num)
-    elif role == 'Spy':
-        return Spy(game, member, name, id_num)
-    elif role == 'Commander':
-        return Commander(game, member, name, id_num)
-    elif role == 'Bodyguard':
-        return Bodyguard(game, member, name, id_num)
-    elif role == 'Assassin':
-        return Assassin(game, member, name, id_num)
-    elif role == 'False Commander':
-        return False_Commander(game, member, name, id_num)
-    elif role == 'Librarian':
-        return Librarian(game, member, name, id_num) 
-    elif role == 'Silencer':
-        return Silencer(game, member, name, id_num)
-    elif role == 'Victimizer':
-        return Victimizer(game, member, name, id_num)
-    else: 
-        return None
+def index_phase_subscribers(players):
+    """Indexes the players subscribed to each phase so that a phase only touches the players acting in it.
+
+    Parameters
+    ----------
+    players : List[Player]
+        The players in the game
+
+    Returns
+    -------
+    Dict[str, List[Player]]
+        The players subscribed to each phase, in the order they act
+    """
+    phase_subscribers = {}
+    for temp_player in players:
+        for phase in temp_player.phase_hooks:
+            if not (phase in phase_subscribers):
+                phase_subscribers[phase] = []
+            phase_subscribers[phase].append(temp_player)
+    for phase in phase_subscribers:
+        phase_subscribers[phase].sort(key=lambda temp_player: temp_player.phase_hooks[phase])
+    return phase_subscribers
+
+def order_night_actions(players):
+    """Orders players so that each one's night action is resolved after the actions of every role in their resolve_after.
+    Players otherwise keep their seat order.
+
+    Parameters
+    ----------
+    players : List[Player]
+        The players with an action this round
+
+    Returns
+    -------
+    List[Player]
+        The same players in the order their actions are resolved
+    """
+    ordered_players = []
+    remaining_players = list(players)
+    while len(remaining_players) != 0:
+        remaining_roles = [temp_player.role for temp_player in remaining_players]
+        next_player = remaining_players[0] # only used if the declared orders form a cycle
+        for temp_player in remaining_players:
+            if not any((role in remaining_roles and role != temp_player.role) for role in temp_player.resolve_after):
+                next_player = temp_player
+                break
+        remaining_players.remove(next_player)
+        ordered_players.append(next_player)
+    return ordered_players
+
+async def unpin_messages(dispatcher, channel, message_ids):
+    """Unpins messages by id all at once without fetching the channel's pins.
+
+    Parameters
+    ----------
+    dispatcher : Dispatcher
+        Sends the requests
+    channel : discord.Channel
+        The channel the messages are pinned in
+    message_ids : List[int]
+        The ids of the messages to unpin
+    """
+    # every unpin in a channel shares one rate limit bucket, so the dispatcher only lets a few be in flight at a time
+    await asyncio.gather(*[dispatcher.unpin(channel, message_id) for message_id in message_ids])
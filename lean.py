@@ -0,0 +1,118 @@
+"""Lean mode, for bots in large guilds: connects with only the intents games need, caches as little as possible, and
+drops the message events of channels without a game before discord.py parses them.
+
+Games only need guilds (the guild, channel and role caches and the events that keep Caching_Transport right),
+members (member queries for players missing from the member cache) and guild and DM messages with their content
+(commands). Presence and typing events, usually most of a large guild's traffic, are then never sent. No member is
+cached apart from those fetched for a game, which the game forgets once it ends; admins need no cache entry, as a
+command's author comes with its roles in the message. No message is cached, as Lychee never reads a message back
+from the cache.
+
+Turned on with LYCHEE_LEAN_MODE=1.
+"""
+
+import discord
+
+from metrics import default_metrics
+from reactions import TRIGGER
+
+# Message events are dropped unless they could matter; every other event the lean intents allow is rare
+FILTERED_EVENTS = ['MESSAGE_CREATE', 'MESSAGE_UPDATE', 'MESSAGE_DELETE', 'MESSAGE_DELETE_BULK']
+
+def get_lean_intents():
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.members = True
+    intents.guild_messages = True
+    intents.dm_messages = True
+    allow_message_content(intents)
+    return intents
+
+def get_full_intents():
+    """Returns the intents of a bot outside lean mode: discord.py's defaults, with members so that every member is
+    cached and message content for commands."""
+    intents = discord.Intents.default()
+    intents.members = True
+    allow_message_content(intents)
+    return intents
+
+def allow_message_content(intents):
+    # discord.py 2 needs the message content intent to read commands, which earlier versions do not have
+    if hasattr(discord.Intents, 'message_content'):
+        intents.message_content = True
+
+def get_lean_options():
+    """Returns the keyword arguments that build a client in lean mode."""
+    return {'intents': get_lean_intents(),
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False,
+            'max_messages': None}
+
+class Event_Filter():
+
+    """Drops the message events that no command, game or reaction can need, straight from their raw payload.
+
+    A message event is kept if it is a DM, if its channel has an ongoing game, or if it is a command, names Lychee
+    or mentions the bot. Everything else is dropped before discord.py builds a message, author or member from it.
+
+    Parameters
+    ----------
+    client : discord.Client
+        Lychee (The current bot)
+    is_game_channel : Callable[[int], bool]
+        Whether the channel with an id has an ongoing game
+    prefix : str
+        The command prefix
+    metrics : Metrics
+        Counts the dropped events of each kind
+    """
+
+    def __init__(self, client, is_game_channel, prefix='>>', metrics=default_metrics):
+        self.client = client
+        self.is_game_channel = is_game_channel
+        self.prefix = prefix
+        self.metrics = metrics
+
+    def is_wanted(self, event, data):
+        """Returns whether a gateway event should be parsed and dispatched.
+
+        Parameters
+        ----------
+        event : str
+            The gateway event's name, such as 'MESSAGE_CREATE'
+        data : Dict
+            The event's raw payload
+        """
+        if not (event in FILTERED_EVENTS) or data.get('guild_id') == None:
+            return True
+        if self.is_game_channel(int(data['channel_id'])):
+            return True
+        if event != 'MESSAGE_CREATE':
+            return False
+        content = data.get('content', '')
+        if content.startswith(self.prefix) or TRIGGER in content.lower():
+            return True
+        if self.client.user != None:
+            user_id = str(self.client.user.id)
+            for temp_mention in data.get('mentions', []):
+                if temp_mention['id'] == user_id:
+                    return True
+        return False
+
+    def install(self):
+        """Puts the filter in front of the client's gateway event parsers.
+
+        discord.py looks each event's parser up in the connection state's parsers dict, so replacing the parsers
+        there drops an event before anything is built from it.
+        """
+        parsers = self.client._connection.parsers
+        for temp_event in FILTERED_EVENTS:
+            parsers[temp_event] = self.wrap_parser(temp_event, parsers[temp_event])
+
+    def wrap_parser(self, event, parser):
+        def filtered_parser(data):
+            if self.is_wanted(event, data):
+                parser(data)
+            else:
+                self.metrics.increment('lychee_dropped_events_total', 'event', event)
+        return filtered_parser
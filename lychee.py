@@ -1,3 +1,4 @@
+import asyncio
 import discord
 import os
 import random
@@ -5,17 +6,66 @@ import random
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
-from game import Game
+from dispatcher import PRIORITY_COSMETIC, Dispatcher
+from game import Game, Missing_Member_Error, unpin_messages
+from lean import Event_Filter, get_full_intents, get_lean_options
+from metrics import default_metrics, start_metrics_server, timed_command
+from player import FAIL, SUCCESS, SWITCH
+from reactions import match_reaction
+from registry import Game_Registry
+from scheduler import Deadline_Scheduler
+from setups import get_commander_roles, get_party_roles, get_vanilla_roles
+from snapshot import Snapshot_Store
+from transport import Caching_Transport, Closed_DM_Error, Discord_Transport
 
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN_LYCHEE')
-GUILD = os.getenv('DISCORD_GUILD')
+ACTION_TIMEOUT = os.getenv('LYCHEE_ACTION_TIMEOUT')
+TEAM_BUILDING_TIMEOUT = os.getenv('LYCHEE_TEAM_BUILDING_TIMEOUT')
+VOTE_TIMEOUT = os.getenv('LYCHEE_VOTE_TIMEOUT')
+MISSION_TIMEOUT = os.getenv('LYCHEE_MISSION_TIMEOUT')
+METRICS_PORT = os.getenv('LYCHEE_METRICS_PORT')
+SNAPSHOT_DIRECTORY = os.getenv('LYCHEE_SNAPSHOT_DIRECTORY', 'snapshots')
+GAME_LOG_DIRECTORY = os.getenv('LYCHEE_GAME_LOG_DIRECTORY', 'game_logs')
+# set by shards.py for each worker process
+SHARD_COUNT = os.getenv('LYCHEE_SHARD_COUNT')
+SHARD_IDS = os.getenv('LYCHEE_SHARD_IDS')
+LEAN_MODE = os.getenv('LYCHEE_LEAN_MODE', '0').lower() in ['1', 'true', 'yes']
+# players vote and play mission cards with buttons instead of DM commands; needs discord.py 2
+INTERACTION_MODE = os.getenv('LYCHEE_INTERACTION_MODE', '0').lower() in ['1', 'true', 'yes']
+if INTERACTION_MODE and not hasattr(discord, 'ui'):
+    raise RuntimeError('LYCHEE_INTERACTION_MODE needs discord.py 2, which has buttons.')
 
-client = commands.Bot(command_prefix='>>')
+if LEAN_MODE:
+    client_options = get_lean_options()
+else:
+    # discord.py 2 builds no client without explicit intents
+    client_options = {'intents': get_full_intents()}
+if SHARD_COUNT == None:
+    client = commands.Bot(command_prefix='>>', **client_options)
+else:
+    client = commands.AutoShardedBot(command_prefix='>>', shard_count=int(SHARD_COUNT),
+                                     shard_ids=[int(shard_id) for shard_id in SHARD_IDS.split(',')], **client_options)
+
+metrics_server = None
+restored_games = False
 
 @client.event
 async def on_ready():
-    await client.change_presence(status=discord.Status.idle, activity=discord.Game('No ongoing game!'))
+    global metrics_server
+    global restored_games
+    global shown_game_count
+    # on_ready runs again after every reconnect
+    if METRICS_PORT != None and metrics_server == None:
+        metrics_server = await start_metrics_server(int(METRICS_PORT))
+    if router != None and router.task == None:
+        router.start({'dm': run_routed_dm})
+    # a new session starts without the presence that was shown
+    shown_game_count = None
+    update_presence()
+    if restored_games == False:
+        restored_games = True
+        await restore_games()
     print('Bot is ready')
 
 @client.event
@@ -30,185 +80,283 @@ async def on_command_error(ctx, error):
         await ctx.send(f'An unhandled error has occurred.\n{error}')
         print(error)
 
+# Resolved roles and channels are forgotten whenever the gateway says they changed
+
+@client.event
+async def on_guild_remove(guild):
+    dispatcher.transport.forget_roles(guild)
+
+@client.event
+async def on_guild_role_create(role):
+    dispatcher.transport.forget_roles(role.guild)
+
+@client.event
+async def on_guild_role_update(before, after):
+    dispatcher.transport.forget_roles(before.guild)
+
+@client.event
+async def on_guild_role_delete(role):
+    dispatcher.transport.forget_roles(role.guild)
+
+@client.event
+async def on_guild_channel_update(before, after):
+    dispatcher.transport.forget_channel(before)
+
+@client.event
+async def on_guild_channel_delete(channel):
+    dispatcher.transport.forget_channel(channel)
+
 @client.event
 async def on_message(message):
     if message.content.startswith('>>'):
+        worker_index = get_routed_worker(message)
+        if worker_index == None:
+            await client.process_commands(message)
+        else:
+            router.forward(worker_index, (message.channel.id, message.id))
+    if message.author != client.user:
+        emoji = match_reaction(message.content, message.author.name)
+        if emoji != None:
+            await dispatcher.send(message.channel, f'{random.choice(emoji)}', PRIORITY_COSMETIC)
+
+# sets the bot's presence to the latest count of ongoing games (None while it is not running)
+presence_task = None
+# how many ongoing games the bot's presence shows (None if it shows none yet)
+shown_game_count = None
+
+def update_presence():
+    """Shows how many games are ongoing in the bot's presence, which is shared by every game, unless the task that
+    shows it is already running."""
+    global presence_task
+    if presence_task == None or presence_task.done():
+        presence_task = asyncio.ensure_future(show_game_count())
+
+async def show_game_count():
+    global shown_game_count
+    # games can start or end while the presence is being set, so it is set until it shows the latest count
+    while shown_game_count != len(games):
+        shown_game_count = len(games)
+        if shown_game_count == 0:
+            await dispatcher.set_presence('idle', 'No ongoing game!')
+        elif shown_game_count == 1:
+            await dispatcher.set_presence('online', '1 ongoing game!')
+        else:
+            await dispatcher.set_presence('online', f'{shown_game_count} ongoing games!')
+
+games = Game_Registry(on_change=update_presence)
+dispatcher = Dispatcher(Caching_Transport(Discord_Transport(client, keep_members=not LEAN_MODE)))
+snapshots = Snapshot_Store(SNAPSHOT_DIRECTORY)
+game_logs = Snapshot_Store(GAME_LOG_DIRECTORY)
+# every game's phase and action deadlines share one timer wheel
+scheduler = Deadline_Scheduler()
+# passes DM commands between the worker processes when shards.py runs the bot
+router = None
+
+def is_game_channel(channel_id):
+    return games.has_game_in_channel(channel_id)
+
+# drop the message events of channels without a game before discord.py parses them
+if LEAN_MODE:
+    Event_Filter(client, is_game_channel).install()
+
+def use_transport(transport, snapshot_store=None, game_log_store=None):
+    """Sends every command's requests through another transport, such as a Fake_Transport, and forgets every game.
+    Games are only snapshotted and logged if a Snapshot_Store is given for each."""
+    global dispatcher
+    global games
+    global snapshots
+    global game_logs
+    global scheduler
+    global shown_game_count
+    dispatcher = Dispatcher(Caching_Transport(transport))
+    games = Game_Registry(router, update_presence)
+    shown_game_count = None
+    scheduler = Deadline_Scheduler()
+    snapshots = snapshot_store
+    game_logs = game_log_store
+
+def use_router(shard_router):
+    """Runs this process as one worker of shards.py, routing DM commands through a Shard_Router."""
+    global router
+    router = shard_router
+    games.router = shard_router
+
+async def run_routed_dm(channel_id, message_id):
+    """Runs a DM command that the worker with shard 0 forwarded here, as this worker hosts its author's game."""
+    message = await dispatcher.fetch_message(channel_id, message_id)
+    if message != None:
         await client.process_commands(message)
-    if message.author != client.user and message.content.lower().find('lychee') != -1:
-        affection = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:', 
-                     ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:', 
-                     ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:']
-        validation = [':+1:', ':grinning:', ':blush:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
-        greeting = [':partying_face:', ':wave:', ':star2:', ':sparkles:', ':dancer:', ':clown:', ':raised_hands:']
-        confirmation = [':partying_face:', ':unicorn:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
-        mischievious = [':zany_face:', ':stuck_out_tongue_winking_eye:', ':clown:', ':snake:', ':full_moon_with_face:',
-                        ':star2:', ':sparkles:', ':tropical_drink:', ':fork_knife_plate:', ':joystick:']
-        flirting = [':sweat:', ':eggplant:', ':fire:', ':hot_face:', ':triumph:', ':heart_eyes:', ':kissing_heart:', 
-                    ':revolving_hearts:', ':sparkling_heart:', ':shushing_face:', ':wink:', ':yum:', ':smiling_imp:', 
-                    ':fingers_crossed:', ':pray:', ':takeout_box:', ':peach:', ':beers:', ':clinking_glass:', ':fireworks:', 
-                    ':closed_lock_with_key:', ':bangbang:', ':cupid:', ':love_letter:', ':spoon:', ':banana:', ':hot_pepper:']
-        disgust = [':face_with_monocle:', ':scream:', ':cold_sweat:', ':receipt:', ':thinking:', ':upside_down:', 
-                   ':sick:', ':face_vomiting:', ':ghost:', ':clown:', ':no_good:', ':facepalm:', ':thunder_cloud_rain:'
-                   ':sos:', ':no_entry:', ':previous_track:', ':twisted_rightwards_arrows:', ':no_bell:']
-        threat = [':receipt:', ':upside_down:', ':syringe:', ':gun:', ':safety_pin:', ':anger:', ':warning:', 
-                  ':scissors:', ':broom:', ':knife:', ':dagger:', ':axe:', ':firecracker:', ':hourglass:', 
-                  ':timer:', ':oncoming_police_car:', ':ambulance:', ':wrestling:', ':boxing_glove:', ':boom:', ':snake:',
-                  ':b:', ':tooth:', ':angry:', ':rage:', ':triumph:', ':face_with_symbols_over_mouth:']
-        rrandom = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:', 
-                  ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:', 
-                  ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:', ':receipt:', 
-                  ':upside_down:', ':face_with_monocle:', ':thinking:', ':wink:', ':shushing_face:', ':unicorn:',
-                  ':dancer:', ':+1:', ':woozy_face:', ':smiling_imp:', ':clown:', ':fist:', ':raised_hands:',
-                  ':haircut:', ':drum:', ':exploding_head:', ':liar:', ':grimacing:', ':sleepy:', ':clap:']
-        if (message.content.lower().find('love') != -1 or message.content.lower().find('like') != -1 )and message.content.lower().find('i') != -1:
-            await message.channel.send(f'{random.choice(affection)}')
-        elif (message.content.lower().find('wanna') != -1 or message.content.lower().find('want') != -1):
-            if message.author.name == 'Oreo9238':
-                await message.channel.send(f'{random.choice(flirting)}')
-            elif message.author.name == 'nutrishous':
-                await message.channel.send(f'{random.choice(disgust)}')
-            else:
-                await message.channel.send(f'{random.choice(validation)}')
-        elif message.content.lower().find('hi') != -1 or message.content.lower().find('hello') != -1 or message.content.lower().find('bye') != -1:
-            await message.channel.send(f'{random.choice(greeting)}')
-        elif message.content.lower().find('live') != -1 or message.content.lower().find('die') != -1 or message.content.lower().find('kill') != -1 or message.content.lower().find('savage') != -1 or message.content.lower().find('fight') != -1 or message.content.lower().find('uck') != -1:
-            await message.channel.send(f'{random.choice(threat)}')
-        elif message.content.lower().find('are you') != -1 or message.content.lower().find('r you') != -1 or message.content.lower().find('r u') != -1 or message.content.lower().find('are u') != -1:
-            if message.author.name == 'Oreo9238':
-                await message.channel.send(f'{random.choice(flirting)}')
-            elif message.author.name == 'nutrishous':
-                await message.channel.send(f'{random.choice(disgust)}')
-            else:
-                await message.channel.send(f'{random.choice(confirmation)}')
-        elif message.content.lower().find('cute') != -1 or message.content.lower().find('sexy') != -1:
-            if message.author.name == 'Oreo9238':
-                await message.channel.send(f'{random.choice(flirting)}')
-            elif message.author.name == 'nutrishous':
-                await message.channel.send(f'{random.choice(disgust)}')
-            else:
-                await message.channel.send(f'{random.choice(affection)}')
-        elif message.content.lower().find('why') != -1 or message.content.lower().find('y ') != -1:
-            await message.channel.send(f'{random.choice(mischievious)}')
+
+def get_routed_worker(message):
+    """Returns the worker to forward a command to, or None to run it here: always without shards, and for a DM
+    unless another worker claimed its author."""
+    if router == None or message.guild != None or games.get_game_from_member(message.author) != None:
+        return None
+    worker_index = router.get_owner(message.author.id)
+    if worker_index == router.worker_index:
+        return None
+    return worker_index
+
+async def restore_games():
+    """Restores and resumes every game that was ongoing when the bot last stopped. Each worker of shards.py only
+    finds the general channels, and so restores the games, of the guilds on its shards."""
+    if snapshots == None:
+        return
+    for snapshot in await snapshots.load_all():
+        general_channel = dispatcher.transport.get_channel(snapshot['general_channel_id'])
+        if general_channel == None or games.get_game_from_channel(general_channel) != None:
+            continue
+        game = Game(general_channel.guild, client, general_channel, snapshot['player_id_nums'], [], [], dispatcher,
+                    snapshots=snapshots, game_logs=game_logs, scheduler=scheduler, use_buttons=INTERACTION_MODE,
+                    on_end=games.remove_game)
+        games.add_game(game)
+        try:
+            await game.restore(snapshot)
+        except Exception as error:
+            games.remove_game(game)
+            print(f'Could not restore the game in channel {snapshot["general_channel_id"]}: {error}')
+            continue
+        game.submit(game.resume)
+
+def get_game(ctx):
+    """Finds the game a command is meant for: the game in the command's channel, or else the author's game."""
+    game = games.get_game_from_channel(ctx.channel)
+    if game == None:
+        game = games.get_game_from_member(ctx.author)
+    return game
+
+def get_author_player(game, ctx):
+    """Returns the player who sent a command, or None if there is no game or they are not playing in it."""
+    if game == None:
+        return None
+    return game.get_player_from_member(ctx.author)
+
+def get_named_player(game, name):
+    """Returns the player a command names, or None if there is no game or the name matches no single player."""
+    if game == None:
+        return None
+    return game.get_player_from_name(name)
+
+def get_named_players(game, player_names):
+    """Returns the player named by each space-separated name, or None if any name matches no single player."""
+    named_players = []
+    for temp_name in player_names.split():
+        temp_player = game.get_player_from_name(temp_name)
+        if temp_player == None:
+            return None
+        named_players.append(temp_player)
+    return named_players
+
+def get_action_timeout():
+    """Returns how many seconds a player has to perform their action, or None to wait until an admin uses `>>skip_action`."""
+    if ACTION_TIMEOUT == None:
+        return None
+    return float(ACTION_TIMEOUT)
+
+def get_phase_timeouts():
+    """Returns how many seconds each phase may last before Lychee resolves it, by phase name, for the phases with a
+    timeout set."""
+    phase_timeouts = {}
+    for phase, timeout in [('team_building', TEAM_BUILDING_TIMEOUT), ('vote', VOTE_TIMEOUT), ('mission', MISSION_TIMEOUT)]:
+        if timeout != None:
+            phase_timeouts[phase] = float(timeout)
+    return phase_timeouts
+
+async def start_game(ctx, game):
+    """Registers and starts a game unless its channel or any of its players are already in an ongoing game.
+
+    Returns
+    -------
+    bool
+        Whether the game was started
+    """
+    if games.get_game_from_channel(ctx.channel) != None:
+        await ctx.send('Sorry, there is currently an ongoing game in this channel.')
+        return False
+    if len(games.get_busy_id_nums(game.player_id_nums)) != 0:
+        await ctx.send('Sorry, some of those players are already in an ongoing game.')
+        return False
+    games.add_game(game)
+    try:
+        await game.finish_initialization()
+    except (Missing_Member_Error, Closed_DM_Error) as error:
+        games.remove_game(game)
+        await ctx.send(f'Sorry, {error}.')
+        return False
+    except Exception:
+        games.remove_game(game)
+        raise
+    return True
+
+def parse_player_mentions(player_mentions):
+    """Returns the id of every mentioned player in the order they were mentioned, or None unless every word is a
+    member mention. The members themselves come from the message's mentions, which Discord sends with the message."""
+    player_id_nums = []
+    for temp_mention in player_mentions.split():
+        if temp_mention.startswith('<@!'):
+            temp_id_num = temp_mention[3:-1]
         else:
-            await message.channel.send(f'{random.choice(rrandom)}')
-        
-game = None
-general_channel = None
+            temp_id_num = temp_mention[2:-1]
+        if temp_mention.startswith('<@') == False or temp_mention[-1:] != '>' or not temp_id_num.isdigit():
+            return None
+        player_id_nums.append(int(temp_id_num))
+    return player_id_nums
 
 @client.command(help='Starts a game')
 @commands.has_role('Admin')
+@timed_command
 async def vanilla(ctx, *, player_mentions):
-    global game
-    global general_channel
-    # check for ongoing game
-    if game == None or game.completed == True:
-        # check that the string actually contains individual mentions then convert to ID numbers
-        temp_player_mentions = player_mentions.split()
-        player_id_nums = []
-        for temp_mention in temp_player_mentions:
-            if temp_mention.startswith('<@') == False or temp_mention[-1:] != '>':
-                await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
-                return
-            else:
-                temp_id_num = temp_mention[:-1]
-                if temp_id_num.startswith('<@!'):
-                    temp_id_num = temp_id_num[3:]
-                else:
-                    temp_id_num = temp_id_num[2:]
-                player_id_nums.append(int(temp_id_num))
-        # get current guild
-        for temp_guild in client.guilds:
-            if temp_guild.name == GUILD:
-                guild = temp_guild
-                break
-        general_channel = ctx.channel
-        game = Game(guild, client, general_channel, player_id_nums, ['Resistance', 'Resistance', 'Resistance', 'Resistance', 'Resistance', 'Resistance'],
-                                                                    ['Spy', 'Spy', 'Spy', 'Spy'])
-        await game.finish_initialization()
-        game.stop_night_actions()
-        await client.change_presence(status=discord.Status.online, activity=discord.Game(f'Round 1!'))
-    else:
-        await ctx.send('Sorry, there is currently an ongoing game.')
+    player_id_nums = parse_player_mentions(player_mentions)
+    if player_id_nums == None:
+        await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
+        return
+    # get current guild
+    guild = ctx.guild
+    all_resistance_roles, all_spy_roles = get_vanilla_roles(len(player_id_nums))
+    game = Game(guild, client, ctx.channel, player_id_nums, all_resistance_roles, all_spy_roles, dispatcher,
+                default_action_timeout=get_action_timeout(), snapshots=snapshots, game_logs=game_logs,
+                mentioned_members=ctx.message.mentions, scheduler=scheduler, phase_timeouts=get_phase_timeouts(),
+                use_buttons=INTERACTION_MODE, on_end=games.remove_game)
+    game.stop_night_actions()
+    await start_game(ctx, game)
 
 @client.command(help='Starts a game')
 @commands.has_role('Admin')
+@timed_command
 async def commander(ctx, *, player_mentions):
-    global game
-    global general_channel
-    # check for ongoing game
-    if game == None or game.completed == True:
-        # check that the string actually contains individual mentions then convert to ID numbers
-        temp_player_mentions = player_mentions.split()
-        player_id_nums = []
-        for temp_mention in temp_player_mentions:
-            if temp_mention.startswith('<@') == False or temp_mention[-1:] != '>':
-                await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
-                return
-            else:
-                temp_id_num = temp_mention[:-1]
-                if temp_id_num.startswith('<@!'):
-                    temp_id_num = temp_id_num[3:]
-                else:
-                    temp_id_num = temp_id_num[2:]
-                player_id_nums.append(int(temp_id_num))
-        # get current guild
-        for temp_guild in client.guilds:
-            if temp_guild.name == GUILD:
-                guild = temp_guild
-                break
-        general_channel = ctx.channel
-        # create role lists
-        all_resistance_roles = ['Commander', 'Bodyguard', 'Resistance']
-        all_spy_roles = ['Assassin', 'False Commander']
-        while (len(all_resistance_roles) + len(all_spy_roles)) < len(player_id_nums):
-            if (len(all_resistance_roles) + len(all_spy_roles)) % 2 == 1:
-                all_resistance_roles.append('Resistance')
-            else:
-                all_spy_roles.append('Spy')
-        game = Game(guild, client, general_channel, player_id_nums, all_resistance_roles, all_spy_roles)
-        await game.finish_initialization()
-        game.stop_night_actions()
-        await client.change_presence(status=discord.Status.online, activity=discord.Game(f'Round 1!'))
-    else:
-        await ctx.send('Sorry, there is currently an ongoing game.')
+    player_id_nums = parse_player_mentions(player_mentions)
+    if player_id_nums == None:
+        await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
+        return
+    # get current guild
+    guild = ctx.guild
+    # create role lists
+    all_resistance_roles, all_spy_roles = get_commander_roles(len(player_id_nums))
+    game = Game(guild, client, ctx.channel, player_id_nums, all_resistance_roles, all_spy_roles, dispatcher,
+                default_action_timeout=get_action_timeout(), snapshots=snapshots, game_logs=game_logs,
+                mentioned_members=ctx.message.mentions, scheduler=scheduler, phase_timeouts=get_phase_timeouts(),
+                use_buttons=INTERACTION_MODE, on_end=games.remove_game)
+    game.stop_night_actions()
+    await start_game(ctx, game)
 
 @client.command(help='Starts a game')
 @commands.has_role('Admin')
+@timed_command
 async def party(ctx, *, player_mentions):
-    global game
-    global general_channel
-    # check for ongoing game
-    if game == None or game.completed == True:
-        # check that the string actually contains individual mentions then convert to ID numbers
-        temp_player_mentions = player_mentions.split()
-        player_id_nums = []
-        for temp_mention in temp_player_mentions:
-            if temp_mention.startswith('<@') == False or temp_mention[-1:] != '>':
-                await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
-                return
-            else:
-                temp_id_num = temp_mention[:-1]
-                if temp_id_num.startswith('<@!'):
-                    temp_id_num = temp_id_num[3:]
-                else:
-                    temp_id_num = temp_id_num[2:]
-                player_id_nums.append(int(temp_id_num))
-        # get current guild
-        for temp_guild in client.guilds:
-            if temp_guild.name == GUILD:
-                guild = temp_guild
-                break
-        general_channel = ctx.channel
-        game = Game(guild, client, general_channel, player_id_nums, ['President', 'Officer', 'Gambler', 'Psychic', 'Witch', 'Freelancer', 'Informant',
-                                                                     'Resistance Reverser', 'Professor', 'Resistance Clown', 'Traditionalist', 'Librarian'],
-                                                                    ['Organizer', 'Martyr', 'Bomber', 'Angel', 'Spy Reverser', 'Silencer', 'Victimizer',
-                                                                     'Spy Clown', 'Timekeeper', 'Mad Scientist'])
-        await game.finish_initialization()
-        await client.change_presence(status=discord.Status.online, activity=discord.Game(f'Round 1!'))
-    else:
-        await ctx.send('Sorry, there is currently an ongoing game.')
+    player_id_nums = parse_player_mentions(player_mentions)
+    if player_id_nums == None:
+        await ctx.send('Please mention the players you want in this game. Be sure to seperate each mention with a space!')
+        return
+    guild = ctx.guild
+    all_resistance_roles, all_spy_roles = get_party_roles(len(player_id_nums))
+    game = Game(guild, client, ctx.channel, player_id_nums, all_resistance_roles, all_spy_roles, dispatcher,
+                default_action_timeout=get_action_timeout(), snapshots=snapshots, game_logs=game_logs,
+                mentioned_members=ctx.message.mentions, scheduler=scheduler, phase_timeouts=get_phase_timeouts(),
+                use_buttons=INTERACTION_MODE, on_end=games.remove_game)
+    await start_game(ctx, game)
 
 @client.command(help='Proposes a team')
+@timed_command
 async def team(ctx, *, team_player_names):
     """Proposes a team.
 
@@ -217,8 +365,7 @@ async def team(ctx, *, team_player_names):
     team_player_names : str
         A list of each person's name that you want on the team
     """
-    global game
-    global general_channel
+    game = get_game(ctx)
     # check that all conditions are met
     if game == None:
         await ctx.send('Sorry, there is no ongoing game.')
@@ -226,28 +373,26 @@ async def team(ctx, *, team_player_names):
         await ctx.send('Sorry, it is not the team building phase.')
     elif not game.is_team_leader(ctx.author):
         await ctx.send('Sorry, you are not the current team leader.')
-    elif ctx.channel != general_channel:
+    elif ctx.channel != game.general_channel:
         await ctx.send('Please use `>>team` in the main channel.')
     else:
         # check that the string actually contains player names
-        temp_player_names = team_player_names.split()
-        for temp_name in temp_player_names:
-            if game.is_player(temp_name) == False:
-                await ctx.send('Please name the players you want on this team. Be sure to separate each name with a space!')
-                return
-        if len(temp_player_names) != int(game.round_tracker.get_team_size()):
+        team_players = get_named_players(game, team_player_names)
+        if team_players == None:
+            await ctx.send('Please name the players you want on this team. Be sure to separate each name with a space!')
+            return
+        if len(team_players) != int(game.round_tracker.get_team_size()):
             await ctx.send(f'Sorry, this team requires {int(game.round_tracker.get_team_size())} players!')
             return
-        for temp_name in temp_player_names:
-            temp_player = game.get_player_from_name(temp_name)
+        for temp_player in team_players:
             if temp_player.can_be_on_current_mission == False:
                 await ctx.send(f'Sorry, a player you have added to your team cannot be on any team this round.')
                 return
-        await client.change_presence(activity=discord.Game(f'Round {game.round_tracker.get_round()} Voting!'))
-        await game.start_vote(temp_player_names)
+        game.submit(game.propose_team, team_players)
 
 @client.command(help='Proposes a team')
 @commands.has_role('Admin')
+@timed_command
 async def team_override(ctx, *, team_player_names):
     """Proposes a team but circumvents the team leader condition.
 
@@ -256,115 +401,108 @@ async def team_override(ctx, *, team_player_names):
     team_player_names : str
         A list of each person's name that you want on the team
     """
-    global game
-    global general_channel
+    game = get_game(ctx)
     # check that all conditions are met
     if game == None:
         await ctx.send('Sorry, there is no ongoing game.')
     elif game.current_window != 0:
         await ctx.send('Sorry, it is not the team building phase.')
-    elif ctx.channel != general_channel:
+    elif ctx.channel != game.general_channel:
         await ctx.send('Please use `>>team_overrid` in the main channel.')
     else:
         # check that the string actually contains player names
-        temp_player_names = team_player_names.split()
-        for temp_name in temp_player_names:
-            if game.is_player(temp_name) == False:
-                await ctx.send('Please name the players you want on this team. Be sure to separate each name with a space!')
-                return
-        if len(temp_player_names) != int(game.round_tracker.get_team_size()):
+        team_players = get_named_players(game, team_player_names)
+        if team_players == None:
+            await ctx.send('Please name the players you want on this team. Be sure to separate each name with a space!')
+            return
+        if len(team_players) != int(game.round_tracker.get_team_size()):
             await ctx.send(f'Sorry, this team requires {int(game.round_tracker.get_team_size())} players!')
             return
-        for temp_name in temp_player_names:
-            temp_player = game.get_player_from_name(temp_name)
+        for temp_player in team_players:
             if temp_player.can_be_on_current_mission == False:
                 await ctx.send(f'Sorry, a player you have added to your team cannot be on any team this round.')
                 return
-        await client.change_presence(activity=discord.Game(f'Round {game.round_tracker.get_round()} Voting!'))
-        await game.start_vote(temp_player_names)
+        game.submit(game.propose_team, team_players)
 
 @client.command(help='Skips a team leader')
 @commands.has_role('Admin')
+@timed_command
 async def next_leader(ctx):
-    global game
-    global general_channel
+    game = get_game(ctx)
     # check that all conditions are met
     if game == None:
         await ctx.send('Sorry, there is no ongoing game.')
     elif game.current_window != 0:
         await ctx.send('Sorry, it is not the team building phase.')
     else:
-        game.next_team_leader()
-        await ctx.send(f'The new team leader is {game.player_names[game.team_leader_index]}.')
+        game.submit(game.pass_team_leader, ctx.send)
     
 @client.command(help='Submits a vote: accept or reject')
+@timed_command
 async def vote(ctx, vote):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
     # check that all conditions are met
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 1:
         await ctx.send('Sorry, it is not the voting phase.')
-    elif game.get_player_from_member(ctx.author).voted:
+    elif temp_player.voted:
         await ctx.send('Sorry, you have already voted.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>vote` in your private messages with me.')
     elif 'accept'.startswith(vote.lower()) or vote.lower().startswith('accept'):
-        await general_channel.send(f'{game.get_player_from_member(ctx.author).name} has voted.')
-        await game.voter.record_vote(game.get_player_from_member(ctx.author), 0)
+        game.submit(game.cast_vote, temp_player, 0)
     elif 'reject'.startswith(vote.lower()) or vote.lower().startswith('reject'):
-        await general_channel.send(f'{game.get_player_from_member(ctx.author).name} has voted.')
-        await game.voter.record_vote(game.get_player_from_member(ctx.author), 1)
+        game.submit(game.cast_vote, temp_player, 1)
     else:
         await ctx.send('Please either `>>vote accept` or `>>vote reject`.')
 
 @client.command(help='Ends the current vote')
 @commands.has_role('Admin')
+@timed_command
 async def end_vote(ctx):
-    global game
-    global general_channel
+    game = get_game(ctx)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
     elif game.current_window != 1:
         await ctx.send('Sorry, it is not the voting phase.')
     else:
-        for temp_player in game.players:
-            if temp_player.voted == False:
-                await game.voter.record_vote(temp_player, 0)
-                await general_channel.send(f'{temp_player.name} has voted.')
+        game.submit(game.finish_vote)
 
 @client.command(help='Conducts a mission: success, fail, or switch')
+@timed_command
 async def mission(ctx, card):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
     # check that all condiitons are met
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 2:
         await ctx.send('Sorry, it is not the mission conducting phase.')
-    elif not game.get_player_from_member(ctx.author).on_current_team:
+    elif not temp_player.on_current_team:
         await ctx.send('Sorry, you are not on the current team.')
-    elif game.get_player_from_member(ctx.author).completed_mission:
+    elif temp_player.completed_mission:
         await ctx.send('Sorry, you have already submitted.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>mission` in you private messages with me.')
     elif 'success'.startswith(card.lower()) or card.lower().startswith('success'):
-        if game.get_player_from_member(ctx.author).possible_mission_cards[0]:
-            await general_channel.send(f'{game.get_player_from_member(ctx.author).name} has submitted for the mission.')
-            await game.missioner.record_mission_card(game.get_player_from_member(ctx.author), 0) 
+        if temp_player.can_play(SUCCESS):
+            game.submit(game.play_mission_card, temp_player, SUCCESS)
         else:
             await ctx.send('Sorry, you currently cannot `>>mission success`.')
     elif 'fail'.startswith(card.lower()) or card.lower().startswith('fail'):
-        if game.get_player_from_member(ctx.author).possible_mission_cards[1]:
-            await general_channel.send(f'{game.get_player_from_member(ctx.author).name} has submitted for the mission.')
-            await game.missioner.record_mission_card(game.get_player_from_member(ctx.author), 1)
+        if temp_player.can_play(FAIL):
+            game.submit(game.play_mission_card, temp_player, FAIL)
         else:
             await ctx.send('Sorry, you currently cannot `>>mission fail`.')
     elif 'switch'.startswith(card.lower()) or card.lower().startswith('switch'):
-        if game.get_player_from_member(ctx.author).possible_mission_cards[2]:
-            await general_channel.send(f'{game.get_player_from_member(ctx.author).name} has submitted for the mission.')
-            await game.missioner.record_mission_card(game.get_player_from_member(ctx.author), 2)
+        if temp_player.can_play(SWITCH):
+            game.submit(game.play_mission_card, temp_player, SWITCH)
         else:
             await ctx.send('Sorry, you currently cannot `>>mission switch`.')
     else:
@@ -372,237 +510,270 @@ async def mission(ctx, card):
 
 @client.command(help='Ends the current mission')
 @commands.has_role('Admin')
+@timed_command
 async def end_mission(ctx):
-    global game
-    global general_channel
+    game = get_game(ctx)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
     elif game.current_window != 2:
         await ctx.send('Sorry, it is not the mission conducting phase.')
     else:
-        for temp_player in game.players:
-            if temp_player.on_current_team == True and temp_player.completed_mission == False:
-                if temp_player.alignment == 'Resistance':
-                    if temp_player.possible_mission_cards[0]:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 0)
-                    elif temp_player.possible_mission_cards[2]:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 2)
-                    else:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 1)
-                else:
-                    if temp_player.possible_mission_cards[1]:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 1)
-                    elif temp_player.possible_mission_cards[2]:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 2)
-                    else:
-                        await general_channel.send(f'{temp_player.name} has submitted for the mission.')
-                        await game.missioner.record_mission_card(temp_player, 0)
+        game.submit(game.finish_mission)
 
 @client.command(help='Assassinates a player', hidden=True)
+@timed_command
 async def assassinate(ctx, assassinated_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, assassinated_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
-    elif game.get_player_from_member(ctx.author).role != 'Assassin':
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
+    elif temp_player.role != 'Assassin':
         await ctx.send('Sorry, you are not the Assassin.')
-    elif ctx.channel != general_channel:
+    elif ctx.channel != game.general_channel:
         await ctx.send('Please use `>>assassinate` in the main channel.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, it is not the end of game action phase.')
-    elif game.is_player(assassinated_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to assassinate.')
     else:
-        await game.get_player_from_member(ctx.author).do_assassination(game.get_player_from_name(assassinated_player))
+        game.submit(game.assassinate, temp_player, temp_target)
 
 @client.command(help='Gambles two players are not both Spies', hidden=True)
+@timed_command
 async def gamble(ctx, *, gambled_player_names):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Gambler':
+    elif temp_player.role != 'Gambler':
         await ctx.send('Sorry, you are not the Gambler.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>gamble` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already gambled this round or have not yet been prompted to gamble.')
     else:
         # check that the string actually contains player names
-        temp_player_names = gambled_player_names.split()
-        for temp_name in temp_player_names:
-            if game.is_player(temp_name) == False:
-                await ctx.send('Please name the players you want to gamble on. Be sure to separate the names with a space!')
-                return
-        if len(temp_player_names) != 2:
+        gambled_players = get_named_players(game, gambled_player_names)
+        if gambled_players == None:
+            await ctx.send('Please name the players you want to gamble on. Be sure to separate the names with a space!')
+        elif len(gambled_players) != 2:
             await ctx.send('Sorry, you must gamble on 2 players!')
-        elif (game.get_player_from_member(ctx.author).name in temp_player_names):
+        elif (temp_player in gambled_players):
             await ctx.send('Sorry, you cannot gamble on yourself.')
-        elif temp_player_names[0] == temp_player_names[1]:
+        elif gambled_players[0] == gambled_players[1]:
             await ctx.send('Please pick two different people.')
         else: 
-            gambled_players = []
-            gambled_players.append(game.get_player_from_name(temp_player_names[0]))
-            gambled_players.append(game.get_player_from_name(temp_player_names[1]))
-            await game.get_player_from_member(ctx.author).do_gamble(gambled_players)
+            temp_player.submit_action(temp_player.do_gamble, gambled_players)
+            await temp_player.confirm('Thank you for your `>>gamble`.')
 
 @client.command(help='Arrests a player', hidden=True)
+@timed_command
 async def arrest(ctx, arrested_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, arrested_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Officer':
+    elif temp_player.role != 'Officer':
         await ctx.send('Sorry, you are not the Officer.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>arrest` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already arrested this round or have not yet been prompted to arrest.')
-    elif game.is_player(arrested_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to arrest.')
-    elif (game.get_player_from_name(arrested_player) in game.get_player_from_member(ctx.author).past_targets):
+    elif (temp_target in temp_player.past_targets):
         await ctx.send('Sorry, you have already targeted that player before. Please target someone new.')
     else: 
-        await game.get_player_from_member(ctx.author).do_arrest(game.get_player_from_name(arrested_player))
+        temp_player.submit_action(temp_player.do_arrest, temp_target)
+        await temp_player.confirm('Thank you for your `>>arrest`.')
         
 @client.command(help='Sees a player\'s alignment', hidden=True)
+@timed_command
 async def see(ctx, seen_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, seen_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).believed_role != 'Psychic':
+    elif temp_player.believed_role != 'Psychic':
         await ctx.send('Sorry, you are not the Psychic.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>see` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already seen this round or have not yet been prompted to see.')
-    elif game.is_player(seen_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to see.')
-    elif (game.get_player_from_name(seen_player) in game.get_player_from_member(ctx.author).past_targets):
+    elif (temp_target in temp_player.past_targets):
         await ctx.send('Sorry, the player you picked is an invalid target. Please target someone different.')
     else:
-        await game.get_player_from_member(ctx.author).do_see(game.get_player_from_name(seen_player))
+        temp_player.submit_action(temp_player.do_see, temp_target)
+        await temp_player.confirm('Thank you for your `>>see`.')
 
 @client.command(help='Freelances for spies', hidden=True)
+@timed_command
 async def freelance(ctx, freelanced_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, freelanced_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Freelancer':
+    elif temp_player.role != 'Freelancer':
         await ctx.send('Sorry, you are not the Freelancer.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>freelance` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already seen this round or have not yet been prompted to freelance.')
-    elif game.is_player(freelanced_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to freelance.')
-    elif (game.get_player_from_name(freelanced_player) in game.get_player_from_member(ctx.author).past_targets):
+    elif (temp_target in temp_player.past_targets):
         await ctx.send('Sorry, the player you picked is an invalid target. Please target someone different.')
     else:
-        await game.get_player_from_member(ctx.author).do_freelance(game.get_player_from_name(freelanced_player))
+        temp_player.submit_action(temp_player.do_freelance, temp_target)
+        await temp_player.confirm('Thank you for your `>>freelance`.')
 
 @client.command(help='Teaches a player to `>>mission switch`', hidden=True)
+@timed_command
 async def teach(ctx, taught_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, taught_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Professor':
+    elif temp_player.role != 'Professor':
         await ctx.send('Sorry, you are not the Professor.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>teach` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already seen this round or have not yet been prompted to teach.')
-    elif game.is_player(taught_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to teach.')
-    elif (game.get_player_from_name(taught_player) in game.get_player_from_member(ctx.author).past_targets):
+    elif (temp_target in temp_player.past_targets):
         await ctx.send('Sorry, the player you picked is an invalid target. Please target someone different.')
     else:
-        await game.get_player_from_member(ctx.author).do_teach(game.get_player_from_name(taught_player))
+        temp_player.submit_action(temp_player.do_teach, temp_target)
+        await temp_player.confirm('Thank you for your `>>teach`.')
 
 @client.command(help='Teaches a player to `>>mission switch` but blocks `>>mission success`', hidden=True)
+@timed_command
 async def experiment(ctx, experimented_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, experimented_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Mad Scientist':
+    elif temp_player.role != 'Mad Scientist':
         await ctx.send('Sorry, you are not the Mad Scientist.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>experiment` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already seen this round or have not yet been prompted to experiment.')
-    elif game.is_player(experimented_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to experiment.')
     else:
-        await game.get_player_from_member(ctx.author).do_experiment(game.get_player_from_name(experimented_player))
+        temp_player.submit_action(temp_player.do_experiment, temp_target)
+        await temp_player.confirm('Thank you for your `>>experiment`.')
 
 @client.command(help='Silences a player', hidden=True)
+@timed_command
 async def silence(ctx, silenced_player):
-    global game
-    global general_channel
+    game = get_game(ctx)
+    temp_player = get_author_player(game, ctx)
+    temp_target = get_named_player(game, silenced_player)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif temp_player == None:
+        await ctx.send('Sorry, you are not in this game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the end of round action phase.')
-    elif game.get_player_from_member(ctx.author).role != 'Librarian' and game.get_player_from_member(ctx.author).role != 'Silencer':
+    elif temp_player.role != 'Librarian' and temp_player.role != 'Silencer':
         await ctx.send('Sorry, you are not the Librarian or the Silencer.')
-    elif ctx.channel == general_channel:
+    elif ctx.channel == game.general_channel:
         await ctx.send('Please use `>>silence` in your private messages with me.')
-    elif game.get_player_from_member(ctx.author).has_action == False:
+    elif temp_player.has_action == False:
         await ctx.send('Sorry, you have already seen this round or have not yet been prompted to silence.')
-    elif game.is_player(silenced_player) == False:
+    elif temp_target == None:
         await ctx.send('Please name the player you want to silence.')
     else:
-        await game.get_player_from_member(ctx.author).do_silence(game.get_player_from_name(silenced_player))
+        temp_player.submit_action(temp_player.do_silence, temp_target)
+        await temp_player.confirm('Thank you for your `>>silence`.')
 
 @client.command(help='Skips the current action')
 @commands.has_role('Admin')
+@timed_command
 async def skip_action(ctx):
+    game = get_game(ctx)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
     elif game.current_window != 3:
         await ctx.send('Sorry, it is not the action phase.')
     else:
-        game.skip_night_action = True
+        game.skip_action()
         await ctx.send('Action skipped!')
 
 @client.command(help='Ends the game')
 @commands.has_role('Admin')
+@timed_command
 async def end_game(ctx):
+    game = get_game(ctx)
     if game == None or game.completed == True:
         await ctx.send('Sorry, there is no ongoing game.')
+    elif game.is_held_up():
+        await game.end_game()
     else:
-        game.success_count = 3
-        await game.check_end_game()
+        game.submit(game.end_game)
 
 @client.command(help='Clears all pins')
 @commands.has_role('Admin')
+@timed_command
 async def clear_pins(ctx):
     await ctx.send('Please wait.')
-    messages = await ctx.pins()
-    for message in messages:
-        if message.author.bot == True:
-            await message.unpin()
+    game = games.get_game_from_channel(ctx.channel)
+    if game != None:
+        # an ongoing game already knows every message it has pinned
+        await game.unpin_all()
+    else:
+        messages = await ctx.pins()
+        bot_message_ids = []
+        for message in messages:
+            if message.author.bot == True:
+                bot_message_ids.append(message.id)
+        await unpin_messages(dispatcher, ctx.channel, bot_message_ids)
     await ctx.send('All pins have been cleared!')
 
-client.run(TOKEN)
+@client.command(help='Shows how long commands take and how many requests have been made to Discord')
+@commands.has_role('Admin')
+@timed_command
+async def stats(ctx):
+    # Discord messages are limited to 2000 characters
+    await ctx.send(f'```\n{default_metrics.summarize()[:1980]}\n```')
+
+if __name__ == '__main__':
+    client.run(TOKEN)
@@ -0,0 +1,174 @@
+import asyncio
+import bisect
+import functools
+import time
+
+# Upper bounds in seconds of the histogram buckets; the last bucket, +Inf, is implied
+BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0]
+
+DESCRIPTIONS = {'lychee_command_seconds': 'Time spent in each command handler',
+                'lychee_phase_seconds': 'Time spent in each game phase method',
+                'lychee_requests_total': 'Requests made to Discord for each route',
+                'lychee_rate_limits_total': 'Rate limits hit for each route',
+                'lychee_dropped_events_total': 'Gateway events of each kind dropped by lean mode before parsing',
+                'lychee_shed_requests_total': 'Cosmetic requests dropped for each route under rate limit pressure',
+                'lychee_coalesced_confirmations_total': 'Confirmations joined into an earlier waiting confirmation'}
+
+class Histogram():
+
+    """Counts observations into fixed buckets, the way Prometheus histograms do.
+
+    Attributes
+    ----------
+    bucket_counts : List[int]
+        How many observations fell into each bucket of BUCKETS, and into +Inf last
+    count : int
+        How many observations there have been
+    total : float
+        The sum of every observation
+    """
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1) # List[int]
+        self.count = 0 # int
+        self.total = 0.0 # float
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def get_quantile_bound(self, quantile):
+        """Returns the upper bound of the bucket holding the given quantile, or None if it is in +Inf."""
+        rank = quantile * self.count
+        running_count = 0
+        for x in range(len(BUCKETS)):
+            running_count += self.bucket_counts[x]
+            if running_count >= rank:
+                return BUCKETS[x]
+        return None
+
+class Metrics():
+
+    """Stores every histogram and counter, each keyed by a metric name and a single label.
+
+    Recording only updates a few numbers in place; text is only built when the metrics are scraped or shown.
+
+    Attributes
+    ----------
+    histograms : Dict[Tuple[str, str, str], Histogram]
+        Each histogram keyed by metric name, label name and label value
+    counters : Dict[Tuple[str, str, str], int]
+        Each counter keyed by metric name, label name and label value
+    """
+
+    def __init__(self):
+        self.histograms = {} # Dict[Tuple[str, str, str], Histogram]
+        self.counters = {} # Dict[Tuple[str, str, str], int]
+
+    def get_histogram(self, name, label_name, label_value):
+        key = (name, label_name, label_value)
+        histogram = self.histograms.get(key)
+        if histogram == None:
+            histogram = Histogram()
+            self.histograms[key] = histogram
+        return histogram
+
+    def increment(self, name, label_name, label_value, amount=1):
+        key = (name, label_name, label_value)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for name in sorted(set(key[0] for key in self.histograms)):
+            lines.append(f'# HELP {name} {DESCRIPTIONS.get(name, name)}')
+            lines.append(f'# TYPE {name} histogram')
+            for (temp_name, label_name, label_value), histogram in sorted(self.histograms.items()):
+                if temp_name != name:
+                    continue
+                running_count = 0
+                for bound, bucket_count in zip(BUCKETS + ['+Inf'], histogram.bucket_counts):
+                    running_count += bucket_count
+                    lines.append(f'{name}_bucket{{{label_name}="{label_value}",le="{bound}"}} {running_count}')
+                lines.append(f'{name}_sum{{{label_name}="{label_value}"}} {histogram.total}')
+                lines.append(f'{name}_count{{{label_name}="{label_value}"}} {histogram.count}')
+        for name in sorted(set(key[0] for key in self.counters)):
+            lines.append(f'# HELP {name} {DESCRIPTIONS.get(name, name)}')
+            lines.append(f'# TYPE {name} counter')
+            for (temp_name, label_name, label_value), count in sorted(self.counters.items()):
+                if temp_name == name:
+                    lines.append(f'{name}{{{label_name}="{label_value}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def summarize(self):
+        """Returns a short summary of every metric for the `>>stats` command."""
+        lines = []
+        for (name, label_name, label_value), histogram in sorted(self.histograms.items()):
+            if histogram.count == 0:
+                continue
+            p95 = histogram.get_quantile_bound(0.95)
+            p95 = 'over 300 s' if p95 == None else f'≤ {p95 * 1000:g} ms'
+            lines.append(f'{label_value}: {histogram.count} calls, mean {histogram.total / histogram.count * 1000:.1f} ms, p95 {p95}')
+        for (name, label_name, label_value), count in sorted(self.counters.items()):
+            lines.append(f'{name} {label_value}: {count}')
+        if len(lines) == 0:
+            return 'Nothing has been recorded yet.'
+        return '\n'.join(lines)
+
+default_metrics = Metrics()
+
+def timed(name, label_name, metrics=default_metrics):
+    """Records how long every call to an async function takes, labelled with the function's name.
+
+    Parameters
+    ----------
+    name : str
+        The name of the histogram
+    label_name : str
+        The name of the label holding the function's name
+    metrics : Metrics
+        Where the histogram is stored
+    """
+    def decorate(function):
+        histogram = metrics.get_histogram(name, label_name, function.__name__)
+        @functools.wraps(function)
+        async def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return timed_function
+    return decorate
+
+timed_command = timed('lychee_command_seconds', 'command')
+timed_phase = timed('lychee_phase_seconds', 'phase')
+
+async def start_metrics_server(port, host='127.0.0.1', metrics=default_metrics):
+    """Serves the metrics in the Prometheus text format at http://host:port/metrics.
+
+    Returns
+    -------
+    asyncio.AbstractServer
+        The running server
+    """
+    async def handle_request(reader, writer):
+        try:
+            request_line = await reader.readline()
+            # skip the headers
+            while not ((await reader.readline()) in [b'\r\n', b'\n', b'']):
+                pass
+            request_parts = request_line.split()
+            if len(request_parts) >= 2 and request_parts[1] == b'/metrics':
+                status = '200 OK'
+                body = metrics.render().encode()
+            else:
+                status = '404 Not Found'
+                body = b'Not found\n'
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n'.encode()
+                         + f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_request, host, port)
@@ -1,8 +1,15 @@
 import discord
 import asyncio
-import random 
 import time
 
+from dispatcher import PRIORITY_CRITICAL, PRIORITY_NORMAL
+
+# the mission cards, as played and as the bits of Player.allowed_cards
+SUCCESS = 0
+FAIL = 1
+SWITCH = 2
+CARD_NAMES = ['success', 'fail', 'switch']
+
 class Player():
 
     """Stores information about a specific player
@@ -34,10 +41,18 @@ class Player():
         The players who have been targeted already
     has_action : bool
         Whether the player still has an action to perform
+    action_done : asyncio.Event
+        Set once the player's current action is performed or skipped
+    chosen_action : Tuple[Callable, Tuple]
+        The night action the player has chosen but that has not been resolved yet
+    resolve_after : List[str]
+        The roles whose night actions are resolved before this player's
+    phase_hooks : Dict[str, int]
+        The phases the player acts in and their place in each phase's order
     silenced : bool
         Whether the player is silenced
-    possible_mission_cards : List[bool, bool, bool]
-        Which mission cards the player can play out of the three possible: [success, fail, switch]
+    allowed_cards : int
+        Which mission cards the player can play, with bit SUCCESS, FAIL or SWITCH set for each
     voted : bool
         Whether the player has voted to accept/reject the current team
     can_be_on_current_mission : bool
@@ -56,6 +71,13 @@ class Player():
 
     # All roles are subclasses of Player, overriding the appropriate functions and creating new appropriate attributes
 
+    # Night actions are resolved after the actions of these roles, which silence other players
+    resolve_after = ['Librarian', 'Silencer', 'Victimizer']
+
+    # The phases outside of the night ('post_vote', 'pre_mission', 'post_mission', 'end_game') this role acts in,
+    # each mapped to the role's place in that phase's order
+    phase_hooks = {}
+
     def __init__(self, game, member, name, id_num, role, alignment):
         self.game = game
         self.member = member
@@ -68,8 +90,10 @@ class Player():
         self.set_actions() # self.action_windows : List[bool, bool, bool, bool]
                            # self.past_targets : List[Players]
                            # self.has_action : bool
+        self.action_done = None # asyncio.Event
+        self.chosen_action = None # Tuple[Callable, Tuple]
         self.silenced = False # bool
-        self.set_possible_mission_cards() # self.possible_mission_cards : List[bool, bool, bool]
+        self.set_possible_mission_cards() # self.allowed_cards : int
         self.voted = False # bool
         self.can_be_on_current_mission = True # bool
         self.on_current_team = False # bool
@@ -80,6 +104,7 @@ class Player():
             self.alignment = 'Spy'
         else:
             self.alignment = 'Resistance'
+        self.game.player_table.update_alignment(self)
 
     def set_believed_role(self):
         self.believed_role = self.role
@@ -93,19 +118,22 @@ class Player():
         self.has_action = True
 
     def set_possible_mission_cards(self):
-        self.possible_mission_cards = [True, True, False]
+        self.allowed_cards = (1 << SUCCESS) | (1 << FAIL)
+
+    def can_play(self, card):
+        return self.allowed_cards & (1 << card) != 0
 
     def block_success(self):
-        self.possible_mission_cards[0] = False
+        self.allowed_cards &= ~(1 << SUCCESS)
 
     def block_fail(self):
-        self.possible_mission_cards[1] = False
+        self.allowed_cards &= ~(1 << FAIL)
 
     def block_switch(self):
-        self.possible_mission_cards[2] = False
+        self.allowed_cards &= ~(1 << SWITCH)
 
     def teach_switch(self):
-        self.possible_mission_cards[2] = True
+        self.allowed_cards |= 1 << SWITCH
 
     def silence(self):
         self.silenced = True
@@ -117,6 +145,7 @@ class Player():
         """Resets players to default values after a rejected team."""
         self.voted = False
         self.on_current_team = False
+        self.game.player_table.remove_from_team(self)
 
     def hard_reset(self):
         """Resets players to default values after a completed mission."""
@@ -124,6 +153,7 @@ class Player():
         self.voted = False
         self.can_be_on_current_mission = True
         self.on_current_team = False
+        self.game.player_table.remove_from_team(self)
         self.completed_mission = False
 
     def set_done_voting(self):
@@ -134,26 +164,128 @@ class Player():
     
     def add_to_team(self):
         self.on_current_team = True
+        self.game.player_table.add_to_team(self)
 
     def set_done_missioning(self):
         self.completed_mission = True
 
+    def can_act_in(self, phase):
+        """Whether the player acts in a phase they are subscribed to this time."""
+        return True
+
+    async def choose_action(self):
+        """Prompts the player to choose their night action and waits for their choice.
+        Every acting player chooses at once; roles without a choice do nothing."""
+        pass
+
+    def submit_action(self, action, *args):
+        """Records the player's choice to be performed when their night action is resolved.
+
+        Parameters
+        ----------
+        action : Callable
+            The method that performs the choice, such as do_gamble
+        args
+            The chosen targets
+        """
+        self.game.log_event('action', self.game.get_player_index(self), action.__name__, encode_targets(args))
+        self.chosen_action = (action, args)
+        self.finish_action()
+
+    async def block_action(self):
+        """Tells a silenced player that their night action is not performed this round, dropping their choice."""
+        self.silenced = False
+        if self.chosen_action != None:
+            # they were silenced the same night, after they chose and were thanked for their choice
+            self.chosen_action = None
+            await self.send_dm('You were silenced this round, so your action was blocked.')
+        else:
+            await self.send_dm('You were silenced this round.')
+
+    async def do_chosen_action(self):
+        if self.chosen_action != None:
+            action, args = self.chosen_action
+            self.chosen_action = None
+            await action(*args)
+
+    def start_action(self):
+        """Opens the player's action so that their command is accepted."""
+        self.has_action = True
+        self.action_done = asyncio.Event()
+
+    async def wait_for_action(self):
+        """Waits until the player performs their action, an admin skips it, or its deadline passes."""
+        self.game.waiting_players.append(self)
+        deadline = self.game.schedule_deadline(self.game.get_action_timeout(self.role), self.time_out_action)
+        try:
+            await self.action_done.wait()
+        finally:
+            self.game.waiting_players.remove(self)
+            if deadline != None:
+                deadline.cancel()
+        self.has_action = False
+
+    def time_out_action(self):
+        self.game.log_event('timeout', self.game.get_player_index(self))
+        self.finish_action()
+
+    def finish_action(self):
+        """Closes the player's action and wakes up wait_for_action."""
+        self.has_action = False
+        if self.action_done != None:
+            self.action_done.set()
+
+    async def send_dm(self, content, priority=PRIORITY_NORMAL):
+        """Privately messages the player through the game's dispatcher."""
+        return await self.game.dispatcher.send_dm(self.member, content, priority)
+
+    async def confirm(self, content):
+        """Privately confirms the player's command, joined into their confirmation still waiting to be sent, if any."""
+        return await self.game.dispatcher.confirm(self.game.dispatcher.get_dm_channel(self.member), content)
+
     async def get_starting_info(self):
-        """Tells the player their starting info."""
-        await self.member.create_dm()
-        await self.member.dm_channel.send('—————— New Game ——————')
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
+        """Tells the player their starting info. The game has already opened their DM channel and sent the New Game
+        header."""
+        await self.send_dm(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
 
     async def do_action(self):
         pass
 
+def encode_targets(targets):
+    """Replaces every player in a nested list of action targets with their index, for the event log."""
+    if isinstance(targets, Player):
+        return targets.game.get_player_index(targets)
+    return [encode_targets(temp_target) for temp_target in targets]
+
+def decode_targets(game, targets):
+    """Undoes encode_targets."""
+    if isinstance(targets, int):
+        return game.players[targets]
+    return [decode_targets(game, temp_target) for temp_target in targets]
+
+role_classes = {} # Dict[str, type] — every role's Player subclass by role name
+
+def register_role(role):
+    """Registers a Player subclass under its role name so that create_player can build it."""
+    def register(player_class):
+        role_classes[role] = player_class
+        return player_class
+    return register
+
+def create_player(role, game, member, name, id_num):
+    if role in role_classes:
+        return role_classes[role](game, member, name, id_num)
+    return None
+
 """Resistance Roles"""
 
+@register_role('Resistance')
 class Resistance(Player):
     
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Resistance', 'Resistance')
 
+@register_role('Commander')
 class Commander(Player):
     
     def __init__(self, game, member, name, id_num):
@@ -161,8 +293,9 @@ class Commander(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
 
+@register_role('Bodyguard')
 class Bodyguard(Player):
     
     def __init__(self, game, member, name, id_num):
@@ -170,8 +303,9 @@ class Bodyguard(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Commanders in this game are: {self.game.get_commander_names()}')
+        await self.send_dm(f'The Commanders in this game are: {self.game.get_commander_names()}')
 
+@register_role('President')
 class President(Player):
     
     """President — At the end of round 3, you learn 1 Resistance player."""          # complete
@@ -187,15 +321,16 @@ class President(Player):
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
         all_other_resistance_player_names = []
         for temp_player in self.game.players:
-            if not (self.game.players.index(temp_player) in self.game.spy_indices) and temp_player != self:
+            if not (self.game.get_player_index(temp_player) in self.game.spy_indices) and temp_player != self:
                 all_other_resistance_player_names.append(temp_player.name)
-        random.shuffle(all_other_resistance_player_names)
-        await self.member.dm_channel.send(f'{all_other_resistance_player_names[0]} is on the Resistance side.') 
+        self.game.random.shuffle(all_other_resistance_player_names)
+        await self.send_dm(f'{all_other_resistance_player_names[0]} is on the Resistance side.') 
 
+@register_role('Gambler')
 class Gambler(Player):
         
     """Gambler — At the end of round 4, you must privately choose 2 other players. 
@@ -209,25 +344,27 @@ class Gambler(Player):
         self.past_targets = []
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose 2 other players using the `>>gamble` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose 2 other players using the `>>gamble` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
             
     async def do_gamble(self, gambled_players):
         if gambled_players[0].alignment != gambled_players[1].alignment:
             self.block_success()
-            await self.member.dm_channel.send('Those 2 players are opposite alignments. You cannot `>>mission success` during the next round.')
+            await self.send_dm('Those 2 players are opposite alignments. You cannot `>>mission success` during the next round.')
         else:
-            await self.member.dm_channel.send('Those 2 players are not opposite alignments.')
-        self.has_action = False
+            await self.send_dm('Those 2 players are not opposite alignments.')
         
+@register_role('Officer')
 class Officer(Player):
 
     """Officer — At the end of 2 random rounds, you must privately choose a player. 
@@ -238,28 +375,30 @@ class Officer(Player):
 
     def set_actions(self):
         self.action_windows = [True, True, False, False]
-        random.shuffle(self.action_windows)
+        self.game.random.shuffle(self.action_windows)
         self.past_targets = []
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>arrest` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>arrest` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_arrest(self, arrested_player):
         arrested_player.block_mission()
-        await self.member.dm_channel.send(f'You have arrested {arrested_player.name}.')
-        await self.game.general_channel.send(f'{arrested_player.name} has been arrested by the Officer. They cannot be on any team during the next round.')
+        await self.send_dm(f'You have arrested {arrested_player.name}.')
+        await self.game.announce(f'{arrested_player.name} has been arrested by the Officer. They cannot be on any team during the next round.')
         self.past_targets.append(arrested_player)
-        self.has_action = False
 
+@register_role('Informant')
 class Informant(Player):
 
     """Informant — You know two Spy roles that aren't in the game."""           # complete
@@ -268,9 +407,12 @@ class Informant(Player):
         super().__init__(game, member, name, id_num, 'Informant', 'Resistance')
 
     async def get_starting_info(self):
+        # drawn before the first await so that every player's draws happen in seat order
+        temp_roles = self.game.random.sample(self.game.all_spy_roles, 2)
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The following Spy roles are not in this game: {random.sample(self.game.all_spy_roles, 2)}')
+        await self.send_dm(f'The following Spy roles are not in this game: {temp_roles}')
 
+@register_role('Psychic')
 class Psychic(Player):
 
     """Psychic — At the end of rounds 3 and 4, you must privately choose another player to learn their alignment."""            # completed
@@ -283,22 +425,24 @@ class Psychic(Player):
         self.past_targets = [self]
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>see` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>see` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_see(self, seen_player):
-        await self.member.dm_channel.send(f'{seen_player.name} is on the {seen_player.alignment} side.')
+        await self.send_dm(f'{seen_player.name} is on the {seen_player.alignment} side.')
         self.past_targets.append(seen_player)
-        self.has_action = False
 
+@register_role('Witch')
 class Witch(Player):
 
     """Witch — You think you're the Psychic but you always learn the opposite alignment."""         # completed
@@ -314,25 +458,27 @@ class Witch(Player):
         self.past_targets = [self]
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>see` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>see` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_see(self, seen_player):
         if seen_player.alignment == 'Resistance':
-            await self.member.dm_channel.send(f'{seen_player.name} is on the Spy side.')
+            await self.send_dm(f'{seen_player.name} is on the Spy side.')
         else: 
-            await self.member.dm_channel.send(f'{seen_player.name} is on the Resistance side.')
+            await self.send_dm(f'{seen_player.name} is on the Resistance side.')
         self.past_targets.append(seen_player)
-        self.has_action = False
 
+@register_role('Resistance Reverser')
 class Resistance_Reverser(Player):
 
     """Resistance Reverser — You can >>mission switch to swap the outcome of the mission."""            # completed
@@ -341,28 +487,37 @@ class Resistance_Reverser(Player):
         super().__init__(game, member, name, id_num, 'Resistance Reverser', 'Resistance')
 
     def set_possible_mission_cards(self):
-        self.possible_mission_cards = [True, True, True]
+        self.allowed_cards = (1 << SUCCESS) | (1 << FAIL) | (1 << SWITCH)
 
+@register_role('Traditionalist')
 class Traditionalist(Player):
 
     """Traditionalist — No one can `>>mission switch` while you are on a mission."""            # completed
 
+    phase_hooks = {'pre_mission': 1}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Traditionalist', 'Resistance')
 
+    def can_act_in(self, phase):
+        return self.on_current_team
+
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
         for temp_player in self.game.get_current_team():
             temp_player.block_switch()
 
+@register_role('Freelancer')
 class Freelancer(Player):
 
     """Freelancer — At the end of round 3, you must privately choose another player.
                     If they are a spy, during the next round, a random Resistance player on the mission team cannot >>mission success."""         # completed
 
+    phase_hooks = {'pre_mission': 3}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Freelancer', 'Resistance')
 
@@ -372,33 +527,35 @@ class Freelancer(Player):
         self.has_action = False
         self.set_bomb = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>freelance` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.set_bomb:
             temp_team = self.game.get_current_team()
-            random.shuffle(temp_team)
+            self.game.random.shuffle(temp_team)
             for temp_player in temp_team:
-                if temp_player.alignment == 'Resistance' and (temp_player.possible_mission_cards[0] == True):
+                if temp_player.alignment == 'Resistance' and temp_player.can_play(SUCCESS):
                     temp_player.block_success()
             self.set_bomb = False
-            await self.member.dm_channel.send('Your set bomb has gone off!')
-        elif self.silenced == True and self.has_action:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('Your set bomb has gone off!')
+        elif self.silenced == True and self.game.current_window == 3:
+            await self.block_action()
         elif self.game.current_window == 3:
-            self.has_action = True
-            await self.member.dm_channel.send('Please choose another player using the `>>freelance` command.')
-            while (self.has_action == True) and (self.game.skip_night_action == False):
-                await asyncio.sleep(1)
-            self.has_action = False
+            await self.do_chosen_action()
 
     async def do_freelance(self, freelanced_player):
         if freelanced_player.alignment == 'Spy':
             self.set_bomb = True
-            await self.member.dm_channel.send('You have chosen a Spy and have set a bomb!')
+            await self.send_dm('You have chosen a Spy and have set a bomb!')
         else:
-            await self.member.dm_channel.send('You have not chosen a Spy.')
-        self.has_action = False
+            await self.send_dm('You have not chosen a Spy.')
         
+@register_role('Professor')
 class Professor(Player):
 
     """Professor — At the end of rounds 2, 3, and 4, you must privately choose a player.
@@ -412,23 +569,25 @@ class Professor(Player):
         self.past_targets = []
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>teach` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>teach` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_teach(self, taught_player):
         taught_player.teach_switch()
         self.past_targets.append(taught_player)
-        await self.member.dm_channel.send(f'You have taught {taught_player.name} `>>mission switch`.')
-        self.has_action = False
+        await self.send_dm(f'You have taught {taught_player.name} `>>mission switch`.')
 
+@register_role('Resistance Clown')
 class Resistance_Clown(Player):
 
     """Clown — You do not learn your alignment until the end of round 3."""         # completed
@@ -440,9 +599,7 @@ class Resistance_Clown(Player):
         self.believed_role = 'Clown'
 
     async def get_starting_info(self):
-        await self.member.create_dm()
-        await self.member.dm_channel.send('—————— New Game ——————')
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role}.')
+        await self.send_dm(f'{self.name}: you are the {self.believed_role}.')
 
     def set_actions(self):
         self.action_windows = [False, False, True, False]
@@ -450,32 +607,37 @@ class Resistance_Clown(Player):
         self.has_action = False
 
     async def do_action(self):
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
+        await self.send_dm(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
 
+@register_role('Dueler')
 class Dueler(Player):
 
     """Dueler — If there is exactly one spy with you on a team, they cannot >>mission fail. 
                 If there are two or more spies with you on a team, you cannot >>mission success."""         # complete
 
+    phase_hooks = {'pre_mission': 0}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Dueler', 'Resistance')
 
+    def can_act_in(self, phase):
+        return self.on_current_team
+
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
         # get spies on the current team
-        temp_spy_players = []
-        for temp_player in self.game.get_current_team():
-            if temp_player.alignment == 'Spy':
-                temp_spy_players.append(temp_player)
+        player_table = self.game.player_table
+        temp_spy_players = player_table.get_players(player_table.team_mask & player_table.alignment_masks['Spy'])
         # do appropriate action based on number of spies
         if len(temp_spy_players) == 1:
             temp_spy_players[0].block_fail()
         elif len(temp_spy_players) >= 2:
             self.block_success()
 
+@register_role('Insider')
 class Insider(Player):
 
     """Insider — At the end of rounds 1, 2, and 3, you learn whether or not all of the Resistance voted together during the passing vote."""            # completed
@@ -491,22 +653,22 @@ class Insider(Player):
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
         # check if all of the Resistance voted together and tell answer
-        resistance_voted_accept_count = 0
-        for temp_player in self.game.voter.recent_voted_accept:
-            if temp_player.alignment == 'Resistance':
-                resistance_voted_accept_count += 1
+        resistance_voted_accept_count = self.game.voter.recent_accept_counts['Resistance']
         if resistance_voted_accept_count == len(self.game.player_resistance_roles) or resistance_voted_accept_count == 0:
-            await self.member.dm_channel.send('The Resistance voted all together during the passing vote this round.')
+            await self.send_dm('The Resistance voted all together during the passing vote this round.')
         else:
-            await self.member.dm_channel.send('The Resistance did not vote all together during the passing vote this round.')
+            await self.send_dm('The Resistance did not vote all together during the passing vote this round.')
 
+@register_role('Contrarian')
 class Contrarian(Player):
 
     """Contrarian — The first time you vote with the minority, everyone's vote is swapped."""           # complete
         
+    phase_hooks = {'post_vote': 1}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Contrarian', 'Resistance')
 
@@ -514,26 +676,26 @@ class Contrarian(Player):
         if self.has_action == False: return
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
         # check and switch if minority
-        if (self in self.game.voter.voted_accept) and (len(self.game.voter.voted_accept) < len(self.game.voter.voted_reject)):
-            temp_voted_accept = self.game.voter.voted_accept
-            self.game.voter.voted_accept = self.game.voter.voted_reject
-            self.game.voter.voted_reject = temp_voted_accept
+        voter = self.game.voter
+        if voter.has_voted_accept(self) and (voter.get_accept_count() < voter.get_reject_count()):
+            voter.swap_votes()
             self.has_action = False
-            await self.member.dm_channel.send('Your ability has been triggered.')
-        elif (self in self.game.voter.voted_reject) and (len(self.game.voter.voted_reject) < len(self.game.voter.voted_accept)):
-            temp_voted_accept = self.game.voter.voted_accept
-            self.game.voter.voted_accept = self.game.voter.voted_reject
-            self.game.voter.voted_reject = temp_voted_accept
+            await self.send_dm('Your ability has been triggered.')
+        elif voter.has_voted_reject(self) and (voter.get_reject_count() < voter.get_accept_count()):
+            voter.swap_votes()
             self.has_action = False
-            await self.member.dm_channel.send('Your ability has been triggered.')
+            await self.send_dm('Your ability has been triggered.')
 
+@register_role('Librarian')
 class Librarian(Player):
 
     """Librarian — At the end of rounds 2 and 3, you must choose another player. During their next action window, that player does not perform their action."""            # completed
         
+    resolve_after = []
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Librarian', 'Resistance')
 
@@ -542,24 +704,26 @@ class Librarian(Player):
         self.past_targets = [self]
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>silence` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>silence` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_silence(self, silenced_player):
         silenced_player.silence()
-        await self.member.dm_channel.send(f'You have silenced {silenced_player.name}.')
-        self.has_action = False
+        await self.send_dm(f'You have silenced {silenced_player.name}.')
 
 """Spy Roles"""
 
+@register_role('Spy')
 class Spy(Player):
 
     def __init__(self, game, member, name, id_num):
@@ -567,29 +731,49 @@ class Spy(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
 
+@register_role('Assassin')
 class Assassin(Player):
     
+    phase_hooks = {'end_game': 0}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Assassin', 'Spy')
+        self.action_deadline = None # Deadline
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+
+    def can_act_in(self, phase):
+        return self.game.success_count >= 3
 
     async def do_action(self):
-        self.has_action = True
-        await self.game.general_channel.send('There have been 3 successful missions. Assassin, please choose another player using the `>>assassinate` command.')
-        while (self.has_action == True) and (self.game.skip_night_actions == False):
-            await asyncio.sleep(1)
+        # the game's commands are not held up while the Assassin chooses, so that their `>>assassinate` runs in
+        # order with them; the game ends once the action is closed
+        self.start_action()
+        self.game.waiting_players.append(self)
+        self.action_deadline = self.game.schedule_deadline(self.game.get_action_timeout(self.role), self.time_out_action)
+        await self.game.announce('There have been 3 successful missions. Assassin, please choose another player using the `>>assassinate` command.')
+
+    def finish_action(self):
+        super().finish_action()
+        if self in self.game.waiting_players:
+            self.game.waiting_players.remove(self)
+            if self.action_deadline != None:
+                self.action_deadline.cancel()
+                self.action_deadline = None
+            self.game.submit(self.game.check_end_game)
 
     async def do_assassination(self, assassinated_player):
+        self.game.log_event('assassinate', self.game.get_player_index(self), self.game.get_player_index(assassinated_player))
         if assassinated_player.role == 'Commander':
             self.game.completed = True
-            await self.game.general_channel.send('The game has ended—the Spies have won!\nThe Assassin has killed the Commander.')
-        self.has_action = False
+            await self.game.announce('The game has ended—the Spies have won!\nThe Assassin has killed the Commander.')
+        self.finish_action()
 
+@register_role('False Commander')
 class False_Commander(Player):
     
     def __init__(self, game, member, name, id_num):
@@ -597,8 +781,9 @@ class False_Commander(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
 
+@register_role('Organizer')
 class Organizer(Player):
 
     """Organizer — You know every player's role."""           # completed
@@ -608,14 +793,17 @@ class Organizer(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}\nTheir respective roles are: {self.game.player_spy_roles}')
-        await self.member.dm_channel.send(f'The Resistance in this game are: {self.game.get_resistance_names()}\nTheir respective roles are: {self.game.player_resistance_roles}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}\nTheir respective roles are: {self.game.player_spy_roles}')
+        await self.send_dm(f'The Resistance in this game are: {self.game.get_resistance_names()}\nTheir respective roles are: {self.game.player_resistance_roles}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
+@register_role('Bomber')
 class Bomber(Player):
 
     """Bomber — The first time you >>mission success, during the next mission, a random Resistance player on the mission team cannot >>mission success."""          # completed
         
+    phase_hooks = {'pre_mission': 2}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Bomber', 'Spy')
  
@@ -627,77 +815,86 @@ class Bomber(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     async def do_action(self):
         # check if bomb set or bomb triggered
         if self.set_bomb:
             temp_team = self.game.get_current_team()
-            random.shuffle(temp_team)
+            self.game.random.shuffle(temp_team)
             for temp_player in temp_team:
-                if temp_player.alignment == 'Resistance' and (temp_player.possible_mission_cards[0] == True):
+                if temp_player.alignment == 'Resistance' and temp_player.can_play(SUCCESS):
                     temp_player.block_success()
                     break
             self.set_bomb = False
-            await self.member.dm_channel.send('Your set bomb has gone off!')
+            await self.send_dm('Your set bomb has gone off!')
         elif self.silenced == True and self.has_action:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
-        elif self.has_action and (self in self.game.missioner.recent_conducted_success):
+            await self.send_dm('You were silenced this round.')
+        elif self.has_action and self.game.missioner.has_recently_played(self, SUCCESS):
             self.set_bomb = True
             self.has_action = False
-            await self.member.dm_channel.send('Your bomb has been set!')
+            await self.send_dm('Your bomb has been set!')
 
+@register_role('Martyr')
 class Martyr(Player):
 
     """Martyr — The first time you >>mission fail, everyone also >>mission fail even if they cannot, except for the Angel."""           # completed
         
+    phase_hooks = {'post_mission': 0}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Martyr', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
+
+    def can_act_in(self, phase):
+        return self.on_current_team
 
     async def do_action(self):
         if self.has_action == False: return
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
-        if (self in self.game.missioner.conducted_fail):
-            for x in range(len(self.game.missioner.conducted_success)):
-                self.game.missioner.conducted_fail.append(self.game.missioner.conducted_success.pop())
-            for x in range(len(self.game.missioner.conducted_switch)):
-                self.game.missioner.conducted_fail.append(self.game.missioner.conducted_switch.pop())
+        if self.game.missioner.has_played(self, FAIL):
+            self.game.missioner.change_all_cards(FAIL)
             self.has_action = False
-            await self.member.dm_channel.send('Your ability has been triggered!')
+            await self.send_dm('Your ability has been triggered!')
 
+@register_role('Angel')
 class Angel(Player):
 
     """Angel — As long as there is at least one >>mission fail, you always >>mission success."""            # completed
         
+    phase_hooks = {'post_mission': 1}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Angel', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
         
+    def can_act_in(self, phase):
+        return self.on_current_team
+
     async def do_action(self):
-        if self in self.game.missioner.conducted_success: return
+        if self.game.missioner.has_played(self, SUCCESS): return
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
-        elif len(self.game.missioner.conducted_fail) >= 2:
-            self.game.missioner.conducted_fail.remove(self)
-            self.game.missioner.conducted_success.append(self)
-            await self.member.dm_channel.send('Your ability has been triggered! Your `>>mission fail` has been swapped to `>>mission success`.')
+        elif self.game.missioner.card_counts[FAIL] >= 2:
+            self.game.missioner.change_card(self, SUCCESS)
+            await self.send_dm('Your ability has been triggered! Your `>>mission fail` has been swapped to `>>mission success`.')
 
+@register_role('Spy Reverser')
 class Spy_Reverser(Player):
 
     """Spy Reverser — You can >>mission switch to swap the outcome of the mission. You cannot >>mission fail."""            # completed
@@ -707,34 +904,37 @@ class Spy_Reverser(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
         
     def set_possible_mission_cards(self):
-        self.possible_mission_cards = [True, False, True]
+        self.allowed_cards = (1 << SUCCESS) | (1 << SWITCH)
 
+@register_role('Timekeeper')
 class Timekeeper(Player):
 
     """Timekeeper — If you >>vote reject during the 5th vote of a round, everyone >>vote reject."""            # completed
         
+    phase_hooks = {'post_vote': 3}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Timekeeper', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
-        if self.game.rejected_team_count == 4 and (self in self.game.voter.voted_reject):
-            for temp_player in self.game.voter.voted_accept:
-                self.game.voter.voted_reject.append(self.game.voter.voted_accept.pop())
-            await self.member.dm_channel.send(f'Your ability has been triggered!')
+        if self.game.rejected_team_count == 4 and self.game.voter.has_voted_reject(self):
+            self.game.voter.reject_all()
+            await self.send_dm(f'Your ability has been triggered!')
 
+@register_role('Mad Scientist')
 class Mad_Scientist(Player):
 
     """Mad Scientist — At the end of rounds 2 and 3, you must privately choose a player.
@@ -745,68 +945,76 @@ class Mad_Scientist(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     def set_actions(self):
         self.action_windows = [False, True, True, False]
         self.past_targets = []
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>experiment` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>experiment` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_experiment(self, taught_player):
         taught_player.teach_switch()
         taught_player.block_success()
-        await self.member.dm_channel.send(f'You have taught {taught_player.name} `>>mission switch` and blocked `>>mission success`.')
-        self.has_action = False
+        await self.send_dm(f'You have taught {taught_player.name} `>>mission switch` and blocked `>>mission success`.')
 
+@register_role('Silencer')
 class Silencer(Player):
 
     """Silencer — At the end of rounds 1, 2, and 3, you must pick another player. During their next action window, that player does not perform their action."""            # completed
         
+    resolve_after = []
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Silencer', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     def set_actions(self):
         self.action_windows = [True, True, True, False]
         self.past_targets = [self]
         self.has_action = False
 
+    async def choose_action(self):
+        if self.silenced == True:
+            return
+        self.start_action()
+        await self.send_dm('Please choose another player using the `>>silence` command.', PRIORITY_CRITICAL)
+        await self.wait_for_action()
+
     async def do_action(self):
         if self.silenced == True:
-            self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.block_action()
             return
-        self.has_action = True
-        await self.member.dm_channel.send('Please choose another player using the `>>silence` command.')
-        while (self.has_action == True) and (self.game.skip_night_action == False):
-            await asyncio.sleep(1)
-        self.has_action = False
+        await self.do_chosen_action()
 
     async def do_silence(self, silenced_player):
         silenced_player.silence()
-        await self.member.dm_channel.send(f'You have silenced {silenced_player.name}.')
-        self.has_action = False
+        await self.send_dm(f'You have silenced {silenced_player.name}.')
 
+@register_role('Victimizer')
 class Victimizer(Player):
 
     """Victimizer — The first time, you >>mission success, during their next action window, every player on your team does not perform their action."""          # completed
         
+    resolve_after = []
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Victimizer', 'Spy')
  
@@ -817,23 +1025,20 @@ class Victimizer(Player):
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     async def do_action(self):
         if self.silenced == True and self.has_action:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
-        elif self.has_action and (self in self.game.missioner.recent_conducted_success):
-            for temp_player in self.game.missioner.recent_conducted_success:
-                temp_player.silence()
-            for temp_player in self.game.missioner.recent_conducted_fail:
-                temp_player.silence()
-            for tmep_player in self.game.missioner.recent_conducted_switch:
+            await self.send_dm('You were silenced this round.')
+        elif self.has_action and self.game.missioner.has_recently_played(self, SUCCESS):
+            for temp_player in self.game.player_table.get_players(self.game.missioner.get_recent_submitted_mask()):
                 temp_player.silence()
             self.has_action = False
-            await self.member.dm_channel.send('Your ability has been triggered!')
+            await self.send_dm('Your ability has been triggered!')
 
+@register_role('Spy Clown')
 class Spy_Clown(Player):
 
     """Clown — You do not learn your alignment until the end of round 3."""         # completed
@@ -845,9 +1050,7 @@ class Spy_Clown(Player):
         self.believed_role = 'Clown'
 
     async def get_starting_info(self):
-        await self.member.create_dm()
-        await self.member.dm_channel.send('—————— New Game ——————')
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role}.')
+        await self.send_dm(f'{self.name}: you are the {self.believed_role}.')
 
     def set_actions(self):
         self.action_windows = [False, False, True, False]
@@ -855,87 +1058,75 @@ class Spy_Clown(Player):
         self.has_action = False
 
     async def do_action(self):
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'{self.name}: you are the {self.believed_role} on the {self.alignment} side.')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
+@register_role('Usurper')
 class Usurper(Player):
 
     """Usurper — The first time you vote with all of the Resistance, everyone's vote is swapped."""         # completed
         
+    phase_hooks = {'post_vote': 0}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Usurper', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     async def do_action(self):
         if self.has_action == False: return
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
-        temp_resistance_count = 0
-        if (self in self.game.voter.voted_accept):
-            for temp_player in self.game.voter.voted_accept:
-                if temp_player.alignment == 'Resistance':
-                    temp_resistance_count += 1
-            if temp_resistance_count == len(self.game.player_resistance_roles):
-                temp_voted_accept = self.game.voter.voted_accept
-                self.game.voter.voted_accept = self.game.voter.voted_reject
-                self.game.voter.voted_reject = temp_voted_accept
-                self.has_action = False
-                await self.member.dm_channel.send('Your ability has been triggered. Everyone\'s vote has been swapped.')
+        voter = self.game.voter
+        if voter.has_voted_accept(self):
+            temp_resistance_count = voter.accept_counts['Resistance']
         else:
-            for temp_player in self.game.voter.voted_reject:
-                if temp_player.alignment == 'Resistance':
-                    temp_resistance_count += 1
-            if temp_resistance_count == len(self.game.player_resistance_roles):
-                temp_voted_accept = self.game.voter.voted_accept
-                self.game.voter.voted_accept = self.game.voter.voted_reject
-                self.game.voter.voted_reject = temp_voted_accept
-                self.has_action = False
-                await self.member.dm_channel.send('Your ability has been triggered. Everyone\'s vote has been swapped.')
+            temp_resistance_count = voter.reject_counts['Resistance']
+        if temp_resistance_count == len(self.game.player_resistance_roles):
+            voter.swap_votes()
+            self.has_action = False
+            await self.send_dm('Your ability has been triggered. Everyone\'s vote has been swapped.')
 
+@register_role('Muckraker')
 class Muckraker(Player):
 
     """Muckraker — Whenever you vote with all of the spies, you and a random Resistance player swap votes."""           # completed
         
+    phase_hooks = {'post_vote': 2}
+
     def __init__(self, game, member, name, id_num):
         super().__init__(game, member, name, id_num, 'Muckraker', 'Spy')
 
     async def get_starting_info(self):
         await super().get_starting_info()
-        await self.member.dm_channel.send(f'The Spies in this game are: {self.game.get_spy_names()}')
-        await self.member.dm_channel.send(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.players.index(self))]}')
+        await self.send_dm(f'The Spies in this game are: {self.game.get_spy_names()}')
+        await self.send_dm(f'A safe role is {self.game.all_resistance_roles[self.game.spy_indices.index(self.game.get_player_index(self))]}')
 
     async def do_action(self):
         if self.silenced == True:
             self.silenced = False
-            await self.member.dm_channel.send('You were silenced this round.')
+            await self.send_dm('You were silenced this round.')
             return
-        temp_spy_count = 0
-        if (self in self.game.voter.voted_accept) and len(self.game.voter.voted_reject) != 0: 
-            for temp_player in self.game.voter.voted_accept:
-                if temp_player.alignment == 'Spy':
-                    temp_spy_count += 1
-            if temp_spy_count == len(self.game.player_spy_roles):
-                self.game.voter.voted_accept.append(self.game.voter.voted_reject.pop())
-                self.game.voter.voted_accept.remove(self)
-                self.game.voter.voted_reject.append(self)
-                await self.member.dm_channel.send('Your ability has been triggered. Your `>>vote accept` has been swapped to `>>vote reject`.')
-        elif (self in self.game.voter.voted_reject) and len(self.game.voter.voted_accept) != 0:
-            for temp_player in self.game.voter.voted_reject:
-                if temp_player.alignment == 'Spy':
-                    temp_spy_count += 1
-            if temp_spy_count == len(self.game.player_spy_roles):
-                self.game.voter.voted_reject.append(self.game.voter.voted_accept.pop())
-                self.game.voter.voted_reject.remove(self)
-                self.game.voter.voted_accept.append(self)
-                await self.member.dm_channel.send('Your ability has been triggered. Your `>>vote reject` has been swapped to `>>vote accept`.')
-
+        voter = self.game.voter
+        # with every spy on one side, the other side is all Resistance
+        if voter.has_voted_accept(self) and voter.get_reject_count() != 0:
+            if voter.accept_counts['Spy'] == len(self.game.player_spy_roles):
+                voter.swap_vote(self.game.random.choice(voter.get_voted_reject()))
+                voter.swap_vote(self)
+                await self.send_dm('Your ability has been triggered. Your `>>vote accept` has been swapped to `>>vote reject`.')
+        elif voter.has_voted_reject(self) and voter.get_accept_count() != 0:
+            if voter.reject_counts['Spy'] == len(self.game.player_spy_roles):
+                voter.swap_vote(self.game.random.choice(voter.get_voted_accept()))
+                voter.swap_vote(self)
+                await self.send_dm('Your ability has been triggered. Your `>>vote reject` has been swapped to `>>vote accept`.')
+
+@register_role('Drunken Spy')
 class Drunken_Spy(Player):
 
     """Drunken Spy — You think you are the Informant but the two roles are actually in the game."""         # completed
@@ -947,7 +1138,7 @@ class Drunken_Spy(Player):
         self.believed_role = 'Informant'
 
     async def get_starting_info(self):
-        await self.member.create_dm()
-        await self.member.dm_channel.send('—————— New Game ——————')
-        await self.member.dm_channel.send(f'{self.name}: you are the {self.believed_role} on the Resistance side.')
-        await self.member.dm_channel.send(f'The following Spy roles are not in this game: {random.sample(self.game.player_spy_roles, 2)}')
+        # drawn before the first await so that every player's draws happen in seat order
+        temp_roles = self.game.random.sample(self.game.player_spy_roles, 2)
+        await self.send_dm(f'{self.name}: you are the {self.believed_role} on the Resistance side.')
+        await self.send_dm(f'The following Spy roles are not in this game: {temp_roles}')
@@ -0,0 +1,128 @@
+import bisect
+import unicodedata
+
+ALIGNMENTS = ['Resistance', 'Spy']
+
+def normalize_name(name):
+    """Returns a name the way player names are compared: Unicode-normalized (NFKC) and case-folded, so that
+    'ＢＯＢ', 'Bob' and 'bob' are the same name."""
+    return unicodedata.normalize('NFKC', name).casefold()
+
+def get_seats(mask):
+    """Returns the seats in a seat mask, where bit x is set for the player in seat x, in seat order."""
+    seats = []
+    seat = 0
+    while mask != 0:
+        if mask & 1:
+            seats.append(seat)
+        mask >>= 1
+        seat += 1
+    return seats
+
+def count_seats(mask):
+    return bin(mask).count('1')
+
+class Player_Table():
+
+    """Indexes a game's players by seat, member id and name, and keeps track of the current team.
+
+    Sets of players are stored as seat masks: ints with bit x set for the player in seat x.
+
+    Parameters
+    ----------
+    players : List[Player]
+        The players of the game, in seat order. Players already on the current team are added to it.
+
+    Attributes
+    ----------
+    seats_by_id_num : Dict[int, int]
+        Each player's seat (their index in players), by their member's id number
+    players_by_name : Dict[str, Player]
+        Each player by their normalized name; when two names normalize the same, the first seated player keeps it
+    sorted_names : List[str]
+        Every normalized name once, sorted so that the names starting with a prefix are next to each other
+    team_mask : int
+        The seat mask of the players on the current team
+    alignment_masks : Dict[str, int]
+        The seat mask of the players of each alignment
+    players
+    """
+
+    def __init__(self, players):
+        self.players = players
+        self.seats_by_id_num = {} # Dict[int, int]
+        self.players_by_name = {} # Dict[str, Player]
+        self.team_mask = 0 # int
+        self.alignment_masks = {} # Dict[str, int]
+        for temp_alignment in ALIGNMENTS:
+            self.alignment_masks[temp_alignment] = 0
+        for x in range(len(players)):
+            self.seats_by_id_num.setdefault(players[x].id_num, x)
+            self.players_by_name.setdefault(normalize_name(players[x].name), players[x])
+            if players[x].on_current_team:
+                self.team_mask |= 1 << x
+            self.alignment_masks[players[x].alignment] |= 1 << x
+        self.sorted_names = sorted(self.players_by_name) # List[str]
+
+    def get_seat(self, player):
+        return self.seats_by_id_num[player.id_num]
+
+    def get_bit(self, player):
+        return 1 << self.seats_by_id_num[player.id_num]
+
+    def get_players(self, mask):
+        """Returns a new list of the players in a seat mask, in seat order."""
+        return [self.players[seat] for seat in get_seats(mask)]
+
+    def count_alignments(self, mask):
+        """Returns how many players of each alignment are in a seat mask."""
+        counts = {}
+        for temp_alignment in ALIGNMENTS:
+            counts[temp_alignment] = count_seats(mask & self.alignment_masks[temp_alignment])
+        return counts
+
+    def update_alignment(self, player):
+        bit = self.get_bit(player)
+        for temp_alignment in ALIGNMENTS:
+            self.alignment_masks[temp_alignment] &= ~bit
+        self.alignment_masks[player.alignment] |= bit
+
+    def get_player_from_id_num(self, id_num):
+        seat = self.seats_by_id_num.get(id_num)
+        if seat == None:
+            return None
+        return self.players[seat]
+
+    def get_player_from_name(self, name):
+        """Finds a player by their name, or by the start of their name if no other player's name starts the same way.
+
+        Parameters
+        ----------
+        name : str
+            The name as typed, compared after normalize_name
+
+        Returns
+        -------
+        Player
+            The player, or None if no player or more than one player matches
+        """
+        name = normalize_name(name)
+        temp_player = self.players_by_name.get(name)
+        if temp_player != None or name == '':
+            return temp_player
+        index = bisect.bisect_left(self.sorted_names, name)
+        if index == len(self.sorted_names) or not self.sorted_names[index].startswith(name):
+            return None
+        if index + 1 < len(self.sorted_names) and self.sorted_names[index + 1].startswith(name):
+            return None
+        return self.players_by_name[self.sorted_names[index]]
+
+    def add_to_team(self, player):
+        self.team_mask |= self.get_bit(player)
+
+    def remove_from_team(self, player):
+        self.team_mask &= ~self.get_bit(player)
+
+    def get_current_team(self):
+        """Returns a new list of the players on the current team, in seat order, which callers may shuffle."""
+        return self.get_players(self.team_mask)
@@ -0,0 +1,97 @@
+import asyncio
+
+# How many seconds an edit to a progress message waits for more submissions, so that a burst of votes or cards is
+# shown with one edit
+EDIT_DELAY = 2.0
+
+class Progress_Message():
+
+    """The announcement opening a vote or a mission, edited to list who has submitted so far.
+
+    Submissions only schedule an edit, which waits EDIT_DELAY seconds on the game's Deadline_Scheduler and then
+    shows every submission made by then, so a phase costs no message for each submission and at most one edit for
+    each burst of them. Once the phase ends, any edit still waiting is made at once, so the final count is shown
+    before the results, and the buttons of a prompt sent with them are removed in the same edit.
+
+    Parameters
+    ----------
+    dispatcher : Dispatcher
+        Edits the message
+    message : discord.Message
+        The announcement to edit
+    content : str
+        The announcement's content without any progress
+    label : str
+        What the listed players have done, such as 'Voted'
+    get_names : Callable[[], List[str]]
+        Returns the name of every player who has submitted so far
+    total : int
+        How many players are to submit
+    scheduler : Deadline_Scheduler
+        Waits out the delay of each edit
+    has_buttons : bool
+        Whether the message has buttons, which the last edit removes
+    delay : float
+        How many seconds an edit waits
+
+    Attributes
+    ----------
+    shown_content : str
+        The message's content as last sent or edited
+    deadline : Deadline
+        Makes the next edit, or None while no edit is waiting
+    lock : asyncio.Lock
+        Keeps the edits in order
+    dispatcher
+    message
+    content
+    label
+    get_names
+    total
+    scheduler
+    has_buttons
+    delay
+    """
+
+    def __init__(self, dispatcher, message, content, label, get_names, total, scheduler, has_buttons=False,
+                 delay=EDIT_DELAY):
+        self.dispatcher = dispatcher
+        self.message = message
+        self.content = content
+        self.label = label
+        self.get_names = get_names
+        self.total = total
+        self.scheduler = scheduler
+        self.has_buttons = has_buttons
+        self.delay = delay
+        self.shown_content = content # str
+        self.deadline = None # Deadline
+        self.lock = asyncio.Lock()
+
+    def get_content(self):
+        names = self.get_names()
+        if len(names) == 0:
+            return self.content
+        return f'{self.content}\n{self.label} ({len(names)}/{self.total}): {", ".join(names)}'
+
+    def update(self):
+        """Schedules an edit for a new submission, unless one is already waiting."""
+        if self.deadline == None:
+            self.deadline = self.scheduler.schedule(self.delay, self.edit)
+
+    async def edit(self, remove_buttons=False):
+        self.deadline = None
+        async with self.lock:
+            content = self.get_content()
+            if content != self.shown_content or remove_buttons:
+                self.shown_content = content
+                await self.dispatcher.edit(self.message, content, remove_buttons)
+
+    async def finish(self):
+        """Makes the waiting edit at once, if there is one, or the edit removing the message's buttons."""
+        if self.deadline != None or self.has_buttons:
+            if self.deadline != None:
+                self.deadline.cancel()
+            remove_buttons = self.has_buttons
+            self.has_buttons = False
+            await self.edit(remove_buttons)
@@ -0,0 +1,74 @@
+# The emoji Lychee picks from when a message mentions it, by the mood of the message
+
+AFFECTION = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:',
+             ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:',
+             ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:']
+VALIDATION = [':+1:', ':grinning:', ':blush:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
+GREETING = [':partying_face:', ':wave:', ':star2:', ':sparkles:', ':dancer:', ':clown:', ':raised_hands:']
+CONFIRMATION = [':partying_face:', ':unicorn:', ':clown:', ':fist:', ':raised_hands:', ':ok_hand:']
+MISCHIEVIOUS = [':zany_face:', ':stuck_out_tongue_winking_eye:', ':clown:', ':snake:', ':full_moon_with_face:',
+                ':star2:', ':sparkles:', ':tropical_drink:', ':fork_knife_plate:', ':joystick:']
+FLIRTING = [':sweat:', ':eggplant:', ':fire:', ':hot_face:', ':triumph:', ':heart_eyes:', ':kissing_heart:',
+            ':revolving_hearts:', ':sparkling_heart:', ':shushing_face:', ':wink:', ':yum:', ':smiling_imp:',
+            ':fingers_crossed:', ':pray:', ':takeout_box:', ':peach:', ':beers:', ':clinking_glass:', ':fireworks:',
+            ':closed_lock_with_key:', ':bangbang:', ':cupid:', ':love_letter:', ':spoon:', ':banana:', ':hot_pepper:']
+DISGUST = [':face_with_monocle:', ':scream:', ':cold_sweat:', ':receipt:', ':thinking:', ':upside_down:',
+           ':sick:', ':face_vomiting:', ':ghost:', ':clown:', ':no_good:', ':facepalm:', ':thunder_cloud_rain:',
+           ':sos:', ':no_entry:', ':previous_track:', ':twisted_rightwards_arrows:', ':no_bell:']
+THREAT = [':receipt:', ':upside_down:', ':syringe:', ':gun:', ':safety_pin:', ':anger:', ':warning:',
+          ':scissors:', ':broom:', ':knife:', ':dagger:', ':axe:', ':firecracker:', ':hourglass:',
+          ':timer:', ':oncoming_police_car:', ':ambulance:', ':wrestling:', ':boxing_glove:', ':boom:', ':snake:',
+          ':b:', ':tooth:', ':angry:', ':rage:', ':triumph:', ':face_with_symbols_over_mouth:']
+RANDOM = [':blush:', ':smiling_face_with_3_hearts:', ':kissing_heart:', ':star_struck:', ':flushed:',
+          ':pleading_face:', ':hugging:', ':sneeze:', ':bow:', ':ok_woman:', ':star2:', ':sparkles:',
+          ':revolving_hearts:', ':sparkling_heart:', ':receipt:', ':eyes:', ':grin:', ':receipt:',
+          ':upside_down:', ':face_with_monocle:', ':thinking:', ':wink:', ':shushing_face:', ':unicorn:',
+          ':dancer:', ':+1:', ':woozy_face:', ':smiling_imp:', ':clown:', ':fist:', ':raised_hands:',
+          ':haircut:', ':drum:', ':exploding_head:', ':liar:', ':grimacing:', ':sleepy:', ':clap:']
+
+# The members Lychee always answers in the same mood when a rule allows it, by name
+AUTHOR_MOODS = {'Oreo9238': FLIRTING,
+                'nutrishous': DISGUST}
+
+# Each rule is (keywords, required keywords, emoji, whether AUTHOR_MOODS applies). The first rule with any of its
+# keywords and all of its required keywords in the message is used, or RANDOM if none are.
+RULES = [(('love', 'like'), ('i',), AFFECTION, False),
+         (('wanna', 'want'), (), VALIDATION, True),
+         (('hi', 'hello', 'bye'), (), GREETING, False),
+         (('live', 'die', 'kill', 'savage', 'fight', 'uck'), (), THREAT, False),
+         (('are you', 'r you', 'r u', 'are u'), (), CONFIRMATION, True),
+         (('cute', 'sexy'), (), AFFECTION, True),
+         (('why', 'y '), (), MISCHIEVIOUS, False)]
+
+TRIGGER = 'lychee'
+
+def match_reaction(content, author_name):
+    """Returns the emoji Lychee picks its reaction from, or None if the message does not mention Lychee.
+
+    The message is lowercased once, and most messages stop at the check for 'lychee'. The rules are then tried in
+    order with substring checks, which for messages of Discord's length beat a combined regular expression.
+
+    Parameters
+    ----------
+    content : str
+        The message's content
+    author_name : str
+        The name of the message's author
+    """
+    content = content.lower()
+    if not (TRIGGER in content):
+        return None
+    for keywords, required_keywords, emoji, uses_author_moods in RULES:
+        for temp_keyword in keywords:
+            if temp_keyword in content:
+                break
+        else:
+            continue
+        for temp_keyword in required_keywords:
+            if not (temp_keyword in content):
+                break
+        else:
+            if uses_author_moods:
+                return AUTHOR_MOODS.get(author_name, emoji)
+            return emoji
+    return RANDOM
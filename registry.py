@@ -0,0 +1,97 @@
+class Game_Registry():
+
+    """Stores every ongoing game so that one bot can host many games at once.
+
+    Attributes
+    ----------
+    games_by_channel : Dict[int, Game]
+        Each ongoing game keyed by the id of its general channel
+    games_by_member : Dict[int, Game]
+        Each ongoing game keyed by the id of every player in it
+    router : Shard_Router
+        Told which players each added and removed game has, so that their DM commands reach this worker, or None
+        when the bot runs without shards
+    on_change : Callable[[], None]
+        Called whenever a game is added or removed, such as to show how many games are ongoing (None to do nothing)
+    """
+
+    # Completed games are dropped lazily the next time they are looked up
+
+    def __init__(self, router=None, on_change=None):
+        self.games_by_channel = {} # Dict[int, Game]
+        self.games_by_member = {} # Dict[int, Game]
+        self.router = router
+        self.on_change = on_change
+
+    def __len__(self):
+        return len(self.get_games())
+
+    def add_game(self, game):
+        """Registers a game under its general channel and all of its players.
+
+        Parameters
+        ----------
+        game : Game
+            The game to register
+        """
+        self.games_by_channel[game.general_channel.id] = game
+        for temp_id_num in game.player_id_nums:
+            self.games_by_member[temp_id_num] = game
+        if self.router != None:
+            self.router.claim(game.player_id_nums)
+        if self.on_change != None:
+            self.on_change()
+
+    def remove_game(self, game):
+        was_registered = self.games_by_channel.get(game.general_channel.id) is game
+        if was_registered:
+            del self.games_by_channel[game.general_channel.id]
+        released_id_nums = []
+        for temp_id_num in game.player_id_nums:
+            if self.games_by_member.get(temp_id_num) is game:
+                del self.games_by_member[temp_id_num]
+                released_id_nums.append(temp_id_num)
+        if self.router != None and len(released_id_nums) != 0:
+            self.router.release(released_id_nums)
+        if self.on_change != None and was_registered:
+            self.on_change()
+
+    def get_game_from_channel(self, channel):
+        game = self.games_by_channel.get(channel.id)
+        if game != None and is_completed(game):
+            self.remove_game(game)
+            return None
+        return game
+
+    def get_game_from_member(self, member):
+        game = self.games_by_member.get(member.id)
+        if game != None and is_completed(game):
+            self.remove_game(game)
+            return None
+        return game
+
+    def has_game_in_channel(self, channel_id):
+        """Returns whether the channel with an id has an ongoing game, leaving a completed one for the next lookup
+        to drop."""
+        game = self.games_by_channel.get(channel_id)
+        return game != None and not is_completed(game)
+
+    def get_busy_id_nums(self, player_id_nums):
+        """Returns the id numbers that already belong to a player in an ongoing game."""
+        busy_id_nums = []
+        for temp_id_num in player_id_nums:
+            game = self.games_by_member.get(temp_id_num)
+            if game != None and not is_completed(game):
+                busy_id_nums.append(temp_id_num)
+        return busy_id_nums
+
+    def get_games(self):
+        """Returns every ongoing game, dropping the completed ones."""
+        for game in list(self.games_by_channel.values()):
+            if is_completed(game):
+                self.remove_game(game)
+        return list(self.games_by_channel.values())
+
+def is_completed(game):
+    # a game only has a completed attribute once finish_initialization has run
+    return getattr(game, 'completed', False) == True
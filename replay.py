@@ -0,0 +1,218 @@
+"""Replays logged games against the in-memory fake guild, without Discord.
+
+Every game seeds its own random.Random and logs every command it accepts, so replaying a game's log on the same
+code reaches the same result. Replaying the whole archive of logs after a change shows every game whose events or
+result changed, which makes `git bisect run python replay.py game_logs` find the commit that changed them.
+
+Run from the repository root with `python replay.py [directory]`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from dispatcher import PRIORITY_NORMAL, Dispatcher
+from fake_discord import Fake_Channel, Fake_Guild, Fake_Member, Fake_Transport, settle, settle_command
+from game import GAME_LOG_VERSION, Game
+from metrics import Metrics
+from player import decode_targets
+
+# How many games each process replays side by side, and how many games are sent to a process at once
+BATCH_SIZE = 100
+CHUNK_SIZE = 1000
+
+class Replay_Dispatcher(Dispatcher):
+
+    """A Dispatcher that makes every request straight away, in order.
+
+    The fake guild is never rate limited and answers every request at once, so the locks, slots and tasks a
+    Dispatcher uses to keep Discord's routes in order and by priority are skipped.
+    """
+
+    async def send(self, channel, content, priority=PRIORITY_NORMAL):
+        return await self.transport.send_message(channel, content)
+
+    async def send_many(self, messages, priority=PRIORITY_NORMAL):
+        return [await self.transport.send_message(channel, content) for channel, content in messages]
+
+    async def confirm(self, channel, content):
+        return await self.transport.send_message(channel, content)
+
+    async def call(self, route, request, priority=PRIORITY_NORMAL):
+        return await request()
+
+async def replay_team(game, player_indices):
+    await game.start_vote([game.players[index] for index in player_indices])
+
+async def replay_next_leader(game):
+    game.log_event('next_leader')
+    game.next_team_leader()
+
+async def replay_vote(game, player_index, vote):
+    await game.voter.record_vote(game.players[player_index], vote)
+
+async def replay_mission(game, player_index, card):
+    await game.missioner.record_mission_card(game.players[player_index], card)
+
+async def replay_action(game, player_index, action_name, targets):
+    temp_player = game.players[player_index]
+    temp_player.submit_action(getattr(temp_player, action_name), *decode_targets(game, targets))
+
+async def replay_timeout(game, player_index):
+    # replayed games never time out, so the logged timeout closes the action instead
+    game.log_event('timeout', player_index)
+    game.players[player_index].finish_action()
+
+async def replay_assassinate(game, player_index, assassinated_index):
+    await game.players[player_index].do_assassination(game.players[assassinated_index])
+
+async def replay_skip_action(game):
+    game.skip_action()
+
+async def replay_end_game(game):
+    await game.end_game()
+
+# How each kind of event is applied to a game, given the event's arguments
+EVENT_REPLAYERS = {'team': replay_team,
+                   'next_leader': replay_next_leader,
+                   'vote': replay_vote,
+                   'mission': replay_mission,
+                   'action': replay_action,
+                   'timeout': replay_timeout,
+                   'assassinate': replay_assassinate,
+                   'skip_action': replay_skip_action,
+                   'end_game': replay_end_game}
+
+async def replay(game_log):
+    """Replays a game from its log.
+
+    Each event is applied once the game has finished reacting to the one before it, or is waiting on a player's
+    action, which is how the commands were accepted when the game was played.
+
+    Parameters
+    ----------
+    game_log : Dict
+        A log from Game.get_log
+
+    Returns
+    -------
+    Game
+        The replayed game
+    """
+    if game_log['version'] != GAME_LOG_VERSION:
+        raise ValueError(f'Cannot replay a version {game_log["version"]} game log.')
+    transport = Fake_Transport()
+    guild = Fake_Guild(transport, 'Replay')
+    transport.guilds.append(guild)
+    general_channel = Fake_Channel(transport, 'general', guild)
+    guild.channels.append(general_channel)
+    guild.members = [Fake_Member(transport, temp_name) for temp_name in game_log['player_names']]
+    game = Game(guild, None, general_channel, [temp_member.id for temp_member in guild.members],
+                list(game_log['setup_resistance_roles']), list(game_log['setup_spy_roles']),
+                Replay_Dispatcher(transport, metrics=Metrics()), seed=game_log['seed'])
+    if game_log['has_night_actions'] == False:
+        game.stop_night_actions()
+    tasks = [asyncio.ensure_future(game.finish_initialization())]
+    await settle_command(tasks[0], game)
+    for event in game_log['events']:
+        await settle(tasks, game)
+        task = asyncio.ensure_future(EVENT_REPLAYERS[event[0]](game, *event[1:]))
+        tasks.append(task)
+        await settle_command(task, game)
+        tasks = [task for task in tasks if not task.done()]
+    await settle(tasks, game)
+    # only a log that stopped mid-game leaves a command waiting on an action that never comes
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return game
+
+def compare(game_log, game):
+    """Returns how a replayed game differs from its log, or an empty list if it matches."""
+    differences = []
+    if game.events != game_log['events']:
+        for x, (logged_event, replayed_event) in enumerate(zip(game_log['events'], game.events + [None] * len(game_log['events']))):
+            if logged_event != replayed_event:
+                differences.append(f'event {x} was {logged_event} but replayed as {replayed_event}')
+                break
+        else:
+            differences.append(f'{len(game.events) - len(game_log["events"])} more events were replayed than logged')
+    result = game.get_result()
+    for name, value in game_log['result'].items():
+        if result[name] != value:
+            differences.append(f'{name} was {value} but replayed as {result[name]}')
+    return differences
+
+async def replay_all(game_logs):
+    """Replays every game log.
+
+    Returns
+    -------
+    List[Tuple[int, List[str]]]
+        The index and differences of every game log that did not replay the same
+    """
+    async def check(game_log):
+        try:
+            return compare(game_log, await replay(game_log))
+        except Exception as error:
+            return [f'replay raised {error!r}']
+    mismatches = []
+    # games are replayed side by side so that each pass of the event loop advances many of them
+    for start in range(0, len(game_logs), BATCH_SIZE):
+        all_differences = await asyncio.gather(*[check(game_log) for game_log in game_logs[start:start + BATCH_SIZE]])
+        for x, differences in enumerate(all_differences):
+            if len(differences) != 0:
+                mismatches.append((start + x, differences))
+    return mismatches
+
+def replay_chunk(game_logs):
+    return asyncio.run(replay_all(game_logs))
+
+def replay_archive(game_logs, processes=None):
+    """Replays every game log across a process pool.
+
+    Returns
+    -------
+    List[Tuple[int, List[str]]]
+        The index and differences of every game log that did not replay the same
+    """
+    starts = range(0, len(game_logs), CHUNK_SIZE)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(replay_chunk, game_logs[start:start + CHUNK_SIZE]) for start in starts]
+        mismatches = []
+        for start, future in zip(starts, futures):
+            mismatches += [(start + x, differences) for x, differences in future.result()]
+    return mismatches
+
+def read_game_logs(directory):
+    file_names = sorted(file_name for file_name in os.listdir(directory) if file_name.endswith('.json'))
+    game_logs = []
+    for file_name in file_names:
+        with open(os.path.join(directory, file_name)) as file:
+            game_logs.append(json.load(file))
+    return (file_names, game_logs)
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays every logged game and reports the ones that changed.')
+    parser.add_argument('directory', nargs='?', default=os.getenv('LYCHEE_GAME_LOG_DIRECTORY', 'game_logs'),
+                        help='where the game logs are')
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    file_names, game_logs = read_game_logs(args.directory)
+    start = time.perf_counter()
+    mismatches = replay_archive(game_logs, args.processes)
+    elapsed = time.perf_counter() - start
+    for x, differences in mismatches:
+        print(f'{file_names[x]}: ' + '; '.join(differences))
+    print(f'Replayed {len(game_logs)} games in {elapsed:.2f} s ({len(game_logs) / max(elapsed, 1e-9):.0f} games per second), '
+          + f'{len(mismatches)} changed.')
+    if len(mismatches) != 0:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
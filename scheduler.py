@@ -0,0 +1,157 @@
+import asyncio
+import math
+
+class Deadline():
+
+    """A callback waiting on a Deadline_Scheduler.
+
+    Parameters
+    ----------
+    scheduler : Deadline_Scheduler
+        The scheduler it waits on
+    tick : int
+        The tick of the scheduler it is due at
+    callback : Callable
+        Called with no arguments once the deadline passes; a returned coroutine is run as a task
+
+    Attributes
+    ----------
+    cancelled : bool
+        Whether the deadline was cancelled or has already fired
+    scheduler
+    tick
+    callback
+    """
+
+    def __init__(self, scheduler, tick, callback):
+        self.scheduler = scheduler
+        self.tick = tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the callback from being called. Cancelling a deadline that has fired does nothing."""
+        if self.cancelled == False:
+            self.cancelled = True
+            self.scheduler.remove(self)
+
+class Deadline_Scheduler():
+
+    """Calls callbacks once their deadline passes, for every game at once, from a single timer wheel.
+
+    The wheel is a ring of slots one tick apart. A deadline waits in the slot of the tick it is due at, so scheduling
+    and cancelling one is a dict insert or delete however many are pending, and each tick only looks at one slot.
+    Deadlines more than one turn of the wheel away wait in their slot until the turn they are due in. One task turns
+    the wheel while any deadline is pending and stops when none are. Deadlines fire up to one tick late.
+
+    Parameters
+    ----------
+    tick : float
+        How many seconds apart the slots are
+    slot_count : int
+        How many slots the wheel has
+
+    Attributes
+    ----------
+    slots : List[Dict[Deadline, None]]
+        The deadlines waiting in each slot, in the order they were scheduled
+    current_tick : int
+        The next tick the wheel turns to
+    start_time : float
+        When tick 0 was, in event loop time
+    pending_count : int
+        How many deadlines are waiting
+    loop : asyncio.AbstractEventLoop
+        The event loop the wheel is turned in
+    task : asyncio.Task
+        Turns the wheel, or None while no deadline is pending
+    running_callbacks : Set[asyncio.Task]
+        The tasks running coroutines returned by callbacks, kept until they finish
+    tick
+    """
+
+    def __init__(self, tick=1.0, slot_count=512):
+        self.tick = tick
+        self.slots = [{} for x in range(slot_count)]
+        self.current_tick = 0
+        self.start_time = 0.0
+        self.pending_count = 0
+        self.loop = None
+        self.task = None
+        self.running_callbacks = set()
+
+    def schedule(self, delay, callback):
+        """Calls a callback once a number of seconds have passed.
+
+        Parameters
+        ----------
+        delay : float
+            How many seconds to wait
+        callback : Callable
+            Called with no arguments; a returned coroutine is run as a task
+
+        Returns
+        -------
+        Deadline
+            The deadline, to cancel it
+        """
+        loop = asyncio.get_running_loop()
+        if loop != self.loop:
+            # deadlines left in another event loop can never fire
+            self.slots = [{} for x in range(len(self.slots))]
+            self.pending_count = 0
+            self.loop = loop
+            self.task = None
+        if self.task == None:
+            # the wheel restarts from tick 0 whenever it was stopped, as no deadline is waiting in it
+            self.current_tick = 0
+            self.start_time = loop.time()
+        tick = max(math.ceil((loop.time() + delay - self.start_time) / self.tick), self.current_tick)
+        deadline = Deadline(self, tick, callback)
+        self.slots[tick % len(self.slots)][deadline] = None
+        self.pending_count += 1
+        if self.task == None:
+            self.task = asyncio.ensure_future(self.turn())
+        return deadline
+
+    def remove(self, deadline):
+        slot = self.slots[deadline.tick % len(self.slots)]
+        if deadline in slot:
+            del slot[deadline]
+            self.pending_count -= 1
+
+    async def turn(self):
+        while self.pending_count != 0:
+            delay = self.start_time + self.current_tick * self.tick - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            slot = self.slots[self.current_tick % len(self.slots)]
+            due_deadlines = [deadline for deadline in slot if deadline.tick <= self.current_tick]
+            for deadline in due_deadlines:
+                del slot[deadline]
+                deadline.cancelled = True
+            self.pending_count -= len(due_deadlines)
+            # deadlines scheduled by the callbacks below start from the next tick
+            self.current_tick += 1
+            for deadline in due_deadlines:
+                self.fire(deadline)
+        self.task = None
+
+    def fire(self, deadline):
+        try:
+            result = deadline.callback()
+        except Exception as error:
+            self.report(error)
+            return
+        if asyncio.iscoroutine(result):
+            task = asyncio.ensure_future(result)
+            self.running_callbacks.add(task)
+            task.add_done_callback(self.finish_callback)
+
+    def finish_callback(self, task):
+        self.running_callbacks.discard(task)
+        if not task.cancelled() and task.exception() != None:
+            self.report(task.exception())
+
+    def report(self, error):
+        self.loop.call_exception_handler({'message': 'Unhandled exception in a deadline callback', 'exception': error})
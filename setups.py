@@ -0,0 +1,27 @@
+"""The role pools dealt by each start command.
+
+Each function returns (all_resistance_roles, all_spy_roles) for a game with the given number of players. Game
+shuffles both pools and deals from them, so a pool may hold more roles than the game needs.
+"""
+
+def get_vanilla_roles(player_count):
+    return (['Resistance', 'Resistance', 'Resistance', 'Resistance', 'Resistance', 'Resistance'],
+            ['Spy', 'Spy', 'Spy', 'Spy'])
+
+def get_commander_roles(player_count):
+    all_resistance_roles = ['Commander', 'Bodyguard', 'Resistance']
+    all_spy_roles = ['Assassin', 'False Commander']
+    while (len(all_resistance_roles) + len(all_spy_roles)) < player_count:
+        if (len(all_resistance_roles) + len(all_spy_roles)) % 2 == 1:
+            all_resistance_roles.append('Resistance')
+        else:
+            all_spy_roles.append('Spy')
+    return (all_resistance_roles, all_spy_roles)
+
+def get_party_roles(player_count):
+    return (['President', 'Officer', 'Gambler', 'Psychic', 'Witch', 'Freelancer', 'Informant',
+             'Resistance Reverser', 'Professor', 'Resistance Clown', 'Traditionalist', 'Librarian'],
+            ['Organizer', 'Martyr', 'Bomber', 'Angel', 'Spy Reverser', 'Silencer', 'Victimizer',
+             'Spy Clown', 'Timekeeper', 'Mad Scientist'])
+
+SETUPS = {'vanilla': get_vanilla_roles, 'commander': get_commander_roles, 'party': get_party_roles}
@@ -0,0 +1,200 @@
+"""Runs Lychee as several worker processes, each connected to Discord as a range of shards.
+
+Discord sends every guild's events to one shard, picked from the guild's id, so each worker hosts the games of the
+guilds on its shards and no two workers share a game. Direct messages always arrive on shard 0 instead, so the
+worker with shard 0 routes each DM command to the worker hosting its author's game: every worker claims the players
+of its games with that worker, which forwards a claimed player's DM by channel and message id for the owning worker
+to fetch and run.
+
+Run from the repository root with `python shards.py --workers 4 --shards 8`.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+
+# Discord only sends direct messages to shard 0
+DM_SHARD_ID = 0
+
+def get_shard_id(guild_id, shard_count):
+    """Returns the shard Discord sends a guild's events to."""
+    return (guild_id >> 22) % shard_count
+
+def get_shard_ranges(shard_count, worker_count):
+    """Splits the shards into one contiguous range per worker, giving the first workers one more shard each when
+    they do not divide evenly.
+
+    Returns
+    -------
+    List[List[int]]
+        The shard ids of each worker
+    """
+    shard_ranges = []
+    start = 0
+    for x in range(worker_count):
+        size = shard_count // worker_count
+        if x < shard_count % worker_count:
+            size += 1
+        shard_ranges.append(list(range(start, start + size)))
+        start += size
+    return shard_ranges
+
+def get_worker_index(shard_ranges, shard_id):
+    for x in range(len(shard_ranges)):
+        if shard_id in shard_ranges[x]:
+            return x
+    return None
+
+class Shard_Router():
+
+    """Passes DM commands and player claims between the worker processes, one inbox queue per worker.
+
+    Every worker sends the worker with shard 0 a claim for the players of each game it starts or restores and a
+    release once the game is removed. That worker keeps who claimed each player and forwards their DM commands.
+    A later claim replaces an earlier one, so a player who moves on to a game on another worker follows it.
+
+    Parameters
+    ----------
+    worker_index : int
+        This worker
+    inboxes : List[multiprocessing.Queue]
+        The inbox of every worker, by worker index
+    dm_worker_index : int
+        The worker with shard 0
+
+    Attributes
+    ----------
+    owners_by_member : Dict[int, int]
+        The worker hosting each claimed player's game, by the player's id; only kept by the worker with shard 0
+    handlers : Dict[str, Callable]
+        The coroutine function run for each kind of message in the inbox, such as 'dm' for a forwarded DM command
+    task : asyncio.Task
+        Reads the inbox, or None until start is called
+    running_handlers : Set[asyncio.Task]
+        The tasks running handlers, kept until they finish
+    worker_index
+    inboxes
+    dm_worker_index
+    """
+
+    def __init__(self, worker_index, inboxes, dm_worker_index=0):
+        self.worker_index = worker_index
+        self.inboxes = inboxes
+        self.dm_worker_index = dm_worker_index
+        self.owners_by_member = {} # Dict[int, int]
+        self.handlers = {} # Dict[str, Callable]
+        self.task = None # asyncio.Task
+        self.running_handlers = set() # Set[asyncio.Task]
+
+    def claim(self, id_nums):
+        """Routes the DM commands of some players to this worker."""
+        self.send(self.dm_worker_index, ('claim', self.worker_index, list(id_nums)))
+
+    def release(self, id_nums):
+        """Stops routing the DM commands of some players to this worker, unless another worker has claimed them since."""
+        self.send(self.dm_worker_index, ('release', self.worker_index, list(id_nums)))
+
+    def get_owner(self, id_num):
+        """Returns the worker that claimed a player, or None if no worker has."""
+        return self.owners_by_member.get(id_num)
+
+    def forward(self, worker_index, command):
+        """Hands a DM command to the worker hosting its author's game, whose 'dm' handler is called with it."""
+        self.send(worker_index, ('dm', *command))
+
+    def send(self, worker_index, message):
+        """Puts a message in a worker's inbox, or handles it at once if the worker is this one."""
+        if worker_index == self.worker_index:
+            self.receive(message)
+        else:
+            self.inboxes[worker_index].put(message)
+
+    def start(self, handlers):
+        """Starts reading the inbox in the running event loop.
+
+        Parameters
+        ----------
+        handlers : Dict[str, Callable]
+            The coroutine function to call with the rest of each message, by the kind of message
+        """
+        self.handlers = handlers
+        self.task = asyncio.ensure_future(self.listen())
+
+    async def listen(self):
+        """Handles every message put in the inbox until a ('stop',) message."""
+        loop = asyncio.get_running_loop()
+        inbox = self.inboxes[self.worker_index]
+        while True:
+            # the queue blocks, so it is read from a thread
+            message = await loop.run_in_executor(None, inbox.get)
+            if message[0] == 'stop':
+                return
+            self.receive(message)
+
+    def receive(self, message):
+        if message[0] == 'claim':
+            for temp_id_num in message[2]:
+                self.owners_by_member[temp_id_num] = message[1]
+        elif message[0] == 'release':
+            for temp_id_num in message[2]:
+                if self.owners_by_member.get(temp_id_num) == message[1]:
+                    del self.owners_by_member[temp_id_num]
+        else:
+            task = asyncio.ensure_future(self.handlers[message[0]](*message[1:]))
+            self.running_handlers.add(task)
+            task.add_done_callback(self.finish_handler)
+
+    def finish_handler(self, task):
+        self.running_handlers.discard(task)
+        if not task.cancelled() and task.exception() != None:
+            asyncio.get_running_loop().call_exception_handler({'message': 'Unhandled exception in a routed message',
+                                                               'exception': task.exception()})
+
+def run_worker(worker_index, shard_ids, shard_count, inboxes):
+    """Connects one worker to Discord as its shards and runs the bot until it stops."""
+    os.environ['LYCHEE_SHARD_IDS'] = ','.join([str(shard_id) for shard_id in shard_ids])
+    os.environ['LYCHEE_SHARD_COUNT'] = str(shard_count)
+    if os.getenv('LYCHEE_METRICS_PORT') != None:
+        # every worker serves its own metrics on the next port
+        os.environ['LYCHEE_METRICS_PORT'] = str(int(os.getenv('LYCHEE_METRICS_PORT')) + worker_index)
+    # lychee.py builds its client from the shard settings when it is imported
+    import lychee
+    shard_ranges = get_shard_ranges(shard_count, len(inboxes))
+    lychee.use_router(Shard_Router(worker_index, inboxes, get_worker_index(shard_ranges, DM_SHARD_ID)))
+    lychee.client.run(lychee.TOKEN)
+
+def start_workers(worker_count, shard_count, target, *args):
+    """Starts one process per worker, each calling target(worker_index, shard_ids, shard_count, inboxes, *args).
+
+    Returns
+    -------
+    Tuple[List[multiprocessing.Process], List[multiprocessing.Queue]]
+        The started workers and their inboxes
+    """
+    context = multiprocessing.get_context('spawn')
+    inboxes = [context.Queue() for x in range(worker_count)]
+    workers = []
+    shard_ranges = get_shard_ranges(shard_count, worker_count)
+    for x in range(worker_count):
+        worker = context.Process(target=target, args=(x, shard_ranges[x], shard_count, inboxes, *args))
+        worker.start()
+        workers.append(worker)
+    return (workers, inboxes)
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs Lychee as several worker processes, each with a range of shards.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shards', type=int, default=None, help='defaults to one shard per worker')
+    args = parser.parse_args()
+    shard_count = args.shards
+    if shard_count == None:
+        shard_count = args.workers
+    if shard_count < args.workers:
+        parser.error('every worker needs at least one shard')
+    workers, inboxes = start_workers(args.workers, shard_count, run_worker)
+    for worker in workers:
+        worker.join()
+
+if __name__ == '__main__':
+    main()
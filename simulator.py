@@ -0,0 +1,297 @@
+"""Estimates how balanced each setup is by playing millions of games with simple scripted players.
+
+Games are played in batches. Every step of a batch (dealing roles, proposing teams, voting, conducting missions)
+is a NumPy array operation over all of the batch's games at once, and batches are spread across a process pool.
+
+The rules are those of Game: the Round_Tracker team sizes, the cumulative 5 rejected teams, the switch, fail and
+double-fail results of end_mission, the Assassin at 3 successful missions, and the vote and mission modifiers of
+the Usurper, Contrarian, Muckraker, Timekeeper, Dueler, Traditionalist, Bomber, Martyr, Angel and both Reversers.
+The only night action simulated is the Bomber's, which sets its bomb the night after it plays success. Other night
+actions, silencing and everything players learn are not simulated, so roles that only gather information play like
+a plain Resistance or Spy.
+
+The scripted players:
+    the team leader picks themself and random other players, except that a Resistance leader reads the table
+    correctly with probability RESISTANCE_INSIGHT and then leaves the Spies off if they can
+    every Resistance player reads each proposed team correctly with probability RESISTANCE_INSIGHT and then accepts
+    it if and only if there is no Spy on it, and otherwise accepts teams they are on and other teams with
+    probability RESISTANCE_ACCEPT_CHANCE. Everyone in the Resistance accepts the team on the 5th vote
+    the Spies accept a team if and only if there is a Spy on it
+    the Resistance play success, or switch and then fail if success is blocked
+    the Spies play fail, or success if fail is blocked. The Spy Reverser plays switch when it is the only Spy on
+    the team, and the Bomber plays success the first time it can to set its bomb
+    the Assassin guesses a random Resistance player
+
+Run from the repository root with `python simulator.py`, for example
+`python simulator.py --games 1000000 --setups commander party --players 5 10`.
+"""
+
+import argparse
+import numpy as np
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from game import Round_Tracker
+from setups import SETUPS
+
+SPY_COUNTS = {5: 2, 6: 2, 7: 3, 8: 3, 9: 4, 10: 4} # as dealt by Game.finish_initialization
+MAX_PROPOSALS = 9 # 5 missions and 4 rejected teams; the 5th rejected team ends the game
+RESISTANCE_ACCEPT_CHANCE = 0.5
+RESISTANCE_INSIGHT = 0.5
+DEFAULT_GAMES = 1000000
+BATCH_SIZE = 50000
+
+SUCCESS = 0
+FAIL = 1
+SWITCH = 2
+
+def deal_roles(rng, game_count, player_count, all_resistance_roles, all_spy_roles, role_names):
+    """Deals every game's roles the way Game.finish_initialization does.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Each seat's index into role_names, and whether each seat is a Spy
+    """
+    spy_count = SPY_COUNTS[player_count]
+    rows = np.arange(game_count)[:, None]
+    # spies are sampled from every seat but the last, as in finish_initialization
+    spy_seats = np.argsort(rng.random((game_count, player_count - 1)), axis=1)[:, :spy_count]
+    spies = np.zeros((game_count, player_count), dtype=bool)
+    spies[rows, spy_seats] = True
+    resistance_pool = np.array([role_names.index(role) for role in all_resistance_roles])
+    spy_pool = np.array([role_names.index(role) for role in all_spy_roles])
+    resistance_picks = np.argsort(rng.random((game_count, len(resistance_pool))), axis=1)[:, :player_count - spy_count]
+    spy_picks = np.argsort(rng.random((game_count, len(spy_pool))), axis=1)[:, :spy_count]
+    roles = np.empty((game_count, player_count), dtype=np.int8)
+    roles[spies] = spy_pool[spy_picks].ravel()
+    roles[~spies] = resistance_pool[resistance_picks].ravel()
+    return (roles, spies)
+
+def pick_random_seat(rng, candidates):
+    """Returns a random seat out of each game's candidates and whether the game had any."""
+    keys = np.where(candidates, rng.random(candidates.shape), -1.0)
+    return (np.argmax(keys, axis=1), candidates.any(axis=1))
+
+def simulate_batch(setup, player_count, game_count, seed):
+    """Plays a batch of games with the same setup and player count.
+
+    Parameters
+    ----------
+    setup : str
+        A key of setups.SETUPS
+    player_count : int
+        5-10
+    game_count : int
+        How many games to play
+    seed : int or np.random.SeedSequence
+        Seeds the batch's random number generator
+
+    Returns
+    -------
+    Dict
+        'games' and 'resistance_wins', and per role name, how many seats were dealt the role ('role_seats') and how
+        many of those seats were on the winning side ('role_wins')
+    """
+    rng = np.random.default_rng(seed)
+    all_resistance_roles, all_spy_roles = SETUPS[setup](player_count)
+    role_names = sorted(set(all_resistance_roles) | set(all_spy_roles))
+    roles, spies = deal_roles(rng, game_count, player_count, all_resistance_roles, all_spy_roles, role_names)
+    spy_count = SPY_COUNTS[player_count]
+    rows = np.arange(game_count)
+
+    def has_role(name):
+        if not (name in role_names):
+            return np.zeros((game_count, player_count), dtype=bool)
+        return roles == role_names.index(name)
+
+    # seats holding each modifier; the abilities that only trigger once are cleared when they trigger
+    usurper_ready = has_role('Usurper')
+    contrarian_ready = has_role('Contrarian')
+    muckraker = has_role('Muckraker')
+    timekeeper = has_role('Timekeeper')
+    dueler = has_role('Dueler')
+    traditionalist = has_role('Traditionalist')
+    bomber_ready = has_role('Bomber')
+    bomb_set = np.zeros(game_count, dtype=bool)
+    martyr_ready = has_role('Martyr')
+    angel = has_role('Angel')
+    resistance_reverser = has_role('Resistance Reverser')
+    spy_reverser = has_role('Spy Reverser')
+    has_assassin = has_role('Assassin').any(axis=1)
+    commander = has_role('Commander')
+
+    team_sizes = np.array(Round_Tracker(player_count).team_sizes[player_count - 4])
+    active = np.ones(game_count, dtype=bool)
+    resistance_won = np.zeros(game_count, dtype=bool)
+    success_count = np.zeros(game_count, dtype=np.int8)
+    fail_count = np.zeros(game_count, dtype=np.int8)
+    rejected_team_count = np.zeros(game_count, dtype=np.int8)
+    round_index = np.zeros(game_count, dtype=np.int8)
+    team_leader_index = np.zeros(game_count, dtype=np.int64)
+
+    for proposal in range(MAX_PROPOSALS):
+        # team building: the leader and random other players
+        team_leader_index = (team_leader_index + 1) % player_count
+        team_size = team_sizes[np.minimum(round_index, 4)]
+        double_fail = team_size != np.floor(team_size)
+        keys = rng.random((game_count, player_count))
+        insightful_leader = ~spies[rows, team_leader_index] & (rng.random(game_count) < RESISTANCE_INSIGHT)
+        keys += insightful_leader[:, None] & spies
+        keys[rows, team_leader_index] = -1.0
+        on_team = np.argsort(np.argsort(keys, axis=1), axis=1) < team_size.astype(np.int64)[:, None]
+        spies_on_team = (on_team & spies).sum(axis=1)
+
+        # vote
+        hammer = rejected_team_count == 4
+        resistance_accept = on_team | (rng.random((game_count, player_count)) < RESISTANCE_ACCEPT_CHANCE)
+        insightful = rng.random((game_count, player_count)) < RESISTANCE_INSIGHT
+        resistance_accept = np.where(insightful, (spies_on_team == 0)[:, None], resistance_accept) | hammer[:, None]
+        accept = np.where(spies, (spies_on_team > 0)[:, None], resistance_accept)
+        # Usurper: the first time they vote with all of the Resistance, everyone's vote is swapped
+        usurper_accept = (accept & usurper_ready).any(axis=1)
+        resistance_accept_count = (accept & ~spies).sum(axis=1)
+        triggered = usurper_ready.any(axis=1) & np.where(usurper_accept, resistance_accept_count == player_count - spy_count,
+                                                         resistance_accept_count == 0)
+        accept[triggered] = ~accept[triggered]
+        usurper_ready[triggered] = False
+        # Contrarian: the first time they vote with the minority, everyone's vote is swapped
+        contrarian_accept = (accept & contrarian_ready).any(axis=1)
+        accept_count = accept.sum(axis=1)
+        triggered = contrarian_ready.any(axis=1) & np.where(contrarian_accept, accept_count * 2 < player_count,
+                                                            accept_count * 2 > player_count)
+        accept[triggered] = ~accept[triggered]
+        contrarian_ready[triggered] = False
+        # Muckraker: whenever they vote with all of the Spies, they and a random player on the other side swap votes
+        muckraker_accept = (accept & muckraker).any(axis=1)
+        spy_accept_count = (accept & spies).sum(axis=1)
+        accept_count = accept.sum(axis=1)
+        triggered = muckraker.any(axis=1) & np.where(muckraker_accept, (spy_accept_count == spy_count) & (accept_count != player_count),
+                                                     (spy_accept_count == 0) & (accept_count != 0))
+        other_seat, has_other = pick_random_seat(rng, accept != muckraker_accept[:, None])
+        accept[rows[triggered], other_seat[triggered]] = ~accept[rows[triggered], other_seat[triggered]]
+        accept[triggered[:, None] & muckraker] = ~accept[triggered[:, None] & muckraker]
+        # Timekeeper: rejecting during the 5th vote makes everyone reject
+        triggered = hammer & (~accept & timekeeper).any(axis=1)
+        accept[triggered] = False
+
+        passed = active & (accept.sum(axis=1) * 2 > player_count)
+        rejected = active & ~passed
+        rejected_team_count += rejected
+
+        # pre-mission modifiers
+        can_success = np.ones((game_count, player_count), dtype=bool)
+        can_fail = ~spy_reverser
+        can_switch = resistance_reverser | spy_reverser
+        # Dueler: one Spy with them cannot fail, or they cannot succeed with two or more
+        dueling = (dueler & on_team).any(axis=1)
+        can_fail &= ~((dueling & (spies_on_team == 1))[:, None] & spies & on_team)
+        can_success &= ~((dueling & (spies_on_team >= 2))[:, None] & dueler)
+        # Traditionalist: no one can switch while they are on the team
+        can_switch &= ~(traditionalist & on_team).any(axis=1)[:, None]
+        # Bomber: a set bomb stops a random Resistance player on the team from succeeding
+        bombed_seat, has_target = pick_random_seat(rng, on_team & ~spies & can_success)
+        bombed = passed & bomb_set & has_target
+        can_success[rows[bombed], bombed_seat[bombed]] = False
+        bomb_set &= ~passed
+
+        # mission cards
+        resistance_card = np.where(can_success, SUCCESS, np.where(can_switch, SWITCH, FAIL))
+        spy_card = np.where(can_fail, FAIL, np.where(can_success, SUCCESS, SWITCH))
+        spy_card = np.where(spy_reverser, np.where((spies_on_team == 1)[:, None], SWITCH, SUCCESS), spy_card)
+        spy_card = np.where(bomber_ready & can_success, SUCCESS, spy_card)
+        cards = np.where(spies, spy_card, resistance_card)
+        # Martyr: the first time they fail, everyone fails
+        triggered = (martyr_ready & on_team & (cards == FAIL)).any(axis=1) & passed
+        cards[triggered[:, None] & on_team] = FAIL
+        martyr_ready[triggered] = False
+        # Angel: with at least two fails, their fail is swapped to success
+        conducted_fail_count = (on_team & (cards == FAIL)).sum(axis=1)
+        swapped = angel & on_team & (cards == FAIL) & (conducted_fail_count >= 2)[:, None]
+        cards[swapped] = SUCCESS
+
+        # end_mission: an odd number of switches swaps the result, and a double-fail round needs two fails
+        conducted_fail_count = (on_team & (cards == FAIL)).sum(axis=1)
+        conducted_switch_count = (on_team & (cards == SWITCH)).sum(axis=1)
+        failed = (conducted_fail_count >= np.where(double_fail, 2, 1)) ^ (conducted_switch_count % 2 == 1)
+        success_count += passed & ~failed
+        fail_count += passed & failed
+        round_index += passed
+        # Bomber: the night after they play success, their bomb is set for the next mission
+        setting = passed & (bomber_ready & on_team & (cards == SUCCESS)).any(axis=1)
+        bomb_set |= setting
+        bomber_ready[setting] = False
+
+        # check_end_game
+        assassinated_seat, has_guess = pick_random_seat(rng, ~spies)
+        assassinated = has_assassin & commander[rows, assassinated_seat]
+        resistance_win = active & (success_count >= 3) & ~assassinated
+        spy_win = active & ((fail_count >= 3) | (rejected_team_count >= 5) | ((success_count >= 3) & assassinated))
+        resistance_won |= resistance_win
+        active &= ~(resistance_win | spy_win)
+        if not active.any():
+            break
+
+    winners = np.where(resistance_won[:, None], ~spies, spies)
+    role_seats = np.bincount(roles.ravel(), minlength=len(role_names))
+    role_wins = np.bincount(roles[winners], minlength=len(role_names))
+    return {'games': game_count, 'resistance_wins': int(resistance_won.sum()),
+            'role_seats': dict(zip(role_names, role_seats.tolist())), 'role_wins': dict(zip(role_names, role_wins.tolist()))}
+
+def merge_results(results):
+    merged = {'games': 0, 'resistance_wins': 0, 'role_seats': {}, 'role_wins': {}}
+    for result in results:
+        merged['games'] += result['games']
+        merged['resistance_wins'] += result['resistance_wins']
+        for role in result['role_seats']:
+            merged['role_seats'][role] = merged['role_seats'].get(role, 0) + result['role_seats'][role]
+            merged['role_wins'][role] = merged['role_wins'].get(role, 0) + result['role_wins'][role]
+    return merged
+
+def simulate(setups, player_counts, game_count, processes=None, seed=0):
+    """Plays game_count games of every setup at every player count across a process pool.
+
+    Returns
+    -------
+    Dict[Tuple[str, int], Dict]
+        The merged results of simulate_batch for each (setup, player_count)
+    """
+    jobs = []
+    for setup in setups:
+        for player_count in player_counts:
+            for start in range(0, game_count, BATCH_SIZE):
+                jobs.append((setup, player_count, min(BATCH_SIZE, game_count - start)))
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(simulate_batch, setup, player_count, batch_size, seeds[x])
+                   for x, (setup, player_count, batch_size) in enumerate(jobs)]
+        batch_results = [future.result() for future in futures]
+    results = {}
+    for (setup, player_count, batch_size), result in zip(jobs, batch_results):
+        results.setdefault((setup, player_count), []).append(result)
+    return {key: merge_results(results[key]) for key in results}
+
+def print_results(results):
+    for (setup, player_count), result in results.items():
+        print(f'{setup} with {player_count} players: the Resistance won {result["resistance_wins"] / result["games"]:.1%} of {result["games"]} games')
+        for role in sorted(result['role_seats'], key=lambda role: -result['role_wins'][role] / max(result['role_seats'][role], 1)):
+            if result['role_seats'][role] != 0:
+                print(f'    {role:<20} {result["role_wins"][role] / result["role_seats"][role]:>7.1%}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulates games to estimate the win rate of every setup and role.')
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES, help='games per setup and player count')
+    parser.add_argument('--setups', nargs='+', default=list(SETUPS), choices=list(SETUPS))
+    parser.add_argument('--players', nargs=2, type=int, default=[5, 10], metavar=('MIN', 'MAX'))
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    results = simulate(args.setups, range(args.players[0], args.players[1] + 1), args.games, args.processes, args.seed)
+    print_results(results)
+    print(f'Simulated {sum(result["games"] for result in results.values())} games in {time.perf_counter() - start:.1f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+
+class Snapshot_Store():
+
+    """Writes a snapshot of every ongoing game to disk so that games survive the bot restarting.
+
+    Snapshots are written behind the game: save only queues the snapshot, and a background task writes it from a
+    worker thread. If a game is saved again before its last snapshot is written, only the newest one is written.
+
+    Parameters
+    ----------
+    directory : str
+        Where each game's snapshot is written, as <key>.json
+
+    Attributes
+    ----------
+    pending : Dict[Union[int, str], Dict]
+        The newest snapshot of each game that is not written yet, None to delete the game's snapshot
+    writers : Dict[Union[int, str], asyncio.Task]
+        The task writing each game's pending snapshots
+    directory
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.pending = {} # Dict[Union[int, str], Dict]
+        self.writers = {} # Dict[Union[int, str], asyncio.Task]
+
+    def save(self, key, snapshot):
+        """Queues a game's snapshot to be written.
+
+        Parameters
+        ----------
+        key : Union[int, str]
+            Names the file: the id of the game's general channel for snapshots
+        snapshot : Dict
+            The snapshot from Game.get_snapshot, or any other JSON types such as a log from Game.get_log
+        """
+        self.pending[key] = snapshot
+        if not (key in self.writers):
+            self.writers[key] = asyncio.ensure_future(self.write_pending(key))
+
+    def delete(self, key):
+        self.save(key, None)
+
+    async def write_pending(self, key):
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self.pending:
+                snapshot = self.pending.pop(key)
+                await loop.run_in_executor(None, self.write, key, snapshot)
+        finally:
+            del self.writers[key]
+
+    async def flush(self):
+        """Waits until every queued snapshot is written."""
+        while len(self.writers) != 0:
+            await asyncio.gather(*list(self.writers.values()))
+
+    def get_path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def write(self, key, snapshot):
+        # runs in a worker thread; the file is replaced in one step so a crash never leaves half a snapshot
+        path = self.get_path(key)
+        if snapshot == None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as file:
+            file.write(encode_snapshot(snapshot))
+        os.replace(temp_path, path)
+
+    async def load_all(self):
+        """Reads every snapshot on disk.
+
+        Returns
+        -------
+        List[Dict]
+            Every game's snapshot
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self.read_all)
+
+    def read_all(self):
+        snapshots = []
+        if not os.path.isdir(self.directory):
+            return snapshots
+        for file_name in sorted(os.listdir(self.directory)):
+            if file_name.endswith('.json'):
+                with open(os.path.join(self.directory, file_name)) as file:
+                    snapshots.append(json.load(file))
+        return snapshots
+
+def encode_snapshot(snapshot):
+    return json.dumps(snapshot, separators=(',', ':'))
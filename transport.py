@@ -0,0 +1,314 @@
+import collections
+import discord
+
+# How many DM channels Caching_Transport keeps across every game, far more than the players of the games running
+# at once
+DM_CHANNEL_CACHE_SIZE = 10000
+
+class Closed_DM_Error(Exception):
+
+    """Raised when a member does not accept direct messages from the bot."""
+
+class Transport():
+
+    """Every call the game engine makes to Discord.
+
+    Discord_Transport makes the calls against the real API through the bot. Fake_Transport (fake_discord.py)
+    keeps a whole guild in memory so that games can run without a gateway connection.
+    """
+
+    async def send_message(self, channel, content):
+        """Sends a message and returns it.
+
+        Raises
+        ------
+        Closed_DM_Error
+            If the channel is a DM channel whose member does not accept direct messages from the bot
+        """
+        raise NotImplementedError
+
+    async def edit_message(self, message, content, remove_buttons=False):
+        """Edits a message's content, also removing its buttons if remove_buttons, after which their clicks are no
+        longer handled."""
+        raise NotImplementedError
+
+    async def send_buttons(self, channel, content, buttons, on_click):
+        """Sends a message with a button for each (custom id, label) and returns it. Every click calls
+        on_click(member, custom_id, respond), where respond(content) answers the clicking member alone, until the
+        buttons are removed with edit_message."""
+        raise NotImplementedError
+
+    async def pin_message(self, message):
+        raise NotImplementedError
+
+    async def unpin_message(self, channel, message_id):
+        """Unpins a message by id, doing nothing if it is already unpinned or deleted."""
+        raise NotImplementedError
+
+    async def create_dm(self, member):
+        """Opens the member's DM channel and returns it."""
+        raise NotImplementedError
+
+    def get_dm_channel(self, member):
+        """Returns the member's DM channel if it is open and cached, else None."""
+        raise NotImplementedError
+
+    async def add_role(self, member, role):
+        raise NotImplementedError
+
+    async def remove_role(self, member, role):
+        raise NotImplementedError
+
+    async def set_presence(self, status, activity):
+        """Sets the bot's status ('online', 'idle', or None to leave it online) and the game it is playing."""
+        raise NotImplementedError
+
+    def get_channel(self, id_num):
+        raise NotImplementedError
+
+    def get_member(self, guild, id_num):
+        """Returns a member from the member cache, or None if they are not cached."""
+        raise NotImplementedError
+
+    async def fetch_message(self, channel_id, message_id):
+        """Fetches a message by id from a guild channel or DM channel, which need not be cached."""
+        raise NotImplementedError
+
+    async def query_members(self, guild, id_nums):
+        """Fetches up to 100 members by id from the gateway, adding them to the member cache, and returns them."""
+        raise NotImplementedError
+
+    def forget_members(self, guild, members):
+        """Drops members from the member cache once their game has ended, if the cache only holds players."""
+        raise NotImplementedError
+
+    def get_role(self, guild, name):
+        raise NotImplementedError
+
+class Discord_Transport(Transport):
+
+    """Makes every call against the real Discord API.
+
+    Parameters
+    ----------
+    client : discord.Client
+        Lychee (The current bot)
+    keep_members : bool
+        Whether members stay cached after their game, False in lean mode where the member cache only holds players
+
+    Attributes
+    ----------
+    views : Dict[int, discord.ui.View]
+        The view handling the clicks on each message sent with buttons by message id, until its buttons are removed
+    client
+    keep_members
+    """
+
+    def __init__(self, client, keep_members=True):
+        self.client = client
+        self.keep_members = keep_members
+        self.views = {} # Dict[int, discord.ui.View]
+
+    async def send_message(self, channel, content):
+        try:
+            return await channel.send(content)
+        except discord.Forbidden as error:
+            if isinstance(channel, discord.DMChannel):
+                raise Closed_DM_Error(f'{channel.recipient} does not accept direct messages') from error
+            raise
+
+    async def edit_message(self, message, content, remove_buttons=False):
+        if remove_buttons:
+            view = self.views.pop(message.id, None)
+            if view != None:
+                # discord.py keeps listening for a view's clicks until it is stopped
+                view.stop()
+            await message.edit(content=content, view=None)
+        else:
+            await message.edit(content=content)
+
+    async def send_buttons(self, channel, content, buttons, on_click):
+        # buttons are only kept in memory, so they stop working after a restart; resumed phases send new ones
+        view = discord.ui.View(timeout=None)
+        for custom_id, label in buttons:
+            button = discord.ui.Button(label=label, custom_id=custom_id)
+            button.callback = make_button_callback(custom_id, on_click)
+            view.add_item(button)
+        message = await channel.send(content, view=view)
+        self.views[message.id] = view
+        return message
+
+    async def pin_message(self, message):
+        await message.pin()
+
+    async def unpin_message(self, channel, message_id):
+        try:
+            await self.client.http.unpin_message(channel.id, message_id)
+        except discord.NotFound:
+            pass
+
+    async def create_dm(self, member):
+        return await member.create_dm()
+
+    def get_dm_channel(self, member):
+        return member.dm_channel
+
+    async def add_role(self, member, role):
+        await member.add_roles(role)
+
+    async def remove_role(self, member, role):
+        await member.remove_roles(role)
+
+    async def set_presence(self, status, activity):
+        if status == None:
+            await self.client.change_presence(activity=discord.Game(activity))
+        else:
+            await self.client.change_presence(status=getattr(discord.Status, status), activity=discord.Game(activity))
+
+    def get_channel(self, id_num):
+        return self.client.get_channel(id_num)
+
+    def get_member(self, guild, id_num):
+        return guild.get_member(id_num)
+
+    async def fetch_message(self, channel_id, message_id):
+        channel = self.client.get_channel(channel_id)
+        if channel == None:
+            # DM channels are only cached by the shard that receives their messages
+            channel = await self.client.fetch_channel(channel_id)
+        return await channel.fetch_message(message_id)
+
+    async def query_members(self, guild, id_nums):
+        return await guild.query_members(user_ids=id_nums, cache=True)
+
+    def forget_members(self, guild, members):
+        if self.keep_members == False:
+            for temp_member in members:
+                # discord.py has no public way to uncache a member
+                guild._remove_member(temp_member)
+
+    def get_role(self, guild, name):
+        for role in guild.roles:
+            if role.name == name:
+                return role
+        return None
+
+def make_button_callback(custom_id, on_click):
+    async def callback(interaction):
+        respond = lambda content: interaction.response.send_message(content, ephemeral=True)
+        await on_click(interaction.user, custom_id, respond)
+    return callback
+
+class Caching_Transport(Transport):
+
+    """Wraps another transport, remembering every role and channel it resolves.
+
+    Looking a role up by name scans every role of the guild, and games do it at every start and end. Each is
+    resolved once and kept until a gateway event says it changed: lychee.py calls forget_roles and forget_channel
+    from the role and channel update events, and forget_roles when the bot leaves a guild. Lookups that find nothing
+    are not remembered, so a role or channel that is created later is still found.
+
+    Opened DM channels are kept by user id, least recently used first, so a player's DM channel is only opened for
+    their first game. discord.py's own cache of DM channels is much smaller, and a member fetched again after lean
+    mode forgot them starts without one.
+
+    Parameters
+    ----------
+    transport : Transport
+        Makes every call and every lookup that is not remembered yet
+
+    Attributes
+    ----------
+    roles : Dict[Tuple[int, str], discord.Role]
+        Each resolved role by its guild's id and its name
+    channels : Dict[int, discord.abc.GuildChannel]
+        Each resolved channel by id
+    dm_channels : collections.OrderedDict[int, discord.DMChannel]
+        The DM channel of each member it was opened for by user id, least recently used first, at most
+        DM_CHANNEL_CACHE_SIZE of them
+    transport
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.roles = {} # Dict[Tuple[int, str], discord.Role]
+        self.channels = {} # Dict[int, discord.abc.GuildChannel]
+        self.dm_channels = collections.OrderedDict() # collections.OrderedDict[int, discord.DMChannel]
+
+    async def send_message(self, channel, content):
+        return await self.transport.send_message(channel, content)
+
+    async def edit_message(self, message, content, remove_buttons=False):
+        await self.transport.edit_message(message, content, remove_buttons)
+
+    async def send_buttons(self, channel, content, buttons, on_click):
+        return await self.transport.send_buttons(channel, content, buttons, on_click)
+
+    async def pin_message(self, message):
+        await self.transport.pin_message(message)
+
+    async def unpin_message(self, channel, message_id):
+        await self.transport.unpin_message(channel, message_id)
+
+    async def create_dm(self, member):
+        channel = self.get_dm_channel(member)
+        if channel == None:
+            channel = await self.transport.create_dm(member)
+            self.dm_channels[member.id] = channel
+            if len(self.dm_channels) > DM_CHANNEL_CACHE_SIZE:
+                self.dm_channels.popitem(last=False)
+        return channel
+
+    def get_dm_channel(self, member):
+        channel = self.dm_channels.get(member.id)
+        if channel == None:
+            return self.transport.get_dm_channel(member)
+        self.dm_channels.move_to_end(member.id)
+        return channel
+
+    async def add_role(self, member, role):
+        await self.transport.add_role(member, role)
+
+    async def remove_role(self, member, role):
+        await self.transport.remove_role(member, role)
+
+    async def set_presence(self, status, activity):
+        await self.transport.set_presence(status, activity)
+
+    def get_channel(self, id_num):
+        channel = self.channels.get(id_num)
+        if channel == None:
+            channel = self.transport.get_channel(id_num)
+            if channel != None:
+                self.channels[id_num] = channel
+        return channel
+
+    def get_member(self, guild, id_num):
+        return self.transport.get_member(guild, id_num)
+
+    async def fetch_message(self, channel_id, message_id):
+        return await self.transport.fetch_message(channel_id, message_id)
+
+    async def query_members(self, guild, id_nums):
+        return await self.transport.query_members(guild, id_nums)
+
+    def forget_members(self, guild, members):
+        self.transport.forget_members(guild, members)
+
+    def get_role(self, guild, name):
+        key = (guild.id, name)
+        role = self.roles.get(key)
+        if role == None:
+            role = self.transport.get_role(guild, name)
+            if role != None:
+                self.roles[key] = role
+        return role
+
+    def forget_roles(self, guild):
+        """Forgets every role of a guild, after any of its roles is created, renamed or deleted or the bot leaves
+        the guild."""
+        for key in [key for key in self.roles if key[0] == guild.id]:
+            del self.roles[key]
+
+    def forget_channel(self, channel):
+        self.channels.pop(channel.id, None)
@@ -1,10 +1,22 @@
 import discord
-import random
+
+from metrics import timed_phase
+from player import CARD_NAMES
+from player_table import ALIGNMENTS, count_seats
+
+def new_alignment_counts():
+    counts = {}
+    for temp_alignment in ALIGNMENTS:
+        counts[temp_alignment] = 0
+    return counts
 
 class Voter():
 
     """Stores information about a vote on a proposed team.
 
+    Votes are stored as seat masks of the game's player table, next to how many players of each alignment voted each
+    way, so that roles swap votes and check how an alignment voted without looping over the players.
+
     Parameters
     ----------
     game : discord.Game
@@ -12,23 +24,35 @@ class Voter():
 
     Attributes
     ----------
-    voted_accept : List[Players]
-        The players who have voted accept
-    voted_reject : List[Players]
-        The players who have voted reject
-    recent_voted_accept : List[Players]
-        The most recent copy of voted_accept
-    recent_voted_reject : List[Players]
-        The most recent copy of voted_reject
+    accept_mask : int
+        The seat mask of the players who have voted accept
+    reject_mask : int
+        The seat mask of the players who have voted reject
+    accept_counts : Dict[str, int]
+        How many players of each alignment have voted accept
+    reject_counts : Dict[str, int]
+        How many players of each alignment have voted reject
+    recent_accept_mask : int
+        The most recent copy of accept_mask
+    recent_reject_mask : int
+        The most recent copy of reject_mask
+    recent_accept_counts : Dict[str, int]
+        The most recent copy of accept_counts
+    recent_reject_counts : Dict[str, int]
+        The most recent copy of reject_counts
     game
     """
 
     def __init__(self, game):
         self.game = game
-        self.voted_accept = []
-        self.voted_reject = []
-        self.recent_voted_accept = []
-        self.recent_voted_reject = []
+        self.accept_mask = 0
+        self.reject_mask = 0
+        self.accept_counts = new_alignment_counts()
+        self.reject_counts = new_alignment_counts()
+        self.recent_accept_mask = 0
+        self.recent_reject_mask = 0
+        self.recent_accept_counts = new_alignment_counts()
+        self.recent_reject_counts = new_alignment_counts()
 
     async def record_vote(self, player, vote):
         """Records a vote.
@@ -40,38 +64,118 @@ class Voter():
         vote : int
             The submitted vote: 0=accept, 1=reject
         """
+        self.game.log_event('vote', self.game.get_player_index(player), vote)
         if vote == 0:
-            self.voted_accept.append(player)
+            self.accept_mask |= self.game.player_table.get_bit(player)
+            self.accept_counts[player.alignment] += 1
             player.set_done_voting()
-            await player.member.dm_channel.send('Thank you for your `>>vote accept`.')
+            if not self.game.use_buttons:
+                await player.confirm('Thank you for your `>>vote accept`.')
         else:
-            self.voted_reject.append(player)
+            self.reject_mask |= self.game.player_table.get_bit(player)
+            self.reject_counts[player.alignment] += 1
             player.set_done_voting()
-            await player.member.dm_channel.send('Thank you for your `>>vote reject`.')
+            if not self.game.use_buttons:
+                await player.confirm('Thank you for your `>>vote reject`.')
         await self.check_all_voted()
 
+    @timed_phase
     async def check_all_voted(self):
-        if len(self.voted_accept) + len(self.voted_reject) == self.game.player_count:
-            random.shuffle(self.voted_accept)
-            random.shuffle(self.voted_reject)
-            await self.game.do_post_vote_actions() 
-            random.shuffle(self.voted_accept)
-            random.shuffle(self.voted_reject)
-            if len(self.voted_accept) > len(self.voted_reject):
+        if self.get_accept_count() + self.get_reject_count() == self.game.player_count:
+            self.game.cancel_phase_deadline()
+            await self.game.finish_progress()
+            await self.game.do_phase_actions('post_vote')
+            if self.get_accept_count() > self.get_reject_count():
                 await self.game.start_mission()
             else:
                 await self.game.rejected_team()
 
+    def get_voted_mask(self):
+        return self.accept_mask | self.reject_mask
+
+    def get_accept_count(self):
+        return sum(self.accept_counts.values())
+
+    def get_reject_count(self):
+        return sum(self.reject_counts.values())
+
+    def has_voted_accept(self, player):
+        return self.accept_mask & self.game.player_table.get_bit(player) != 0
+
+    def has_voted_reject(self, player):
+        return self.reject_mask & self.game.player_table.get_bit(player) != 0
+
+    def get_voted_accept(self):
+        return self.game.player_table.get_players(self.accept_mask)
+
+    def get_voted_reject(self):
+        return self.game.player_table.get_players(self.reject_mask)
+
+    def swap_votes(self):
+        """Swaps everyone's vote."""
+        temp_accept_mask = self.accept_mask
+        self.accept_mask = self.reject_mask
+        self.reject_mask = temp_accept_mask
+        temp_accept_counts = self.accept_counts
+        self.accept_counts = self.reject_counts
+        self.reject_counts = temp_accept_counts
+
+    def swap_vote(self, player):
+        """Swaps one player's vote."""
+        bit = self.game.player_table.get_bit(player)
+        if self.accept_mask & bit:
+            self.accept_mask &= ~bit
+            self.accept_counts[player.alignment] -= 1
+            self.reject_mask |= bit
+            self.reject_counts[player.alignment] += 1
+        elif self.reject_mask & bit:
+            self.reject_mask &= ~bit
+            self.reject_counts[player.alignment] -= 1
+            self.accept_mask |= bit
+            self.accept_counts[player.alignment] += 1
+
+    def reject_all(self):
+        """Changes every accept vote to reject."""
+        self.reject_mask |= self.accept_mask
+        for temp_alignment in ALIGNMENTS:
+            self.reject_counts[temp_alignment] += self.accept_counts[temp_alignment]
+        self.accept_mask = 0
+        self.accept_counts = new_alignment_counts()
+
     def reset(self):
-        self.recent_voted_accept = self.voted_accept
-        self.recent_voted_reject = self.voted_reject        
-        self.voted_accept = []
-        self.voted_reject = []
+        self.recent_accept_mask = self.accept_mask
+        self.recent_reject_mask = self.reject_mask
+        self.recent_accept_counts = self.accept_counts
+        self.recent_reject_counts = self.reject_counts
+        self.accept_mask = 0
+        self.reject_mask = 0
+        self.accept_counts = new_alignment_counts()
+        self.reject_counts = new_alignment_counts()
+
+    def get_state(self):
+        return {'accept_mask': self.accept_mask,
+                'reject_mask': self.reject_mask,
+                'recent_accept_mask': self.recent_accept_mask,
+                'recent_reject_mask': self.recent_reject_mask}
+
+    def restore(self, state):
+        """Restores the vote from get_state, counting each mask's alignments again."""
+        player_table = self.game.player_table
+        self.accept_mask = state['accept_mask']
+        self.reject_mask = state['reject_mask']
+        self.recent_accept_mask = state['recent_accept_mask']
+        self.recent_reject_mask = state['recent_reject_mask']
+        self.accept_counts = player_table.count_alignments(self.accept_mask)
+        self.reject_counts = player_table.count_alignments(self.reject_mask)
+        self.recent_accept_counts = player_table.count_alignments(self.recent_accept_mask)
+        self.recent_reject_counts = player_table.count_alignments(self.recent_reject_mask)
 
 class Missioner():
 
     """Stores information about a mission
 
+    Mission cards are stored like votes, as one seat mask and one count per card.
+
     Parameters
     ----------
     game : discord.Game
@@ -79,29 +183,23 @@ class Missioner():
 
     Attributes
     ----------
-    conducted_success : List[Player]
-        The players who have played a success card
-    conducted_fail : List[Player]
-        The players who have played a fail card
-    conducted_switch : List[Player]
-        The players who have played a switch card
-    recent_conducted_success : List[Player]
-        The most recent copy of conducted_success
-    recent_conducted_fail : List[Player]
-        The most recent copy of conducted_fail
-    recent_conducted_switch : List[Player]
-        The most recent copy of conducted_switch
+    card_masks : List[int]
+        The seat mask of the players who have played each card: [success, fail, switch]
+    card_counts : List[int]
+        How many players have played each card: [success, fail, switch]
+    recent_card_masks : List[int]
+        The most recent copy of card_masks
+    recent_card_counts : List[int]
+        The most recent copy of card_counts
     game
     """
 
     def __init__(self, game):
         self.game = game
-        self.conducted_success = []
-        self.conducted_fail = []
-        self.conducted_switch = []
-        self.recent_conducted_success = []
-        self.recent_conducted_fail = []
-        self.recent_conducted_switch = []
+        self.card_masks = [0, 0, 0]
+        self.card_counts = [0, 0, 0]
+        self.recent_card_masks = [0, 0, 0]
+        self.recent_card_counts = [0, 0, 0]
 
     async def record_mission_card(self, player, card):
         """Records a mission card.
@@ -110,32 +208,70 @@ class Missioner():
         ----------
         player : discord.Player
             The player who voted
-        vote : int
-            The submitted vote: 0=success, 1=fail, 2=switch
+        card : int
+            The submitted card: 0=success, 1=fail, 2=switch
         """
-        if card == 0:
-            self.conducted_success.append(player)
-            player.set_done_missioning()
-            await player.member.dm_channel.send('Thank you for your `>>mission success`.')
-        elif card == 1:
-            self.conducted_fail.append(player)
-            player.set_done_missioning()
-            await player.member.dm_channel.send('Thank you for your `>>mission fail`.')
-        else:
-            self.conducted_switch.append(player)
-            player.set_done_missioning()
-            await player.member.dm_channel.send('Thank you for your `>>mission switch`.')
+        self.game.log_event('mission', self.game.get_player_index(player), card)
+        self.card_masks[card] |= self.game.player_table.get_bit(player)
+        self.card_counts[card] += 1
+        player.set_done_missioning()
+        # a button click is already answered by the game
+        if not self.game.use_buttons:
+            await player.confirm(f'Thank you for your `>>mission {CARD_NAMES[card]}`.')
         await self.check_all_conducted_mission() #TODO
-        
+
+    @timed_phase
     async def check_all_conducted_mission(self):
-        if len(self.conducted_success) + len(self.conducted_fail) + len(self.conducted_switch) == int(self.game.get_team_size()):
-            await self.game.do_post_mission_actions()
+        if sum(self.card_counts) == int(self.game.get_team_size()):
+            self.game.cancel_phase_deadline()
+            await self.game.finish_progress()
+            await self.game.do_phase_actions('post_mission')
             await self.game.end_mission()
 
+    def has_played(self, player, card):
+        return self.card_masks[card] & self.game.player_table.get_bit(player) != 0
+
+    def has_recently_played(self, player, card):
+        return self.recent_card_masks[card] & self.game.player_table.get_bit(player) != 0
+
+    def change_card(self, player, card):
+        """Changes the card a player played to another card."""
+        bit = self.game.player_table.get_bit(player)
+        for x in range(len(self.card_masks)):
+            if self.card_masks[x] & bit:
+                self.card_masks[x] &= ~bit
+                self.card_counts[x] -= 1
+        self.card_masks[card] |= bit
+        self.card_counts[card] += 1
+
+    def change_all_cards(self, card):
+        """Changes every played card to one card."""
+        for x in range(len(self.card_masks)):
+            if x != card:
+                self.card_masks[card] |= self.card_masks[x]
+                self.card_counts[card] += self.card_counts[x]
+                self.card_masks[x] = 0
+                self.card_counts[x] = 0
+
+    def get_submitted_mask(self):
+        return self.card_masks[0] | self.card_masks[1] | self.card_masks[2]
+
+    def get_recent_submitted_mask(self):
+        return self.recent_card_masks[0] | self.recent_card_masks[1] | self.recent_card_masks[2]
+
     def reset(self):
-        self.recent_conducted_success = self.conducted_success
-        self.recent_conducted_fail = self.conducted_fail
-        self.recent_conducted_switch = self.conducted_switch
-        self.conducted_success = []
-        self.conducted_fail = []
-        self.conducted_switch = []
\ No newline at end of file
+        self.recent_card_masks = self.card_masks
+        self.recent_card_counts = self.card_counts
+        self.card_masks = [0, 0, 0]
+        self.card_counts = [0, 0, 0]
+
+    def get_state(self):
+        return {'card_masks': list(self.card_masks),
+                'recent_card_masks': list(self.recent_card_masks)}
+
+    def restore(self, state):
+        """Restores the mission from get_state, counting each mask again."""
+        self.card_masks = list(state['card_masks'])
+        self.recent_card_masks = list(state['recent_card_masks'])
+        self.card_counts = [count_seats(mask) for mask in self.card_masks]
+        self.recent_card_counts = [count_seats(mask) for mask in self.recent_card_masks]